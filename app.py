@@ -1,38 +1,375 @@
-
-
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, g, Response, jsonify, abort, make_response
+from flask import before_render_template, template_rendered, has_request_context
 import mysql.connector
 import config
-import pandas as pd
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.units import cm
-from reportlab.platypus import Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from openpyxl import Workbook
-from datetime import date
-from mysql.connector.errors import IntegrityError
+import db
+import catalogo
+import cache_paginas
+import resumenes
+import exportaciones
+import trabajos
+import migraciones
+import importaciones
+import versiones_tablas
+import contrasenas
+import metricas
+import semillas
+import click
+from datetime import date, datetime, timezone
+import base64
+from functools import wraps
+import hashlib
+import json
+import os
+import re
+import time
+from mysql.connector import errorcode
+from mysql.connector.errors import DataError, IntegrityError
 from flask import flash
-from werkzeug.security import generate_password_hash
-from werkzeug.security import check_password_hash
+from versiones_tablas import marcar_cambio
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = config.IMPORT_MAX_MB * 1024 * 1024
 
 # ----------------- Conexión a la base de datos ------------------
 
+def solo_lectura(vista):
+    """
+    Decorador: la ruta no escribe en la base de datos, así que puede leer de
+    una réplica (config.DB_REPLICAS). Va debajo de @app.route.
+    """
+    vista.solo_lectura = True
+    return vista
+
+def puede_usar_replica():
+    """
+    La petición actual es de una ruta @solo_lectura y la sesión no escribió
+    hace poco (en ese caso lee de la primaria para ver sus propios cambios).
+    """
+    if not config.DB_REPLICAS or not has_request_context():
+        return False
+    vista = app.view_functions.get(request.endpoint)
+    return (getattr(vista, 'solo_lectura', False)
+            and session.get('primaria_hasta', 0) < time.time())
+
 def get_db_connection():
     """
-    Establece y devuelve una conexión a la base de datos MySQL
-    usando los datos definidos en el archivo config.py
+    Devuelve la conexión a la base de datos MySQL de la petición actual.
+    La primera llamada la toma del pool (ver db.py) y la guarda en `g`;
+    las siguientes dentro de la misma petición reutilizan la misma conexión.
+    Las rutas @solo_lectura la toman de una réplica al día, si hay.
+    Se regresa al pool automáticamente al terminar la petición.
+    """
+    if 'db_conn' not in g:
+        if puede_usar_replica():
+            g.db_destino, g.db_conn = db.obtener_para_lectura()
+        else:
+            g.db_destino, g.db_conn = db.PRIMARIA, db.obtener_pool().obtener()
+    return g.db_conn
+
+@app.after_request
+def recordar_escritura(respuesta):
+    """
+    Si la petición confirmó cambios, las lecturas de la misma sesión van a la
+    primaria durante DB_REPLICA_MAX_LAG segundos, para que el usuario vea lo que acaba de guardar.
+    """
+    conn = g.get('db_conn')
+    if config.DB_REPLICAS and conn is not None and getattr(conn, 'hubo_commit', False):
+        session['primaria_hasta'] = time.time() + config.DB_REPLICA_MAX_LAG
+    return respuesta
+
+@app.teardown_appcontext
+def liberar_db_connection(exc):
+    """
+    Regresa al pool la conexión usada por la petición, si se abrió alguna.
+    Si la petición terminó con un error de base de datos la conexión se descarta.
+    """
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        destino = g.pop('db_destino', db.PRIMARIA)
+        db.obtener_pool(destino).liberar(conn, descartar=isinstance(exc, mysql.connector.Error))
+
+@app.errorhandler(contrasenas.HashSaturado)
+def hash_saturado(error):
+    """
+    Demasiados inicios de sesión o registros a la vez: responder 503 en lugar de encolarlos sin límite.
+    """
+    return "Hay demasiados inicios de sesión en este momento, intenta de nuevo en unos segundos.", 503
+
+@app.errorhandler(db.PoolAgotado)
+def pool_agotado(error):
+    """
+    Todas las conexiones están ocupadas: responder 503 en lugar de colgar la petición.
+    """
+    return "El servicio está saturado, intenta de nuevo en unos segundos.", 503
+
+# ----------------- Métricas ------------------
+
+@app.before_request
+def iniciar_medicion():
+    g.metricas_inicio = time.perf_counter()
+    g.metricas_token = metricas.iniciar_peticion()
+
+def presupuesto_consultas(maximo):
+    """
+    Decorador: fija cuántas consultas puede hacer la ruta por petición en
+    lugar de config.DB_QUERY_BUDGET. Con None la ruta no tiene límite.
+    Va debajo de @app.route.
+    """
+    def decorador(vista):
+        vista.presupuesto_consultas = maximo
+        return vista
+    return decorador
+
+def terminar_medicion(estado):
+    """
+    Registra la duración de la petición y su tiempo en MySQL (ver metricas.py)
+    y revisa el presupuesto de consultas de la ruta. Devuelve el mensaje de
+    exceso, si lo hubo. Las rutas se agrupan por regla (/editar_curso/<int:id>), no por URL.
+    """
+    token = g.pop('metricas_token', None)
+    if token is None:
+        return None
+    ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    registro = metricas.terminar_peticion(token, ruta, request.method, estado,
+                                          time.perf_counter() - g.metricas_inicio)
+    vista = app.view_functions.get(request.endpoint)
+    exceso = metricas.revisar_presupuesto(
+        registro, getattr(vista, 'presupuesto_consultas', config.DB_QUERY_BUDGET))
+    if exceso:
+        metricas.incrementar('kevza_presupuesto_excedido_total', ruta=ruta)
+        db.log_consultas.warning("%s %s: %s", request.method, ruta, exceso)
+    if metricas.toca_guardar():
+        guardar_metricas()
+    return exceso
+
+def guardar_metricas():
+    for destino, pool in db.pools().items():
+        for dato, valor in pool.estadisticas().items():
+            metricas.fijar('kevza_pool_conexiones', valor, dato=dato, destino=destino)
+    try:
+        metricas.guardar()
+    except OSError as error:
+        app.logger.warning("No se pudieron guardar las métricas: %s", error)
+
+@app.after_request
+def registrar_medicion(respuesta):
+    exceso = terminar_medicion(respuesta.status_code)
+    if exceso and config.DB_QUERY_BUDGET_ESTRICTO:
+        # En pruebas: que una consulta de más haga fallar la petición
+        raise metricas.PresupuestoExcedido(f"{request.method} {request.path}: {exceso}")
+    return respuesta
+
+@app.teardown_request
+def registrar_medicion_con_error(exc):
+    # Solo llega aquí sin medir si la vista lanzó una excepción no manejada
+    terminar_medicion(500)
+
+def _inicio_plantilla(sender, template, context, **extra):
+    g.setdefault('metricas_plantillas', []).append(time.perf_counter())
+
+def _fin_plantilla(sender, template, context, **extra):
+    inicios = g.get('metricas_plantillas')
+    if inicios:
+        metricas.observar('kevza_plantilla_segundos', time.perf_counter() - inicios.pop(),
+                          plantilla=template.name)
+
+before_render_template.connect(_inicio_plantilla, app)
+template_rendered.connect(_fin_plantilla, app)
+
+@app.route('/metrics')
+def metrics():
+    """
+    Métricas de todos los procesos en el formato de texto de Prometheus.
+    """
+    guardar_metricas()
+    return Response(metricas.texto_prometheus(), mimetype='text/plain; version=0.0.4')
+
+# ----------------- Paginación por cursor (keyset) ------------------
+
+def codificar_cursor(valores):
+    """
+    Convierte los valores de ordenamiento de una fila en un token opaco para la URL.
+    """
+    texto = json.dumps([v.isoformat() if isinstance(v, date) else v for v in valores])
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+def decodificar_cursor(token):
+    """
+    Devuelve la lista de valores guardada en un token, o None si el token no es válido.
+    """
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except ValueError:
+        return None
+    return valores if isinstance(valores, list) else None
+
+def obtener_tamano_pagina(por_defecto=None):
+    """
+    Tamaño de página pedido en ?por_pagina=, acotado por config.PAGE_SIZE_MAX.
+    """
+    por_defecto = por_defecto or config.PAGE_SIZE
+    try:
+        tamano = int(request.args.get('por_pagina', por_defecto))
+    except ValueError:
+        tamano = por_defecto
+    return max(1, min(tamano, config.PAGE_SIZE_MAX))
+
+def paginar_keyset(cursor, sql, condiciones, params, orden, descendente=False, tamano_defecto=None,
+                   admite_nulos=()):
+    """
+    Ejecuta `sql` (sin WHERE ni ORDER BY) paginando por cursor en lugar de OFFSET.
+
+    `orden` es una lista de pares (expresión SQL, clave en la fila); la última
+    debe ser única (la llave primaria) para que el orden sea estable. Si la
+    expresión lleva parámetros se puede pasar una tercia (expresión, clave, params).
+    `admite_nulos` lista las claves cuya columna puede ser NULL; MySQL ordena
+    los NULL antes que cualquier valor, y el cursor los respeta.
+    Lee ?despues= / ?antes= de la petición y devuelve (filas, pagina), donde
+    `pagina` trae las URLs de la página siguiente y anterior conservando el
+    resto de los parámetros (búsqueda, orden, tamaño).
+    """
+    tamano = obtener_tamano_pagina(tamano_defecto)
+    despues = decodificar_cursor(request.args.get('despues'))
+    antes = decodificar_cursor(request.args.get('antes'))
+    cursor_valores = despues or antes
+    hacia_atras = antes is not None and despues is None
+
+    condiciones = list(condiciones)
+    params = list(params)
+    orden = [o if len(o) == 3 else (o[0], o[1], ()) for o in orden]
+
+    # Al ir hacia atrás se recorre el índice en sentido contrario y luego se invierte
+    desc_consulta = descendente != hacia_atras
+    if cursor_valores is not None and len(cursor_valores) == len(orden):
+        operador = '<' if desc_consulta else '>'
+        alternativas = []
+        for i, (expresion, clave, params_expresion) in enumerate(orden):
+            valor = cursor_valores[i]
+            if valor is None:
+                if desc_consulta:
+                    continue                # en orden descendente nada va después de NULL
+                ultima, params_ultima = f"{expresion} IS NOT NULL", list(params_expresion)
+            elif desc_consulta and clave in admite_nulos:
+                ultima = f"({expresion} {operador} %s OR {expresion} IS NULL)"
+                params_ultima = [*params_expresion, valor, *params_expresion]
+            else:
+                ultima, params_ultima = f"{expresion} {operador} %s", [*params_expresion, valor]
+            partes = []
+            for (e, _, p), anterior in zip(orden[:i], cursor_valores):
+                partes.append(f"{e} IS NULL" if anterior is None else f"{e} = %s")
+                params.extend(p)
+                if anterior is not None:
+                    params.append(anterior)
+            partes.append(ultima)
+            params.extend(params_ultima)
+            alternativas.append("(" + " AND ".join(partes) + ")")
+        condiciones.append("(" + " OR ".join(alternativas) + ")" if alternativas else "FALSE")
+
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    direccion = 'DESC' if desc_consulta else 'ASC'
+    sql += " ORDER BY " + ", ".join(f"{e} {direccion}" for e, _, _ in orden)
+    for _, _, params_expresion in orden:
+        params.extend(params_expresion)
+    sql += " LIMIT %s"
+    params.append(tamano + 1)
+
+    cursor.execute(sql, params)
+    filas = cursor.fetchall()
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+
+    def url_con(**cambios):
+        args = dict(request.view_args or {}, **request.args.to_dict())
+        args.pop('despues', None)
+        args.pop('antes', None)
+        args.update(cambios)
+        return url_for(request.endpoint, **args)
+
+    def clave(fila):
+        return codificar_cursor([fila[c] for _, c, _ in orden])
+
+    hay_siguiente = hay_mas if not hacia_atras else True
+    hay_anterior = hay_mas if hacia_atras else cursor_valores is not None
+    pagina = {
+        'siguiente': url_con(despues=clave(filas[-1])) if filas and hay_siguiente else None,
+        'anterior': url_con(antes=clave(filas[0])) if filas and hay_anterior else None,
+        'primera': url_con() if cursor_valores is not None else None,
+    }
+    return filas, pagina
+
+# ----------------- Caché de páginas ------------------
+
+def datos_de_replica_atrasados(etiqueta):
+    """
+    La petición lee de una réplica cuyas versiones de las tablas de `etiqueta`
+    son anteriores a las conocidas en este proceso (p. ej. justo después de
+    una escritura hecha aquí en la primaria).
+    """
+    if not puede_usar_replica():
+        return False
+    conn = get_db_connection()
+    if g.get('db_destino', db.PRIMARIA) == db.PRIMARIA:
+        return False
+    versiones, _ = versiones_tablas.leer(conn, tuple(etiqueta))
+    return any(versiones.get(tabla, -1) < (version or 0) for tabla, version in etiqueta.items())
+
+def cache_de_pagina(*tablas, omitir_si=(), versiones=None):
+    """
+    Guarda en cache_paginas el HTML de una ruta GET, por ruta, parámetros
+    (sin los vacíos) y usuario de la sesión, etiquetado con las versiones de
+    `tablas`. No se usa si llega alguno de los parámetros de `omitir_si` o si
+    hay mensajes flash pendientes. `versiones` devuelve las versiones de los
+    datos que va a mostrar la vista cuando no los lee directo de la base (p. ej.
+    el catálogo en memoria); si devuelve None la página no se guarda.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if '_flashes' in session or any(request.args.get(p) for p in omitir_si):
+                return vista(*args, **kwargs)
+
+            cache = cache_paginas.cache
+            cache.asegurar_vigente(get_db_connection, tablas)
+            parametros = tuple(sorted((k, v) for k, v in request.args.items(multi=True) if v))
+            clave = (request.endpoint, parametros, session.get('usuario'))
+            guardada = cache.obtener(clave, tablas)
+            if guardada is not None:
+                contenido, content_type = guardada
+                return Response(contenido, content_type=content_type, headers={'X-Cache': 'HIT'})
+
+            # Las versiones se toman antes de generar la página: si los datos
+            # cambian mientras tanto, la página queda etiquetada con una versión
+            # vieja y simplemente no se vuelve a servir
+            etiqueta = versiones() if versiones else cache.versiones_actuales(tablas)
+            if etiqueta is not None and versiones is None and datos_de_replica_atrasados(etiqueta):
+                # La página saldrá de una réplica que aún no tiene esas
+                # versiones: se muestra, pero no se guarda con una etiqueta que no le corresponde
+                etiqueta = None
+            respuesta = make_response(vista(*args, **kwargs))
+            if etiqueta is not None and respuesta.status_code == 200 and not respuesta.direct_passthrough:
+                cache.guardar(clave, etiqueta, respuesta.get_data(), respuesta.content_type)
+            respuesta.headers['X-Cache'] = 'MISS'
+            return respuesta
+        return envoltura
+    return decorador
+
+# ----------------- Listados ------------------
+
+def descripcion_recortada(columna):
+    """
+    Expresión SQL que devuelve `columna` recortada a config.DESCRIPCION_LISTADO
+    caracteres (con '…' si se cortó), igual que catalogo.recortar(). Los
+    listados no traen el TEXT completo; las páginas de edición sí.
     """
-    return mysql.connector.connect(
-        host=config.DB_HOST,
-        user=config.DB_USER,
-        password=config.DB_PASSWORD,
-        database=config.DB_NAME
-    )
+    largo = int(config.DESCRIPCION_LISTADO)
+    return f"IF(CHAR_LENGTH({columna}) > {largo}, CONCAT(LEFT({columna}, {largo}), '…'), {columna})"
 
 # ----------------- Categorías ------------------
 
@@ -54,6 +391,8 @@ def registrar_categoria():
         # Validar que nombre no esté vacío
         if not nombre:
             errores.append("El nombre de la categoría es obligatorio.")
+        elif len(nombre) > 50:
+            errores.append("El nombre de la categoría no puede tener más de 50 caracteres.")
         
         # Validar que no exista ya ese nombre en la BD
         cursor.execute("SELECT id_categoria FROM categorias WHERE nombre = %s", (nombre,))
@@ -62,7 +401,6 @@ def registrar_categoria():
         
         if errores:
             cursor.close()
-            conn.close()
             return render_template('registrar_categoria.html',
                                    error=' '.join(errores),
                                    nombre=nombre,
@@ -70,23 +408,26 @@ def registrar_categoria():
 
         # Insertar categoría nueva
         cursor.execute("INSERT INTO categorias (nombre, descripcion) VALUES (%s, %s)", (nombre, descripcion))
+        versiones = marcar_cambio(conn, 'categorias')
         conn.commit()
+        catalogo.indice.registrar_cambio(versiones)
+        cache_paginas.cache.registrar_cambio(versiones)
         cursor.close()
-        conn.close()
         return redirect('/consultar_categorias')
     
     cursor.close()
-    conn.close()
     return render_template('registrar_categoria.html')
 
 @app.route('/consultar_categorias')
+@solo_lectura
+@cache_de_pagina('categorias')
 def consultar_categorias():
     """
     Mostrar todas las categorías con opción de ordenarlas por nombre ascendente o descendente.
     """
     orden = request.args.get('orden', 'nombre_asc')
 
-    sql = "SELECT * FROM categorias"
+    sql = f"SELECT id_categoria, nombre, {descripcion_recortada('descripcion')} AS descripcion FROM categorias"
     if orden == 'nombre_desc':
         sql += " ORDER BY nombre DESC"
     elif orden == 'nombre_asc':
@@ -99,13 +440,47 @@ def consultar_categorias():
     cursor.execute(sql)
     categorias = cursor.fetchall()
     cursor.close()
-    conn.close()
     
     return render_template('consultar_categorias.html', categorias=categorias, orden=orden)
 
 
 # ----------------- Participantes ------------------
 
+# Índice único de participantes -> (campo, mensaje para el usuario)
+DUPLICADOS_PARTICIPANTE = {
+    'uq_participantes_nombre': ('nombre', "Ya existe un participante con ese nombre completo."),
+    'uq_participantes_correo': ('correo', "Ya existe un participante con ese correo electrónico."),
+    'uq_participantes_telefono': ('telefono', "Ya existe un participante con ese teléfono."),
+    'usuario': ('usuario', "Ese nombre de usuario ya está en uso."),
+}
+
+def errores_duplicado_participante(cursor, error, nombre, correo, telefono, usuario, excluir_id=None):
+    """
+    Traduce el IntegrityError de un INSERT/UPDATE de participantes a mensajes
+    por campo. MySQL solo informa el primer índice violado, así que se revisan
+    los cuatro campos en una sola consulta para mostrar todos los repetidos.
+    """
+    cursor.execute("""
+        SELECT COALESCE(MAX(nombre = %s), 0) AS nombre,
+               COALESCE(MAX(correo = %s), 0) AS correo,
+               COALESCE(MAX(telefono = %s), 0) AS telefono,
+               COALESCE(MAX(usuario = %s), 0) AS usuario
+        FROM participantes
+        WHERE (nombre = %s OR correo = %s OR telefono = %s OR usuario = %s)
+          AND id_participante <> %s
+    """, (nombre, correo, telefono, usuario or None,
+          nombre, correo, telefono, usuario or None, excluir_id or 0))
+    repetidos = cursor.fetchone()
+    errores = [mensaje for campo, mensaje in DUPLICADOS_PARTICIPANTE.values() if repetidos[campo]]
+    if not errores:
+        # El registro que chocaba ya no existe; usar lo que reportó MySQL
+        coincidencia = re.search(r"for key '(?:\w+\.)?(\w+)'", error.msg or '')
+        if coincidencia and coincidencia.group(1) in DUPLICADOS_PARTICIPANTE:
+            errores.append(DUPLICADOS_PARTICIPANTE[coincidencia.group(1)][1])
+        else:
+            errores.append("No se pudo guardar el participante: los datos chocan con otro registro.")
+    return errores
+
 @app.route('/registrar_participante', methods=['GET', 'POST'])
 def registrar_participante():
     conn = get_db_connection()
@@ -133,27 +508,8 @@ def registrar_participante():
         if not telefono:
             errores.append("El teléfono es obligatorio.")
 
-        # Validar duplicados
-        cursor.execute("SELECT id_participante FROM participantes WHERE nombre = %s", (nombre,))
-        if cursor.fetchone():
-            errores.append("Ya existe un participante con ese nombre completo.")
-
-        cursor.execute("SELECT id_participante FROM participantes WHERE correo = %s", (correo,))
-        if cursor.fetchone():
-            errores.append("Ya existe un participante con ese correo electrónico.")
-
-        cursor.execute("SELECT id_participante FROM participantes WHERE telefono = %s", (telefono,))
-        if cursor.fetchone():
-            errores.append("Ya existe un participante con ese teléfono.")
-
-        if usuario:
-            cursor.execute("SELECT id_participante FROM participantes WHERE usuario = %s", (usuario,))
-            if cursor.fetchone():
-                errores.append("Ese nombre de usuario ya está en uso.")
-
-        if errores:
+        def formulario_con_errores(errores):
             cursor.close()
-            conn.close()
             return render_template('registrar_participante.html',
                                    error=' '.join(errores),
                                    nombre=nombre,
@@ -165,8 +521,11 @@ def registrar_participante():
                                    ocupacion=ocupacion,
                                    usuario=usuario)
 
+        if errores:
+            return formulario_con_errores(errores)
+
         # Solo generar hash si se proporciona una contraseña
-        password_hash = generate_password_hash(password) if password else None
+        password_hash = contrasenas.generar(password) if password else None
 
         # Preparar campos base
         campos = ["nombre", "correo", "telefono", "direccion", "edad", "genero", "ocupacion", "fecha_registro"]
@@ -176,51 +535,142 @@ def registrar_participante():
         if usuario or password:
             campos.insert(-1, "usuario")
             campos.insert(-1, "password")
-            valores.insert(-1, usuario)
+            valores.insert(-1, usuario or None)
             valores.insert(-1, password_hash)
 
-        # Construir query dinámicamente
+        # Construir query dinámicamente. Los duplicados los detectan los índices
+        # únicos de la tabla: no hace falta consultarlos antes de insertar.
         query = f"""
             INSERT INTO participantes ({', '.join(campos)})
             VALUES ({', '.join(['%s'] * len(valores))})
         """
-        cursor.execute(query, valores)
+        try:
+            cursor.execute(query, valores)
+        except IntegrityError as error:
+            conn.rollback()
+            return formulario_con_errores(
+                errores_duplicado_participante(cursor, error, nombre, correo, telefono, usuario))
+        resumenes.ajustar_total(conn, 'participantes', 1)
+        versiones = marcar_cambio(conn, 'participantes')
         conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
 
         cursor.close()
-        conn.close()
         return redirect('/consultar_participantes')
 
     cursor.close()
-    conn.close()
     return render_template('registrar_participante.html')
 
+@app.route('/importar_participantes', methods=['GET', 'POST'])
+@presupuesto_consultas(None)   # las consultas crecen con el archivo o la selección
+def importar_participantes():
+    """
+    Registrar participantes en bloque desde un archivo CSV o XLSX.
+    En POST procesa el archivo por lotes y muestra el reporte de filas rechazadas.
+    """
+    if 'usuario' not in session:
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            return render_template('importar_participantes.html', error="Selecciona un archivo CSV o XLSX.")
+        try:
+            filas = importaciones.leer_filas(archivo.stream, archivo.filename)
+            reporte = importaciones.importar_participantes(get_db_connection(), filas)
+        except importaciones.ArchivoInvalido as error:
+            return render_template('importar_participantes.html', error=str(error))
+        return render_template('importar_participantes.html', reporte=reporte,
+                               errores_max=config.IMPORT_ERRORES_MAX)
+
+    return render_template('importar_participantes.html')
+
+def construir_busqueda_participantes(busqueda, desde, hasta):
+    """
+    Traduce la búsqueda de participantes a condiciones que usan índices:
+
+    - Una fecha AAAA-MM-DD: igualdad sobre fecha_registro.
+    - Solo dígitos (y separadores de teléfono): prefijo sobre telefono_normalizado.
+    - Texto: MATCH ... AGAINST sobre el índice FULLTEXT (n-gram) de nombre y correo,
+      con la relevancia como criterio de orden.
+
+    `desde` y `hasta` filtran por rango de fecha_registro.
+    Devuelve (condiciones, params, expresion_relevancia, params_relevancia);
+    la expresión es None cuando la búsqueda no es de texto.
+    """
+    condiciones = []
+    params = []
+    relevancia = None
+    params_relevancia = ()
+
+    busqueda = busqueda.strip()
+    digitos = re.sub(r'[\s\-+().]', '', busqueda)
+    if re.fullmatch(r'\d{4}-\d{2}-\d{2}', busqueda):
+        condiciones.append("fecha_registro = %s")
+        params.append(busqueda)
+    elif busqueda and digitos.isdigit():
+        condiciones.append("telefono_normalizado LIKE %s")
+        params.append(digitos + '%')
+    elif busqueda:
+        # Palabras sin operadores booleanos; el parser n-gram ignora términos de un carácter
+        palabras = [p for p in re.findall(r'\w+', busqueda) if len(p) >= config.FT_MIN_TOKEN]
+        if palabras:
+            relevancia = "MATCH(nombre, correo) AGAINST (%s IN BOOLEAN MODE)"
+            params_relevancia = (' '.join(f'+"{p}"' for p in palabras),)
+            condiciones.append(relevancia)
+            params.extend(params_relevancia)
+        else:
+            condiciones.append("nombre LIKE %s")
+            params.append(busqueda.replace('%', '').replace('_', '') + '%')
+
+    if desde:
+        condiciones.append("fecha_registro >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append("fecha_registro <= %s")
+        params.append(hasta)
+
+    return condiciones, params, relevancia, params_relevancia
+
+# Solo las columnas que muestra consultar_participantes.html (nunca el hash de la contraseña)
+COLUMNAS_LISTADO_PARTICIPANTES = (
+    "id_participante, nombre, correo, telefono, edad, genero, ocupacion, fecha_registro")
+
 @app.route('/consultar_participantes')
+@solo_lectura
 def consultar_participantes():
     """
-    Mostrar participantes registrados, con opción a búsqueda.
+    Mostrar participantes registrados, con opción a búsqueda y ordenamiento.
+    Las búsquedas de texto se ordenan por relevancia; los resultados se paginan por cursor.
     """
     busqueda = request.args.get('busqueda', '')
+    desde = request.args.get('desde', '')
+    hasta = request.args.get('hasta', '')
+
+    condiciones, params, relevancia, params_relevancia = \
+        construir_busqueda_participantes(busqueda, desde, hasta)
+
+    orden = request.args.get('orden', 'relevancia' if relevancia else 'registro')
+    sql = f"SELECT {COLUMNAS_LISTADO_PARTICIPANTES} FROM participantes"
+    if orden == 'relevancia' and relevancia:
+        sql = f"SELECT {COLUMNAS_LISTADO_PARTICIPANTES}, {relevancia} AS relevancia FROM participantes"
+        params = list(params_relevancia) + params
+        columnas_orden = [(relevancia, "relevancia", params_relevancia),
+                          ("id_participante", "id_participante")]
+    elif orden in ('nombre_asc', 'nombre_desc'):
+        columnas_orden = [("nombre", "nombre"), ("id_participante", "id_participante")]
+    else:
+        orden = 'registro'
+        columnas_orden = [("id_participante", "id_participante")]
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-
-    if busqueda:
-        sql = """
-            SELECT * FROM participantes
-            WHERE nombre LIKE %s OR correo LIKE %s OR telefono LIKE %s OR fecha_registro LIKE %s
-        """
-        # Usamos %busqueda% para que busque en cualquier parte de la cadena
-        like_busqueda = f"%{busqueda}%"
-        cursor.execute(sql, (like_busqueda, like_busqueda, like_busqueda, like_busqueda))
-    else:
-        cursor.execute("SELECT * FROM participantes")
-
-    participantes = cursor.fetchall()
+    participantes, pagina = paginar_keyset(cursor, sql, condiciones, params, columnas_orden,
+                                           descendente=orden in ('nombre_desc', 'relevancia'))
     cursor.close()
-    conn.close()
 
-    return render_template('consultar_participantes.html', participantes=participantes)
+    return render_template('consultar_participantes.html', participantes=participantes,
+                           pagina=pagina, orden=orden)
 
 
 # ----------------- Cursos ------------------
@@ -244,6 +694,8 @@ def registrar_curso():
         # Validaciones básicas
         if not nombre:
             errores.append("El nombre del curso es obligatorio.")
+        elif len(nombre) > 100:
+            errores.append("El nombre del curso no puede tener más de 100 caracteres.")
         if not descripcion:
             errores.append("La descripción es obligatoria.")
         if not categoria:
@@ -255,15 +707,14 @@ def registrar_curso():
             errores.append("La categoría seleccionada no es válida.")
 
         # Validar que no exista otro curso con el mismo nombre
-        cursor.execute("SELECT * FROM cursos WHERE nombre = %s", (nombre,))
+        cursor.execute("SELECT id_curso FROM cursos WHERE nombre = %s", (nombre,))
         if cursor.fetchone():
             errores.append("Ya existe un curso con ese nombre.")
 
         if errores:
-            cursor.execute("SELECT * FROM categorias ORDER BY nombre ASC")
+            cursor.execute("SELECT id_categoria, nombre FROM categorias ORDER BY nombre ASC")
             categorias = cursor.fetchall()
             cursor.close()
-            conn.close()
             return render_template('registrar_curso.html',
                                    categorias=categorias,
                                    error=' '.join(errores),
@@ -275,50 +726,36 @@ def registrar_curso():
         cursor.execute(
             "INSERT INTO cursos (nombre, descripcion, duracion, id_categoria) VALUES (%s, %s, %s, %s)",
             (nombre, descripcion, duracion or None, categoria))
+        id_curso = cursor.lastrowid
+        resumenes.ajustar_total(conn, 'cursos', 1)
+        versiones = marcar_cambio(conn, 'cursos')
         conn.commit()
+        catalogo.indice.recargar_cursos(cursor, versiones, id_curso=id_curso)
+        cache_paginas.cache.registrar_cambio(versiones)
         cursor.close()
-        conn.close()
         return redirect('/consultar_cursos')
 
     # GET
-    cursor.execute("SELECT * FROM categorias ORDER BY nombre ASC")
+    cursor.execute("SELECT id_categoria, nombre FROM categorias ORDER BY nombre ASC")
     categorias = cursor.fetchall()
     cursor.close()
-    conn.close()
     return render_template('registrar_curso.html', categorias=categorias)
 
 @app.route('/consultar_cursos')
+@solo_lectura
+@cache_de_pagina('categorias', 'cursos', omitir_si=('buscar',), versiones=catalogo.indice.versiones)
 def consultar_cursos():
     """
     Consultar y listar todos los cursos, con opción de búsqueda por nombre, descripción o categoría.
+    La búsqueda se resuelve en memoria con el índice del catálogo (ver catalogo.py).
     """
     buscar = request.args.get('buscar', '').strip()
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
+    catalogo.indice.asegurar_vigente(get_db_connection)
     if buscar:
-        query = """
-            SELECT cursos.*, categorias.nombre AS categoria
-            FROM cursos
-            LEFT JOIN categorias ON cursos.id_categoria = categorias.id_categoria
-            WHERE cursos.nombre LIKE %s
-               OR cursos.descripcion LIKE %s
-               OR categorias.nombre LIKE %s
-        """
-        valores = (f"%{buscar}%", f"%{buscar}%", f"%{buscar}%")
-        cursor.execute(query, valores)
+        cursos = catalogo.indice.buscar(buscar)
     else:
-        query = """
-            SELECT cursos.*, categorias.nombre AS categoria
-            FROM cursos
-            LEFT JOIN categorias ON cursos.id_categoria = categorias.id_categoria
-        """
-        cursor.execute(query)
-
-    cursos = cursor.fetchall()
-    cursor.close()
-    conn.close()
+        cursos = catalogo.indice.todos()
 
     return render_template('consultar_cursos.html', cursos=cursos)
 
@@ -331,62 +768,205 @@ def inscribir():
     Inscribir a un participante en un curso. Evita inscripciones duplicadas.
     """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, preparada=True)
 
     if request.method == 'POST':
         id_participante = request.form['id_participante']
         id_curso = request.form['id_curso']
         fecha_inscripcion = date.today()
 
-        # Verificar si ya está inscrito
-        cursor.execute("""
-            SELECT * FROM inscripciones 
-            WHERE id_participante = %s AND id_curso = %s
-        """, (id_participante, id_curso))
-        ya_inscrito = cursor.fetchone()
+        if not id_participante or not id_curso:
+            flash('Selecciona un participante y un curso de la lista.', 'warning')
+            cursor.close()
+            return redirect(url_for('inscribir'))
 
-        if ya_inscrito:
-            flash('El participante ya está inscrito en este curso.', 'warning')
-        else:
+        # El índice único (id_participante, id_curso) decide si ya está inscrito;
+        # así dos envíos simultáneos (doble clic) no terminan en un error 500
+        try:
             cursor.execute("""
                 INSERT INTO inscripciones (id_curso, id_participante, fecha)
                 VALUES (%s, %s, %s)
             """, (id_curso, id_participante, fecha_inscripcion))
-            conn.commit()
-            flash('Participante inscrito exitosamente al curso.', 'success')
+        except IntegrityError as error:
+            conn.rollback()
+            if error.errno == errorcode.ER_DUP_ENTRY:
+                flash('El participante ya está inscrito en este curso.', 'warning')
+            else:
+                flash('El participante o el curso seleccionado ya no existe.', 'danger')
+            cursor.close()
+            return redirect(url_for('inscribir'))
+
+        resumenes.ajustar_inscripcion(conn, id_curso, fecha_inscripcion, 1)
+        versiones = marcar_cambio(conn, 'inscripciones')
+        conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
+        flash('Participante inscrito exitosamente al curso.', 'success')
 
         cursor.close()
-        conn.close()
         return redirect(url_for('inscribir'))
 
-    # Si GET, mostrar lista de participantes y cursos
-    cursor.execute("SELECT * FROM participantes")
-    participantes = cursor.fetchall()
-    cursor.execute("SELECT * FROM cursos")
-    cursos = cursor.fetchall()
+    # Si GET, mostrar el formulario; participantes y cursos se buscan mientras se escribe
+    cursor.close()
+    return render_template('inscribir.html')
 
+def inscribir_en_bloque(conn, ids_participantes, ids_cursos, fecha):
+    """
+    Inscribe a todos los participantes en todos los cursos indicados con un
+    INSERT ... SELECT por curso, que omite los pares ya inscritos y los ids
+    que no existen. No hace commit. Devuelve (inscripciones nuevas, versiones
+    de marcar_cambio() o {} si no hubo ninguna).
+    """
+    marcadores = ', '.join(['%s'] * len(ids_participantes))
+    cursor = conn.cursor()
+    insertadas = 0
+    for id_curso in ids_cursos:
+        cursor.execute(f"""
+            INSERT INTO inscripciones (id_curso, id_participante, fecha)
+            SELECT c.id_curso, p.id_participante, %s
+            FROM participantes p
+            JOIN cursos c ON c.id_curso = %s
+            WHERE p.id_participante IN ({marcadores})
+              AND NOT EXISTS (
+                  SELECT 1 FROM inscripciones i
+                  WHERE i.id_participante = p.id_participante AND i.id_curso = c.id_curso
+              )
+        """, [fecha, id_curso, *ids_participantes])
+        if cursor.rowcount > 0:
+            # Se cuenta por curso para mantener al día los resúmenes del dashboard
+            resumenes.ajustar_inscripcion(conn, id_curso, fecha, cursor.rowcount)
+            insertadas += cursor.rowcount
     cursor.close()
-    conn.close()
-    return render_template('inscribir.html', participantes=participantes, cursos=cursos)
+    versiones = marcar_cambio(conn, 'inscripciones') if insertadas else {}
+    return insertadas, versiones
+
+@app.route('/inscribir_masivo', methods=['GET', 'POST'])
+@presupuesto_consultas(None)   # las consultas crecen con el archivo o la selección
+def inscribir_masivo():
+    """
+    Inscribir a varios participantes en uno o más cursos a la vez. Los ids de
+    participante se escriben en el formulario o se suben en un archivo CSV/TXT.
+    Todo se guarda con un solo commit.
+    """
+    if 'usuario' not in session:
+        return redirect(url_for('login'))
+
+    conn = get_db_connection()
+
+    if request.method == 'POST':
+        ids_cursos = sorted({int(i) for i in request.form.getlist('id_curso') if i.isdigit()})
+        ids_participantes = [int(i) for i in re.findall(r'\d+', request.form.get('ids_participantes', ''))]
+        invalidos = 0
+
+        archivo = request.files.get('archivo')
+        if archivo and archivo.filename:
+            try:
+                ids_archivo, invalidos = importaciones.leer_ids_participantes(archivo.stream)
+            except importaciones.ArchivoInvalido as error:
+                flash(str(error), 'danger')
+                return redirect(url_for('inscribir_masivo'))
+            ids_participantes.extend(ids_archivo)
+
+        ids_participantes = sorted(set(ids_participantes))
+        if not ids_cursos or not ids_participantes:
+            flash('Selecciona al menos un curso y un participante.', 'warning')
+            return redirect(url_for('inscribir_masivo'))
+
+        try:
+            insertadas, versiones = inscribir_en_bloque(conn, ids_participantes, ids_cursos, date.today())
+            conn.commit()
+        except IntegrityError:
+            # Otra petición inscribió alguno de los mismos pares al mismo tiempo
+            conn.rollback()
+            flash('Algunas inscripciones se registraron al mismo tiempo desde otra sesión. '
+                  'Intenta de nuevo.', 'warning')
+            return redirect(url_for('inscribir_masivo'))
+        cache_paginas.cache.registrar_cambio(versiones)
+
+        omitidas = len(ids_participantes) * len(ids_cursos) - insertadas
+        mensaje = f'{insertadas} inscripciones nuevas, {omitidas} omitidas (ya inscritos o ids inexistentes).'
+        if invalidos:
+            mensaje += f' {invalidos} valores del archivo no eran ids válidos.'
+        flash(mensaje, 'success' if insertadas else 'info')
+        return redirect(url_for('inscribir_masivo'))
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT id_curso, nombre FROM cursos ORDER BY nombre ASC")
+    cursos = cursor.fetchall()
+    cursor.close()
+    return render_template('inscribir_masivo.html', cursos=cursos)
 
 @app.route('/consultar_inscripciones')
+@solo_lectura
 def consultar_inscripciones():
     """
-    Mostrar todas las inscripciones realizadas con información de participantes y cursos.
+    Mostrar las inscripciones realizadas con información de participantes y cursos.
+    Por defecto las más recientes primero; los resultados se paginan por cursor.
     """
+    orden = request.args.get('orden', 'fecha_desc')
+    if orden not in ('fecha_desc', 'fecha_asc'):
+        orden = 'fecha_desc'
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
+    inscripciones, pagina = paginar_keyset(cursor, """
         SELECT i.id_inscripcion, p.nombre AS participante, c.nombre AS curso, i.fecha
         FROM inscripciones i
         JOIN participantes p ON i.id_participante = p.id_participante
         JOIN cursos c ON i.id_curso = c.id_curso
-        ORDER BY i.fecha DESC
-    """)
-    inscripciones = cursor.fetchall()
+    """, [], [], [("i.fecha", "fecha"), ("i.id_inscripcion", "id_inscripcion")],
+        descendente=(orden == 'fecha_desc'), admite_nulos=('fecha',))
+    cursor.close()
+    return render_template('consultar_inscripciones.html', inscripciones=inscripciones,
+                           pagina=pagina, orden=orden)
+
+# ----------------- Búsqueda para los selectores (typeahead) ------------------
+
+def escapar_like(texto):
+    """
+    Escapa los comodines de LIKE para buscar el texto literal.
+    """
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+@app.route('/api/buscar/participantes')
+@solo_lectura
+def buscar_participantes_api():
+    """
+    Participantes cuyo nombre empieza con ?q=, en orden alfabético.
+    Usa el índice de participantes.nombre y pagina por cursor (?despues=).
+    """
+    prefijo = request.args.get('q', '').strip()
+    cursor = get_db_connection().cursor(dictionary=True)
+    resultados, pagina = paginar_keyset(
+        cursor, "SELECT id_participante AS id, nombre FROM participantes",
+        ["nombre LIKE %s"], [escapar_like(prefijo) + '%'],
+        [("nombre", "nombre"), ("id_participante", "id")],
+        tamano_defecto=config.TYPEAHEAD_LIMIT)
     cursor.close()
-    conn.close()
-    return render_template('consultar_inscripciones.html', inscripciones=inscripciones)
+    return jsonify(resultados=resultados, siguiente=pagina['siguiente'])
+
+@app.route('/api/buscar/cursos')
+@solo_lectura
+def buscar_cursos_api():
+    """
+    Cursos cuyo nombre, descripción o categoría contienen ?q=, desde el
+    índice del catálogo en memoria. Pagina por id con ?despues=.
+    """
+    texto = request.args.get('q', '').strip()
+    tamano = obtener_tamano_pagina(config.TYPEAHEAD_LIMIT)
+    despues = decodificar_cursor(request.args.get('despues')) or [0]
+
+    catalogo.indice.asegurar_vigente(get_db_connection)
+    cursos = catalogo.indice.buscar(texto) if texto else catalogo.indice.todos()
+    cursos = [c for c in cursos if c['id_curso'] > despues[0]][:tamano + 1]
+
+    siguiente = None
+    if len(cursos) > tamano:
+        cursos = cursos[:tamano]
+        args = request.args.to_dict()
+        args['despues'] = codificar_cursor([cursos[-1]['id_curso']])
+        siguiente = url_for('buscar_cursos_api', **args)
+    return jsonify(resultados=[{'id': c['id_curso'], 'nombre': c['nombre']} for c in cursos],
+                   siguiente=siguiente)
 
 # ----------------- Funciones auxiliares para cursos y categorías ------------------
 
@@ -395,11 +975,11 @@ def obtener_curso_por_id(id):
     Retorna un curso dado su id.
     """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM cursos WHERE id_curso = %s", (id,))
+    cursor = conn.cursor(dictionary=True, preparada=True)
+    cursor.execute("SELECT id_curso, nombre, descripcion, duracion, id_categoria FROM cursos WHERE id_curso = %s",
+                   (id,))
     curso = cursor.fetchone()
     cursor.close()
-    conn.close()
     return curso
 
 def obtener_todas_las_categorias():
@@ -408,10 +988,9 @@ def obtener_todas_las_categorias():
     """
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM categorias")
+    cursor.execute("SELECT id_categoria, nombre FROM categorias")
     categorias = cursor.fetchall()
     cursor.close()
-    conn.close()
     return categorias
 
 
@@ -441,15 +1020,33 @@ def actualizar_curso(id):
     id_categoria = int(request.form['categoria'])
 
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE cursos 
-        SET nombre = %s, descripcion = %s, duracion = %s, id_categoria = %s
-        WHERE id_curso = %s
-    """, (nombre, descripcion, duracion, id_categoria, id))
+    cursor = conn.cursor(dictionary=True)
+    resumenes.cambiar_categoria_de_curso(conn, id, id_categoria)
+    # El índice único uq_cursos_nombre detecta el nombre repetido
+    try:
+        cursor.execute("""
+            UPDATE cursos 
+            SET nombre = %s, descripcion = %s, duracion = %s, id_categoria = %s
+            WHERE id_curso = %s
+        """, (nombre, descripcion, duracion, id_categoria, id))
+    except (IntegrityError, DataError) as error:
+        conn.rollback()
+        cursor.close()
+        if isinstance(error, DataError):
+            mensaje = "El nombre del curso no puede tener más de 100 caracteres."
+        elif error.errno == errorcode.ER_DUP_ENTRY:
+            mensaje = "Ya existe un curso con ese nombre."
+        else:
+            mensaje = "La categoría seleccionada no es válida."
+        curso = {'id_curso': id, 'nombre': nombre, 'descripcion': descripcion,
+                 'duracion': duracion, 'id_categoria': id_categoria}
+        return render_template('editar_curso.html', curso=curso, categorias=obtener_todas_las_categorias(),
+                               error=mensaje), 400
+    versiones = marcar_cambio(conn, 'cursos')
     conn.commit()
+    catalogo.indice.recargar_cursos(cursor, versiones, id_curso=id)
+    cache_paginas.cache.registrar_cambio(versiones)
     cursor.close()
-    conn.close()
 
     flash('Curso actualizado exitosamente')
     return redirect(url_for('consultar_cursos'))
@@ -464,13 +1061,17 @@ def eliminar_curso(id):
 
     try:
         cursor.execute("DELETE FROM cursos WHERE id_curso = %s", (id,))
+        if cursor.rowcount:
+            resumenes.quitar_curso(conn, id)
+        versiones = marcar_cambio(conn, 'cursos')
         conn.commit()
+        catalogo.indice.quitar_curso(id, versiones)
+        cache_paginas.cache.registrar_cambio(versiones)
         flash('Curso eliminado exitosamente.', 'success')
     except IntegrityError:
         flash('No se puede eliminar el curso porque tiene participantes inscritos o dependencias asociadas.', 'warning')
     finally:
         cursor.close()
-        conn.close()
 
     return redirect(url_for('consultar_cursos'))
 
@@ -482,22 +1083,35 @@ def editar_categoria(id):
     Editar categoría. GET muestra el formulario, POST actualiza.
     """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, preparada=True)
     
     if request.method == 'POST':
         nuevo_nombre = request.form['nombre']
         nueva_descripcion = request.form['descripcion']
-        cursor.execute("UPDATE categorias SET nombre=%s, descripcion=%s WHERE id_categoria=%s",
-                       (nuevo_nombre, nueva_descripcion, id))
+        # El índice único uq_categorias_nombre detecta el nombre repetido
+        try:
+            cursor.execute("UPDATE categorias SET nombre=%s, descripcion=%s WHERE id_categoria=%s",
+                           (nuevo_nombre, nueva_descripcion, id))
+        except (IntegrityError, DataError) as error:
+            conn.rollback()
+            cursor.close()
+            categoria = {'id_categoria': id, 'nombre': nuevo_nombre, 'descripcion': nueva_descripcion}
+            if isinstance(error, DataError):
+                mensaje = "El nombre de la categoría no puede tener más de 50 caracteres."
+            else:
+                mensaje = "El nombre de la categoría ya está registrado."
+            return render_template('editar_categoria.html', categoria=categoria, error=mensaje), 400
+        versiones = marcar_cambio(conn, 'categorias')
         conn.commit()
+        # El nombre de la categoría se muestra y se busca junto a cada curso
+        catalogo.indice.recargar_cursos(cursor, versiones, id_categoria=id)
+        cache_paginas.cache.registrar_cambio(versiones)
         cursor.close()
-        conn.close()
         return redirect(url_for('consultar_categorias'))
     else:
-        cursor.execute("SELECT * FROM categorias WHERE id_categoria = %s", (id,))
+        cursor.execute("SELECT id_categoria, nombre, descripcion FROM categorias WHERE id_categoria = %s", (id,))
         categoria = cursor.fetchone()
         cursor.close()
-        conn.close()
         return render_template('editar_categoria.html', categoria=categoria)
 
 @app.route('/eliminar_categoria/<int:id>')
@@ -511,13 +1125,15 @@ def eliminar_categoria(id):
 
     try:
         cursor.execute("DELETE FROM categorias WHERE id_categoria = %s", (id,))
+        versiones = marcar_cambio(conn, 'categorias')
         conn.commit()
+        catalogo.indice.registrar_cambio(versiones)
+        cache_paginas.cache.registrar_cambio(versiones)
         flash('Categoría eliminada correctamente.', 'success')
     except IntegrityError:
         flash('No se puede eliminar la categoría porque tiene cursos asociados.', 'warning')
     finally:
         cursor.close()
-        conn.close()
 
     return redirect(url_for('consultar_categorias'))
 
@@ -530,7 +1146,7 @@ def editar_participante(id):
     Editar participante. GET muestra formulario, POST actualiza con validaciones.
     """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, preparada=True)
 
     if request.method == 'POST':
         nombre = request.form['nombre'].strip()
@@ -546,68 +1162,59 @@ def editar_participante(id):
         # Validación básica.
         if not nombre or not correo or not telefono:
             cursor.close()
-            conn.close()
             return "El nombre, correo electrónico y teléfono son obligatorios.", 400
 
-        # Verificar si el nombre de usuario realmente cambió
-        cursor.execute("SELECT usuario FROM participantes WHERE id_participante = %s", (id,))
-        usuario_actual = str(cursor.fetchone()['usuario'] or "")
-
-        # Validar que el nuevo nombre de usuario no esté en uso si fue cambiado
-        if usuario and usuario != usuario_actual:
-            cursor.execute("""
-                SELECT id_participante FROM participantes 
-                WHERE usuario = %s AND id_participante != %s
-            """, (usuario, id))
-            resultado = cursor.fetchone()
-            print("Resultado de verificación duplicado:", resultado)
-
-            if resultado:
-                cursor.close()
-                conn.close()
-                return "Ese nombre de usuario ya está en uso.", 400
-
-        # Si se proporcionó nueva contraseña, actualizarla
-        if nueva_password:
-            hashed_password = generate_password_hash(nueva_password)
-            cursor.execute("""
-                UPDATE participantes SET
-                    nombre = %s,
-                    correo = %s,
-                    telefono = %s,
-                    direccion = %s,
-                    edad = %s,
-                    genero = %s,
-                    ocupacion = %s,
-                    usuario = %s,
-                    password = %s
-                WHERE id_participante = %s
-            """, (nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario, hashed_password, id))
-        else:
-            # Sin cambio de contraseña
-            cursor.execute("""
-                UPDATE participantes SET
-                    nombre = %s,
-                    correo = %s,
-                    telefono = %s,
-                    direccion = %s,
-                    edad = %s,
-                    genero = %s,
-                    ocupacion = %s,
-                    usuario = %s
-                WHERE id_participante = %s
-            """, (nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario, id))
+        # Los índices únicos detectan nombre, correo, teléfono o usuario repetidos
+        try:
+            # Si se proporcionó nueva contraseña, actualizarla
+            if nueva_password:
+                hashed_password = contrasenas.generar(nueva_password)
+                cursor.execute("""
+                    UPDATE participantes SET
+                        nombre = %s,
+                        correo = %s,
+                        telefono = %s,
+                        direccion = %s,
+                        edad = %s,
+                        genero = %s,
+                        ocupacion = %s,
+                        usuario = %s,
+                        password = %s
+                    WHERE id_participante = %s
+                """, (nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario or None, hashed_password, id))
+            else:
+                # Sin cambio de contraseña
+                cursor.execute("""
+                    UPDATE participantes SET
+                        nombre = %s,
+                        correo = %s,
+                        telefono = %s,
+                        direccion = %s,
+                        edad = %s,
+                        genero = %s,
+                        ocupacion = %s,
+                        usuario = %s
+                    WHERE id_participante = %s
+                """, (nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario or None, id))
+        except IntegrityError as error:
+            conn.rollback()
+            errores = errores_duplicado_participante(cursor, error, nombre, correo, telefono, usuario, excluir_id=id)
+            cursor.close()
+            return ' '.join(errores), 400
 
+        versiones = marcar_cambio(conn, 'participantes')
         conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
         cursor.close()
-        conn.close()
         return redirect('/consultar_participantes')
 
     # GET: Mostrar el formulario con datos actuales
-    cursor.execute("SELECT * FROM participantes WHERE id_participante = %s", (id,))
+    cursor.execute("""
+        SELECT id_participante, nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario
+        FROM participantes WHERE id_participante = %s
+    """, (id,))
     participante = cursor.fetchone()
     cursor.close()
-    conn.close()
     return render_template('editar_participante.html', participante=participante)
 
 @app.route('/eliminar_participante/<int:id>')
@@ -621,22 +1228,35 @@ def eliminar_participante(id):
 
     try:
         cursor.execute("DELETE FROM participantes WHERE id_participante = %s", (id,))
+        versiones = {}
+        if cursor.rowcount:
+            resumenes.ajustar_total(conn, 'participantes', -1)
+            versiones = marcar_cambio(conn, 'participantes')
         conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
         flash('Participante eliminado correctamente.', 'success')
     except IntegrityError:
         flash('No se puede eliminar el participante porque tiene inscripciones asociadas.', 'warning')
     finally:
         cursor.close()
-        conn.close()
 
     return redirect(url_for('consultar_participantes'))
 
 # ----------------- Editar y eliminar inscripciones ------------------
 
+def fecha_o_nada(texto):
+    """
+    La fecha AAAA-MM-DD de un formulario como date, o None si no es válida.
+    """
+    try:
+        return date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        return None
+
 @app.route('/editar_inscripcion/<int:id>', methods=['GET', 'POST'])
 def editar_inscripcion(id):
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor(dictionary=True, preparada=True)
 
     if request.method == 'POST':
         # Obtener datos del formulario
@@ -644,51 +1264,76 @@ def editar_inscripcion(id):
         id_curso = request.form['id_curso']
         fecha = request.form['fecha']  # formato 'YYYY-MM-DD'
 
-        # Actualizar registro en la base de datos
-        cursor.execute("""
-            UPDATE inscripciones 
-            SET id_participante = %s, id_curso = %s, fecha = %s
-            WHERE id_inscripcion = %s
-        """, (id_participante, id_curso, fecha, id))
+        # Datos anteriores, para mover la inscripción en los resúmenes del dashboard
+        cursor.execute("SELECT id_curso, fecha FROM inscripciones WHERE id_inscripcion = %s FOR UPDATE", (id,))
+        anterior = cursor.fetchone()
+
+        # Actualizar registro en la base de datos; el índice único
+        # uq_inscripciones_participante_curso detecta la inscripción repetida
+        try:
+            cursor.execute("""
+                UPDATE inscripciones 
+                SET id_participante = %s, id_curso = %s, fecha = %s
+                WHERE id_inscripcion = %s
+            """, (id_participante, id_curso, fecha, id))
+        except IntegrityError as error:
+            conn.rollback()
+            if error.errno == errorcode.ER_DUP_ENTRY:
+                mensaje = 'El participante ya está inscrito en ese curso.'
+            else:
+                mensaje = 'El participante o el curso seleccionado ya no existe.'
+            # Nombres para los selectores
+            cursor.execute("""
+                SELECT (SELECT nombre FROM participantes WHERE id_participante = %s) AS participante,
+                       (SELECT nombre FROM cursos WHERE id_curso = %s) AS curso
+            """, (id_participante, id_curso))
+            inscripcion = dict(cursor.fetchone(), id_inscripcion=id, id_participante=id_participante,
+                               id_curso=id_curso, fecha=fecha_o_nada(fecha))
+            cursor.close()
+            return render_template('editar_inscripcion.html', inscripcion=inscripcion, error=mensaje), 400
+        if anterior:
+            resumenes.ajustar_inscripcion(conn, anterior['id_curso'], anterior['fecha'], -1)
+            resumenes.ajustar_inscripcion(conn, id_curso, fecha, 1)
+        versiones = marcar_cambio(conn, 'inscripciones')
         conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
         cursor.close()
-        conn.close()
 
         flash('Inscripción actualizada correctamente.', 'success')
         return redirect(url_for('consultar_inscripciones'))
 
-    # Si es GET, mostrar formulario con datos actuales
+    # Si es GET, mostrar formulario con datos actuales (con los nombres para los selectores)
     cursor.execute("""
-        SELECT * FROM inscripciones WHERE id_inscripcion = %s
+        SELECT i.id_inscripcion, i.id_participante, i.id_curso, i.fecha,
+               p.nombre AS participante, c.nombre AS curso
+        FROM inscripciones i
+        LEFT JOIN participantes p ON i.id_participante = p.id_participante
+        LEFT JOIN cursos c ON i.id_curso = c.id_curso
+        WHERE i.id_inscripcion = %s
     """, (id,))
     inscripcion = cursor.fetchone()
-
-    # También obtenemos todos los participantes y cursos para los select
-    cursor.execute("SELECT id_participante, nombre FROM participantes")
-    participantes = cursor.fetchall()
-    cursor.execute("SELECT id_curso, nombre FROM cursos")
-    cursos = cursor.fetchall()
-
     cursor.close()
-    conn.close()
 
     if inscripcion is None:
         flash('Inscripción no encontrada.', 'danger')
         return redirect(url_for('consultar_inscripciones'))
 
-    return render_template('editar_inscripcion.html',
-                           inscripcion=inscripcion,
-                           participantes=participantes,
-                           cursos=cursos)
+    return render_template('editar_inscripcion.html', inscripcion=inscripcion)
 
 @app.route('/eliminar_inscripcion/<int:id>')
 def eliminar_inscripcion(id):
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute("SELECT id_curso, fecha FROM inscripciones WHERE id_inscripcion = %s FOR UPDATE", (id,))
+    anterior = cursor.fetchone()
     cursor.execute("DELETE FROM inscripciones WHERE id_inscripcion = %s", (id,))
+    versiones = {}
+    if anterior:
+        resumenes.ajustar_inscripcion(conn, anterior[0], anterior[1], -1)
+        versiones = marcar_cambio(conn, 'inscripciones')
     conn.commit()
+    cache_paginas.cache.registrar_cambio(versiones)
     cursor.close()
-    conn.close()
     flash('Inscripción eliminada correctamente.', 'success')
     return redirect(url_for('consultar_inscripciones'))
 
@@ -696,56 +1341,163 @@ def eliminar_inscripcion(id):
 
 @app.route('/dashboard')
 def dashboard():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    """
+    Dashboard con totales y gráficas. Solo devuelve la página base: cada
+    widget se pide por separado a /api/dashboard/<widget> en paralelo desde
+    el navegador, así la página tarda lo que el widget más lento y no la
+    suma de todos. Cada widget se guarda en el caché de páginas con las
+    versiones de sus propias tablas.
+    """
+    return render_template('dashboard.html')
 
-    # Total de cursos
-    cursor.execute("SELECT COUNT(*) AS total_cursos FROM cursos")
-    total_cursos = cursor.fetchone()['total_cursos']
+# Los widgets leen las tablas de resumen que mantienen las rutas de escritura
+# (ver resumenes.py) en lugar de agregar las tablas completas.
 
-    # Total de participantes
-    cursor.execute("SELECT COUNT(*) AS total_participantes FROM participantes")
-    total_participantes = cursor.fetchone()['total_participantes']
+def widget_del_dashboard(consulta):
+    """
+    Ejecuta la consulta de un widget y devuelve sus filas como JSON.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True, preparada=True)
+    cursor.execute(consulta)
+    filas = cursor.fetchall()
+    cursor.close()
+    return jsonify(filas)
 
-    # Cursos con más inscripciones
-    cursor.execute("""
-        SELECT c.nombre, COUNT(i.id_participante) AS total_inscritos
-        FROM inscripciones i
-        JOIN cursos c ON i.id_curso = c.id_curso
-        GROUP BY i.id_curso
-        ORDER BY total_inscritos DESC
+@app.route('/api/dashboard/totales')
+@solo_lectura
+@cache_de_pagina('cursos', 'participantes')
+def dashboard_totales():
+    """
+    Totales de cursos y participantes: {"cursos": n, "participantes": n}.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(preparada=True)
+    cursor.execute("SELECT entidad, total FROM resumen_totales")
+    totales = dict(cursor.fetchall())
+    cursor.close()
+    return jsonify(cursos=totales.get('cursos', 0), participantes=totales.get('participantes', 0))
+
+@app.route('/api/dashboard/cursos_populares')
+@solo_lectura
+@cache_de_pagina('inscripciones', 'cursos')
+def dashboard_cursos_populares():
+    """
+    Los cinco cursos con más inscripciones: [{"nombre", "total_inscritos"}].
+    """
+    return widget_del_dashboard("""
+        SELECT c.nombre, r.inscritos AS total_inscritos
+        FROM resumen_cursos r
+        JOIN cursos c ON r.id_curso = c.id_curso
+        WHERE r.inscritos > 0
+        ORDER BY r.inscritos DESC
         LIMIT 5
     """)
-    cursos_populares = cursor.fetchall()
 
-    # Distribución de participantes por categoría
-    cursor.execute("""
-        SELECT cat.nombre AS categoria, COUNT(ins.id_participante) AS inscritos
-        FROM inscripciones ins
-        JOIN cursos c ON ins.id_curso = c.id_curso
-        JOIN categorias cat ON c.id_categoria = cat.id_categoria
-        GROUP BY cat.id_categoria
+@app.route('/api/dashboard/categorias')
+@solo_lectura
+@cache_de_pagina('inscripciones', 'cursos', 'categorias')
+def dashboard_categorias():
+    """
+    Distribución de participantes por categoría: [{"categoria", "inscritos"}].
+    """
+    return widget_del_dashboard("""
+        SELECT cat.nombre AS categoria, r.inscritos
+        FROM resumen_categorias r
+        JOIN categorias cat ON r.id_categoria = cat.id_categoria
+        WHERE r.inscritos > 0
     """)
-    distribucion_categorias = cursor.fetchall()
 
-    # Inscripciones mensuales
-    cursor.execute("""
-        SELECT DATE_FORMAT(fecha, '%Y-%m') AS mes, COUNT(*) AS total
-        FROM inscripciones
-        GROUP BY mes
-        ORDER BY mes
-    """)
-    inscripciones_mensuales = cursor.fetchall()
+@app.route('/api/dashboard/mensual')
+@solo_lectura
+@cache_de_pagina('inscripciones')
+def dashboard_mensual():
+    """
+    Inscripciones por mes: [{"mes": "AAAA-MM", "total"}].
+    """
+    return widget_del_dashboard("SELECT mes, total FROM resumen_mensual WHERE total > 0 ORDER BY mes")
 
-    cursor.close()
-    conn.close()
+@app.cli.command('reconstruir-resumenes')
+def reconstruir_resumenes():
+    """
+    Recalcula las tablas de resumen del dashboard desde cero.
+    Uso: flask --app app reconstruir-resumenes
+    """
+    resumenes.reconstruir(get_db_connection())
+    print("Resúmenes del dashboard reconstruidos.")
+
+@app.cli.command('sembrar')
+@click.option('--escala', type=float, default=1.0, show_default=True,
+              help='1 = 100 mil participantes y 500 mil inscripciones (ver semillas.POR_ESCALA).')
+@click.option('--semilla', type=int, default=42, show_default=True, help='Semilla del generador al azar.')
+@click.option('--categorias', type=int, default=None, help='Reemplaza la cantidad calculada por la escala.')
+@click.option('--cursos', type=int, default=None, help='Reemplaza la cantidad calculada por la escala.')
+@click.option('--participantes', type=int, default=None, help='Reemplaza la cantidad calculada por la escala.')
+@click.option('--inscripciones', type=int, default=None, help='Reemplaza la cantidad calculada por la escala.')
+@click.option('--lote', type=int, default=5000, show_default=True, help='Filas por INSERT.')
+def sembrar(escala, semilla, categorias, cursos, participantes, inscripciones, lote):
+    """
+    Llena la base de datos con datos sintéticos reproducibles (ver semillas.py).
+    Uso: flask --app app sembrar --escala 10 --semilla 42
+    """
+    cantidades = semillas.escalar(escala, categorias=categorias, cursos=cursos,
+                                  participantes=participantes, inscripciones=inscripciones)
+    # Conexión fuera del pool y sin medir: la carga puede durar varios minutos
+    conn = db.conectar()
+    inicio = time.monotonic()
+    try:
+        semillas.sembrar(conn, semilla=semilla, tamano_lote=lote,
+                         avance=lambda m: print(f"[{time.monotonic() - inicio:7.1f} s] {m}", flush=True),
+                         **cantidades)
+    finally:
+        conn.close()
+    total = sum(cantidades.values())
+    print(f"{total} registros en {time.monotonic() - inicio:.1f} s.")
+
+# ----------------- Migraciones ------------------
 
-    return render_template('dashboard.html',
-                           total_cursos=total_cursos,
-                           total_participantes=total_participantes,
-                           cursos_populares=cursos_populares,
-                           distribucion_categorias=distribucion_categorias,
-                           inscripciones_mensuales=inscripciones_mensuales)
+@app.cli.command('migrar')
+@click.option('--explicar', is_flag=True, help='Mostrar el EXPLAIN de las consultas frecuentes antes y después.')
+@click.option('--marcar-hasta', type=int, default=None,
+              help='Registrar como aplicadas, sin ejecutarlas, las migraciones hasta esta versión.')
+def migrar(explicar, marcar_hasta):
+    """
+    Aplica en orden las migraciones pendientes de database/migraciones.
+    Uso: flask --app app migrar [--explicar] [--marcar-hasta N]
+    """
+    conn = get_db_connection()
+
+    if marcar_hasta is not None:
+        for migracion in migraciones.marcar_hasta(conn, marcar_hasta):
+            print(f"Marcada como aplicada: {migracion.version:04d}_{migracion.nombre}")
+
+    faltan, modificadas = migraciones.pendientes(conn)
+    for migracion in modificadas:
+        print(f"Aviso: {migracion.version:04d}_{migracion.nombre} cambió después de aplicarse.")
+    if not faltan:
+        print("No hay migraciones pendientes.")
+        return
+
+    antes = migraciones.explicar(conn) if explicar else None
+    for migracion in faltan:
+        print(f"Aplicando {migracion.version:04d}_{migracion.nombre}...")
+        try:
+            migraciones.aplicar(conn, migracion)
+        except migraciones.DuplicadosExistentes as error:
+            raise click.ClickException(str(error))
+    print(f"{len(faltan)} migración(es) aplicada(s).")
+
+    if explicar:
+        print()
+        print(migraciones.formatear_reporte(antes, migraciones.explicar(conn)))
+
+@app.cli.command('explicar-consultas')
+def explicar_consultas():
+    """
+    Muestra el plan de ejecución (tipo de acceso, índice y filas) de las consultas frecuentes.
+    Uso: flask --app app explicar-consultas
+    """
+    print(migraciones.formatear_reporte(migraciones.explicar(get_db_connection())))
 
 # ----------------- Login ------------------
 
@@ -756,18 +1508,28 @@ def login():
         password = request.form['password'].strip()
 
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor(dictionary=True, preparada=True)
 
         # Buscar usuario en la tabla participantes
-        cursor.execute("SELECT * FROM participantes WHERE usuario = %s", (usuario,))
+        cursor.execute("SELECT id_participante, nombre, usuario, password FROM participantes WHERE usuario = %s",
+                       (usuario,))
         participante = cursor.fetchone()
 
         cursor.close()
-        conn.close()
 
         if participante:
             # Verificar la contraseña
-            if check_password_hash(participante['password'], password):
+            if contrasenas.verificar(participante['password'], password):
+                # Hash creado con un método o costo anterior: guardarlo con el actual.
+                # Solo se reemplaza si nadie cambió la contraseña mientras tanto.
+                if contrasenas.necesita_rehash(participante['password']):
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        UPDATE participantes SET password = %s
+                        WHERE id_participante = %s AND password = %s
+                    """, (contrasenas.generar(password), participante['id_participante'], participante['password']))
+                    conn.commit()
+                    cursor.close()
                 session['usuario'] = participante['usuario']
                 session['nombre'] = participante['nombre']
                 session['id_participante'] = participante['id_participante']
@@ -786,221 +1548,201 @@ def logout():
     session.pop('usuario', None)  # Elimina al usuario de la sesión
     return redirect('/')
 
-# ----------------- Exportaciones ------------------
-
-@app.route('/exportar_participantes_excel')
-def exportar_participantes_excel():
-    if 'usuario' not in session:
-        return redirect(url_for('login'))
-
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_participante, nombre, correo, telefono, direccion, edad, genero, ocupacion, fecha_registro, usuario, password FROM participantes')
-    datos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    columnas = ['ID', 'Nombre', 'Correo', 'Teléfono', 'Dirección', 'Edad', 'Género', 'Ocupación', 'Fecha Registro', 'Usuario', 'Contraseña']
-    df = pd.DataFrame(datos, columns=columnas)
+# ----------------- Exportaciones en segundo plano ------------------
 
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Participantes')
-    output.seek(0)
+@app.before_request
+def iniciar_limpieza_exportaciones():
+    # Un hilo por proceso borra los trabajos expirados (ver trabajos.py)
+    trabajos.iniciar_limpieza()
 
-    return send_file(output, download_name='participantes.xlsx', as_attachment=True)
-
-@app.route('/exportar_participantes_pdf')
-def exportar_participantes_pdf():
-    if 'usuario' not in session:
-        return redirect(url_for('login'))
-
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_participante, nombre, correo, telefono, direccion, edad, genero, ocupacion, fecha_registro, usuario, password FROM participantes')
-    datos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    columnas = ['ID', 'Nombre', 'Correo', 'Teléfono', 'Dirección', 'Edad', 'Género', 'Ocupación', 'Fecha Registro', 'Usuario', 'Contraseña']
-
-    estilos = getSampleStyleSheet()
-    estilo_celda = estilos["Normal"]
-    estilo_celda.fontSize = 6
-    estilo_celda.leading = 7
-
-    tabla_datos = [columnas]  # encabezado sin Paragraph
-
-    for fila in datos:
-        fila_parrafos = [Paragraph(str(campo), estilo_celda) for campo in fila]
-        tabla_datos.append(fila_parrafos)
-
-    col_widths = [
-        0.8*cm,   # ID
-        3.2*cm,   # Nombre
-        3.5*cm,   # Correo
-        1.7*cm,   # Teléfono
-        5*cm,     # Dirección
-        0.9*cm,   # Edad
-        1.5*cm,   # Género
-        1.8*cm,   # Ocupación
-        1.9*cm,   # Fecha registro
-        2*cm,     # Usuario
-        5*cm      # Contraseña
-    ]
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-
-    t = Table(tabla_datos, colWidths=col_widths)
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 6),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-    ]))
-
-    doc.build([t])
-    buffer.seek(0)
-    return send_file(buffer, download_name='participantes.pdf', as_attachment=True)
-
-@app.route('/exportar_inscripciones_excel')
-def exportar_inscripciones_excel():
-    if 'usuario' not in session:
-        return redirect(url_for('login'))
-
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_inscripcion, id_curso, id_participante, fecha FROM inscripciones')
-    datos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    columnas = ['ID Inscripción', 'ID Curso', 'ID Participante', 'Fecha']
-    df = pd.DataFrame(datos, columns=columnas)
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Inscripciones')
-    output.seek(0)
-
-    return send_file(output, download_name='inscripciones.xlsx', as_attachment=True)
-
-@app.route('/exportar_inscripciones_pdf')
-def exportar_inscripciones_pdf():
-    if 'usuario' not in session:
-        return redirect(url_for('login'))
+@app.route('/exportar_<tipo>')
+def exportar(tipo):
+    """
+    Rutas anteriores (/exportar_participantes_excel, etc.), que generaban el
+    archivo dentro de la petición: llevan a la página del trabajo en segundo plano.
+    """
+    if tipo not in exportaciones.DEFINICIONES:
+        abort(404)
+    return redirect(url_for('exportacion', tipo=tipo), 301)
 
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_inscripcion, id_curso, id_participante, fecha FROM inscripciones')
-    datos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    columnas = ['ID Inscripción', 'ID Curso', 'ID Participante', 'Fecha']
-    tabla = [columnas] + list(datos)
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer)
-    t = Table(tabla)
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-    ]))
-    doc.build([t])
-    buffer.seek(0)
-
-    return send_file(buffer, download_name='inscripciones.pdf', as_attachment=True)
-
-@app.route('/exportar_cursos_excel')
-def exportar_cursos_excel():
+@app.route('/exportaciones/<tipo>', methods=['GET', 'POST'])
+def exportacion(tipo):
+    """
+    GET muestra la página que lanza la exportación y consulta su avance.
+    POST crea el trabajo en el pool de procesos (ver trabajos.py) y responde 202.
+    """
     if 'usuario' not in session:
         return redirect(url_for('login'))
+    if tipo not in exportaciones.DEFINICIONES:
+        abort(404)
 
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_curso, nombre, descripcion, duracion, id_categoria FROM cursos')
-    cursos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Cursos"
+    if request.method == 'GET':
+        return render_template('exportacion.html', tipo=tipo,
+                               archivo=exportaciones.DEFINICIONES[tipo]['archivo'])
 
-    encabezados = ['ID', 'Nombre', 'Descripción', 'Duración', 'ID Categoría']
-    ws.append(encabezados)
-
-    for curso in cursos:
-        ws.append(curso)
+    try:
+        estado = trabajos.iniciar(tipo, session['usuario'])
+    except trabajos.DemasiadosTrabajos as error:
+        return jsonify(error=str(error)), 429
+    return jsonify(id=estado['id'],
+                   estado_url=url_for('estado_exportacion', id_trabajo=estado['id'])), 202
 
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return send_file(output, download_name='cursos.xlsx', as_attachment=True)
+def obtener_trabajo(id_trabajo):
+    """
+    Estado de un trabajo del usuario en sesión; 404 si no existe o es de
+    otro usuario y 410 si ya expiró (config.EXPORT_TTL).
+    """
+    estado = trabajos.leer_estado(id_trabajo, incluir_expirados=True)
+    if estado is None or estado['usuario'] != session.get('usuario'):
+        abort(404)
+    if trabajos.expirado(estado):
+        abort(410)
+    return estado
+
+@app.route('/exportaciones/trabajos/<id_trabajo>')
+def estado_exportacion(id_trabajo):
+    """
+    Avance de un trabajo de exportación en JSON.
+    """
+    estado = obtener_trabajo(id_trabajo)
+    respuesta = {k: estado[k] for k in ('id', 'tipo', 'estado', 'filas', 'total', 'error')}
+    if estado['estado'] == 'terminado':
+        respuesta['descarga_url'] = url_for('descargar_exportacion', id_trabajo=id_trabajo)
+    return jsonify(respuesta)
+
+@app.route('/exportaciones/trabajos/<id_trabajo>/descarga')
+def descargar_exportacion(id_trabajo):
+    """
+    Entrega el archivo generado por un trabajo terminado.
+    """
+    estado = obtener_trabajo(id_trabajo)
+    if estado['estado'] != 'terminado':
+        abort(404)
+    ruta = trabajos.ruta_archivo(estado)
+    if not os.path.exists(ruta):
+        abort(410)      # la limpieza lo borró entre la lectura del estado y ahora
+    definicion = exportaciones.DEFINICIONES[estado['tipo']]
+    return send_file(ruta, download_name=definicion['archivo'],
+                     as_attachment=True, mimetype=exportaciones.MIME[definicion['formato']])
+
+
+# ----------------- API JSON de solo lectura ------------------
+
+# Por recurso: FROM (con sus JOIN), campos públicos {nombre: expresión SQL},
+# llave para paginar y tablas de las que depende (para el ETag). La API no
+# pide sesión, así que solo expone lo que muestran las páginas de consulta
+# (p. ej. de participantes no van la dirección ni el usuario).
+API_RECURSOS = {
+    'categorias': {
+        'desde': "categorias",
+        'campos': {
+            'id_categoria': "id_categoria",
+            'nombre': "nombre",
+            'descripcion': "descripcion",
+        },
+        'llave': ("id_categoria", "id_categoria"),
+        'tablas': ('categorias',),
+    },
+    'cursos': {
+        'desde': "cursos LEFT JOIN categorias ON cursos.id_categoria = categorias.id_categoria",
+        'campos': {
+            'id_curso': "cursos.id_curso",
+            'nombre': "cursos.nombre",
+            'descripcion': "cursos.descripcion",
+            'duracion': "cursos.duracion",
+            'id_categoria': "cursos.id_categoria",
+            'categoria': "categorias.nombre",
+        },
+        'llave': ("cursos.id_curso", "id_curso"),
+        'tablas': ('cursos', 'categorias'),
+    },
+    'participantes': {
+        'desde': "participantes",
+        'campos': {
+            'id_participante': "id_participante",
+            'nombre': "nombre",
+            'correo': "correo",
+            'telefono': "telefono",
+            'edad': "edad",
+            'genero': "genero",
+            'ocupacion': "ocupacion",
+            'fecha_registro': "fecha_registro",
+        },
+        'llave': ("id_participante", "id_participante"),
+        'tablas': ('participantes',),
+    },
+    'inscripciones': {
+        'desde': """inscripciones i
+                    JOIN participantes p ON i.id_participante = p.id_participante
+                    JOIN cursos c ON i.id_curso = c.id_curso""",
+        'campos': {
+            'id_inscripcion': "i.id_inscripcion",
+            'id_participante': "i.id_participante",
+            'participante': "p.nombre",
+            'id_curso': "i.id_curso",
+            'curso': "c.nombre",
+            'fecha': "i.fecha",
+        },
+        'llave': ("i.id_inscripcion", "id_inscripcion"),
+        'tablas': ('inscripciones', 'participantes', 'cursos'),
+    },
+}
+
+@app.route('/api/<recurso>')
+@solo_lectura
+def api_listado(recurso):
+    """
+    Listado JSON de categorías, cursos, participantes o inscripciones.
 
-@app.route('/exportar_cursos_pdf')
-def exportar_cursos_pdf():
-    if 'usuario' not in session:
-        return redirect(url_for('login'))
+    - ?campos=a,b devuelve solo esos campos (la llave siempre se incluye).
+    - ?por_pagina= y ?despues= paginan por cursor en orden de id.
+    - ETag y Last-Modified salen de versiones_tablas: si el cliente ya tiene
+      la versión actual (If-None-Match / If-Modified-Since) se responde
+      304 sin ejecutar la consulta del listado.
+    """
+    definicion = API_RECURSOS.get(recurso)
+    if definicion is None:
+        abort(404)
+
+    expresion_llave, llave = definicion['llave']
+    pedidos = [c.strip() for c in request.args.get('campos', '').split(',') if c.strip()]
+    desconocidos = [c for c in pedidos if c not in definicion['campos']]
+    if desconocidos:
+        return jsonify(error="Campos desconocidos: " + ", ".join(desconocidos),
+                       campos=list(definicion['campos'])), 400
+    campos = [llave] + [c for c in pedidos if c != llave] if pedidos else list(definicion['campos'])
+
+    # El ETag depende de las versiones de las tablas y de la URL pedida (página, campos)
+    conn = get_db_connection()
+    versiones, ultimo_cambio = versiones_tablas.leer(conn, definicion['tablas'])
+    firma = json.dumps([sorted(versiones.items()), request.full_path])
+    etag = hashlib.sha1(firma.encode()).hexdigest()
+    ultima_modificacion = (datetime.fromtimestamp(ultimo_cambio, timezone.utc)
+                           if ultimo_cambio is not None else None)
+
+    if request.if_none_match:
+        sin_cambios = request.if_none_match.contains(etag)
+    else:
+        sin_cambios = (ultima_modificacion is not None and request.if_modified_since is not None
+                       and ultima_modificacion <= request.if_modified_since)
 
-    conexion = get_db_connection()
-    cursor = conexion.cursor()
-    cursor.execute('SELECT id_curso, nombre, descripcion, duracion, id_categoria FROM cursos')
-    cursos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    columnas = ['ID', 'Nombre', 'Descripción', 'Duración', 'ID Categoría']
-
-    estilos = getSampleStyleSheet()
-    estilo_celda = estilos["Normal"]
-    estilo_celda.fontSize = 6
-    estilo_celda.leading = 7
-
-    tabla_datos = [columnas]
-    for curso in cursos:
-        fila_parrafos = [Paragraph(str(c), estilo_celda) for c in curso]
-        tabla_datos.append(fila_parrafos)
-
-    col_widths = [
-        1.2*cm,   # ID
-        3*cm,     # Nombre
-        6*cm,     # Descripción
-        2*cm,     # Duración
-        4*cm,     # Asignatura
-        2.5*cm    # ID Categoría
-    ]
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
-
-    t = Table(tabla_datos, colWidths=col_widths)
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 6),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-    ]))
-
-    doc.build([t])
-    buffer.seek(0)
-    return send_file(buffer, download_name='cursos.pdf', as_attachment=True)
+    if sin_cambios:
+        respuesta = Response(status=304)
+    else:
+        columnas = ", ".join(f"{definicion['campos'][c]} AS {c}" for c in campos)
+        cursor = conn.cursor(dictionary=True)
+        filas, pagina = paginar_keyset(cursor, f"SELECT {columnas} FROM {definicion['desde']}",
+                                       [], [], [(expresion_llave, llave)])
+        cursor.close()
+        datos = [{c: v.isoformat() if isinstance(v, date) else v for c, v in fila.items()} for fila in filas]
+        respuesta = jsonify(datos=datos, siguiente=pagina['siguiente'])
 
+    respuesta.set_etag(etag)
+    if ultima_modificacion is not None:
+        respuesta.last_modified = ultima_modificacion
+    # El cliente puede guardar la respuesta, pero debe revalidarla en cada uso
+    respuesta.cache_control.no_cache = True
+    return respuesta
 
 # ----------------- Página principal ------------------
 
@@ -1014,6 +1756,44 @@ def index():
 
 # ----------------- Configuración y arranque ------------------
 
+def precalentar():
+    """
+    Compila todas las plantillas y carga el catálogo de cursos antes de recibir
+    tráfico. Con gunicorn (preload_app) se hace una sola vez en el proceso
+    principal y los workers lo heredan al hacer fork.
+    """
+    for nombre in app.jinja_env.list_templates():
+        app.jinja_env.get_template(nombre)
+
+    # Conexión fuera del pool para no heredar sockets abiertos en los workers.
+    # Si falla (base sin migrar, MySQL caído) el catálogo se carga en la primera petición.
+    try:
+        conn = db.conectar()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            catalogo.indice.cargar(cursor)
+            cursor.close()
+        finally:
+            conn.close()
+    except mysql.connector.Error as error:
+        app.logger.warning("No se pudo precargar el catálogo: %s", error)
+
+def crear_app():
+    """
+    Configura la aplicación para servirla. Es el punto de entrada de gunicorn:
+    gunicorn -c gunicorn.conf.py "app:crear_app()"
+    """
+    if config.SECRET_KEY:
+        app.secret_key = config.SECRET_KEY
+    elif config.DEBUG:
+        app.secret_key = 'tu_clave_secreta_aqui'
+    else:
+        raise RuntimeError("Falta la variable de entorno SECRET_KEY.")
+
+    if config.WEB_PRECALENTAR:
+        precalentar()
+    return app
+
 if __name__ == '__main__':
-    app.secret_key = 'tu_clave_secreta_aqui'
-    app.run(debug=True)
+    # Servidor de desarrollo: un solo proceso. En producción usar gunicorn (ver Dockerfile).
+    crear_app().run(debug=config.DEBUG)
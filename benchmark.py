@@ -0,0 +1,471 @@
+"""
+Benchmark de carga de KevzaCursos.
+
+Primero se llena una base de datos local a la escala deseada y después se
+ejecutan los grupos de rutas (lectura, escritura y exportación) contra un
+servidor en marcha, a uno o varios niveles de concurrencia. El resultado es
+un JSON con peticiones por segundo y latencias p50/p95/p99 por ruta, para
+comparar corridas entre sí.
+
+    python benchmark.py sembrar --escala 10     (1 millón de participantes, 5 millones de inscripciones)
+    gunicorn -c gunicorn.conf.py "app:crear_app()"
+    python benchmark.py correr --url http://localhost:5000 --concurrencia 1,8,32 --salida hoy.json
+    python benchmark.py comparar ayer.json hoy.json
+    python benchmark.py preparadas --repeticiones 5000   (consultas fijas: texto contra sentencia preparada)
+
+Usa los parámetros de conexión de config.py (variables DB_*).
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime
+
+import db
+import semillas
+
+# ----------------- Rutas medidas ------------------
+#
+# Cada ruta es (nombre, peso, función que arma la petición). La función
+# recibe el generador al azar y los ids máximos de cada tabla y devuelve
+# (método, ruta, datos del formulario o None). El peso indica qué tan
+# seguido se elige la ruta dentro de su grupo.
+
+
+def _al_azar(azar, maximo):
+    return azar.randint(1, max(maximo, 1))
+
+
+GRUPOS = {
+    'lectura': [
+        ('consultar_participantes', 3, lambda a, ids: ('GET', '/consultar_participantes', None)),
+        ('consultar_participantes_busqueda', 2, lambda a, ids: (
+            'GET', '/consultar_participantes?busqueda=' + urllib.parse.quote(a.choice(semillas.APELLIDOS)), None)),
+        ('consultar_cursos', 3, lambda a, ids: ('GET', '/consultar_cursos', None)),
+        ('consultar_categorias', 1, lambda a, ids: ('GET', '/consultar_categorias', None)),
+        ('consultar_inscripciones', 3, lambda a, ids: ('GET', '/consultar_inscripciones', None)),
+        ('dashboard', 2, lambda a, ids: ('GET', '/dashboard', None)),
+        ('dashboard_totales', 2, lambda a, ids: ('GET', '/api/dashboard/totales', None)),
+        ('dashboard_cursos_populares', 2, lambda a, ids: ('GET', '/api/dashboard/cursos_populares', None)),
+        ('dashboard_categorias', 2, lambda a, ids: ('GET', '/api/dashboard/categorias', None)),
+        ('dashboard_mensual', 2, lambda a, ids: ('GET', '/api/dashboard/mensual', None)),
+        ('editar_curso', 1, lambda a, ids: ('GET', f"/editar_curso/{_al_azar(a, ids['cursos'])}", None)),
+        ('editar_participante', 1, lambda a, ids: (
+            'GET', f"/editar_participante/{_al_azar(a, ids['participantes'])}", None)),
+        ('editar_inscripcion', 1, lambda a, ids: (
+            'GET', f"/editar_inscripcion/{_al_azar(a, ids['inscripciones'])}", None)),
+        ('api_buscar_participantes', 2, lambda a, ids: (
+            'GET', '/api/buscar/participantes?q=' + urllib.parse.quote(a.choice(semillas.NOMBRES)[:3]), None)),
+        ('api_buscar_cursos', 2, lambda a, ids: ('GET', '/api/buscar/cursos?q=Curso', None)),
+        ('api_participantes', 1, lambda a, ids: ('GET', '/api/participantes', None)),
+        ('api_inscripciones', 1, lambda a, ids: ('GET', '/api/inscripciones', None)),
+    ],
+    'escritura': [
+        ('registrar_participante', 1, lambda a, ids: ('POST', '/registrar_participante', _participante_nuevo())),
+        ('inscribir', 3, lambda a, ids: ('POST', '/inscribir', {
+            'id_participante': _al_azar(a, ids['participantes']), 'id_curso': _al_azar(a, ids['cursos'])})),
+    ],
+    'exportacion': [
+        ('trabajo_cursos_excel', 2, lambda a, ids: ('TRABAJO', 'cursos_excel', None)),
+        ('trabajo_cursos_pdf', 2, lambda a, ids: ('TRABAJO', 'cursos_pdf', None)),
+        ('trabajo_participantes_excel', 1, lambda a, ids: ('TRABAJO', 'participantes_excel', None)),
+        ('trabajo_inscripciones_excel', 1, lambda a, ids: ('TRABAJO', 'inscripciones_excel', None)),
+    ],
+}
+
+
+def _participante_nuevo():
+    clave = uuid.uuid4().hex[:12]
+    return {'nombre': f"Benchmark {clave}", 'correo': f"{clave}@benchmark.local",
+            'telefono': str(int(clave, 16))[:15], 'direccion': '', 'edad': '30', 'genero': 'Otro',
+            'ocupacion': 'Estudiante', 'usuario': '', 'password': ''}
+
+
+# ----------------- Cliente HTTP ------------------
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    # Se mide solo la ruta pedida, no la página a la que redirige
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Cliente:
+    """
+    Un usuario simulado: su propia sesión (cookie) y sus propias conexiones.
+    """
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.abridor = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SinRedirecciones)
+
+    def pedir(self, metodo, ruta, datos=None):
+        """
+        Devuelve el código de estado HTTP. La respuesta se lee completa.
+        """
+        cuerpo = urllib.parse.urlencode(datos).encode() if datos is not None else None
+        peticion = urllib.request.Request(self.url + ruta, data=cuerpo, method=metodo)
+        try:
+            with self.abridor.open(peticion, timeout=self.timeout) as respuesta:
+                while respuesta.read(65536):
+                    pass
+                return respuesta.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    def iniciar_sesion(self, usuario, password):
+        estado = self.pedir('POST', '/login', {'usuario': usuario, 'password': password})
+        if estado != 302:
+            raise RuntimeError(f"No se pudo iniciar sesión como {usuario!r} (HTTP {estado}).")
+
+    def trabajo(self, tipo, espera=0.5):
+        """
+        Lanza un trabajo de exportación y espera a que termine. Devuelve 200
+        si terminó bien, 500 si terminó con error o el código del POST si fue rechazado.
+        """
+        peticion = urllib.request.Request(f"{self.url}/exportaciones/{tipo}", data=b'', method='POST')
+        try:
+            with self.abridor.open(peticion, timeout=self.timeout) as respuesta:
+                estado_url = json.loads(respuesta.read())['estado_url']
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+        while True:
+            time.sleep(espera)
+            with self.abridor.open(self.url + estado_url, timeout=self.timeout) as respuesta:
+                estado = json.loads(respuesta.read())['estado']
+            if estado == 'terminado':
+                return 200
+            if estado == 'error':
+                return 500
+
+
+# ----------------- Corrida ------------------
+
+
+def percentil(ordenados, p):
+    """
+    Percentil `p` (0-100) por rango más cercano de una lista ya ordenada.
+    """
+    if not ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[indice]
+
+
+def resumir(muestras, segundos):
+    """
+    {ruta: métricas} a partir de las muestras (ruta, estado, latencia en s) de un nivel.
+    """
+    por_ruta = {}
+    for ruta, estado, latencia in muestras:
+        por_ruta.setdefault(ruta, []).append((estado, latencia))
+    resumen = {}
+    for ruta, datos in sorted(por_ruta.items()):
+        latencias = sorted(latencia for _, latencia in datos)
+        resumen[ruta] = {
+            'peticiones': len(datos),
+            'errores': sum(1 for estado, _ in datos if estado is None or estado >= 400),
+            'rps': round(len(datos) / segundos, 2),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+            'max_ms': round(latencias[-1] * 1000, 2),
+        }
+    return resumen
+
+
+def correr_nivel(args, grupo, concurrencia, ids):
+    """
+    Corre `concurrencia` usuarios simulados durante args.duracion segundos,
+    cada uno pidiendo rutas del grupo al azar según su peso y sin pausas.
+    """
+    rutas = GRUPOS[grupo]
+    muestras = []
+    candado = threading.Lock()
+    clientes = []
+    for _ in range(concurrencia):
+        cliente = Cliente(args.url, args.timeout)
+        cliente.iniciar_sesion(args.usuario, args.password)
+        clientes.append(cliente)
+
+    fin = time.monotonic() + args.duracion
+
+    def usuario(cliente, semilla):
+        azar = random.Random(semilla)
+        propias = []
+        while time.monotonic() < fin:
+            nombre, _, armar = azar.choices(rutas, weights=[peso for _, peso, _ in rutas])[0]
+            metodo, ruta, datos = armar(azar, ids)
+            inicio = time.perf_counter()
+            try:
+                if metodo == 'TRABAJO':
+                    estado = cliente.trabajo(ruta)
+                else:
+                    estado = cliente.pedir(metodo, ruta, datos)
+            except OSError:
+                estado = None
+            propias.append((nombre, estado, time.perf_counter() - inicio))
+        with candado:
+            muestras.extend(propias)
+
+    inicio = time.monotonic()
+    hilos = [threading.Thread(target=usuario, args=(cliente, i)) for i, cliente in enumerate(clientes)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resumir(muestras, time.monotonic() - inicio)
+
+
+def ids_maximos():
+    conn = db.conectar()
+    try:
+        cursor = conn.cursor()
+        ids = {}
+        for tabla, columna in (('participantes', 'id_participante'), ('cursos', 'id_curso'),
+                               ('categorias', 'id_categoria'), ('inscripciones', 'id_inscripcion')):
+            cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) FROM {tabla}")
+            ids[tabla] = cursor.fetchone()[0]
+        cursor.close()
+        return ids
+    finally:
+        conn.close()
+
+
+def version_del_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comando_correr(args):
+    ids = ids_maximos()
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_del_codigo(),
+        'url': args.url,
+        'duracion': args.duracion,
+        'escala': ids,
+        'niveles': [],
+    }
+    for grupo in args.grupos.split(','):
+        for concurrencia in (int(c) for c in args.concurrencia.split(',')):
+            print(f"{grupo} con {concurrencia} usuarios durante {args.duracion} s...", flush=True)
+            rutas = correr_nivel(args, grupo, concurrencia, ids)
+            resultado['niveles'].append({'grupo': grupo, 'concurrencia': concurrencia, 'rutas': rutas})
+            for ruta, datos in rutas.items():
+                print(f"  {ruta:34} {datos['rps']:>9} rps  p50 {datos['p50_ms']:>9} ms  "
+                      f"p95 {datos['p95_ms']:>9} ms  p99 {datos['p99_ms']:>9} ms  errores {datos['errores']}")
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        print(f"Resultados guardados en {args.salida}")
+    else:
+        print(texto)
+
+
+def comando_comparar(args):
+    """
+    Cambio de rps y p95 por ruta y nivel entre dos corridas.
+    """
+    def cargar(ruta):
+        with open(ruta, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+        return {(n['grupo'], n['concurrencia'], ruta): valores
+                for n in datos['niveles'] for ruta, valores in n['rutas'].items()}
+
+    antes, despues = cargar(args.antes), cargar(args.despues)
+    for clave in sorted(antes.keys() & despues.keys()):
+        a, d = antes[clave], despues[clave]
+        cambio_rps = (d['rps'] - a['rps']) / a['rps'] * 100 if a['rps'] else 0
+        cambio_p95 = (d['p95_ms'] - a['p95_ms']) / a['p95_ms'] * 100 if a['p95_ms'] else 0
+        grupo, concurrencia, ruta = clave
+        print(f"{grupo:11} c={concurrencia:<4} {ruta:34} rps {a['rps']:>9} -> {d['rps']:<9} ({cambio_rps:+.1f}%)  "
+              f"p95 {a['p95_ms']:>9} -> {d['p95_ms']:<9} ms ({cambio_p95:+.1f}%)")
+
+
+# ----------------- Sentencias preparadas ------------------
+#
+# Las consultas fijas más frecuentes de app.py, ejecutadas como texto (MySQL
+# las analiza y planea cada vez) y como sentencia preparada una sola vez por
+# conexión (ver db.SentenciasPreparadas). Cada una es (nombre, sql, función
+# que arma los parámetros a partir del generador al azar y los ids máximos).
+
+CONSULTAS_CALIENTES = [
+    ('curso por id', "SELECT id_curso, nombre, descripcion, duracion, id_categoria FROM cursos WHERE id_curso = %s",
+     lambda azar, ids: (_al_azar(azar, ids['cursos']),)),
+    ('participante por id', """
+        SELECT id_participante, nombre, correo, telefono, direccion, edad, genero, ocupacion, usuario
+        FROM participantes WHERE id_participante = %s
+    """,
+     lambda azar, ids: (_al_azar(azar, ids['participantes']),)),
+    ('inscripción con nombres', """
+        SELECT i.id_inscripcion, i.id_participante, i.id_curso, i.fecha,
+               p.nombre AS participante, c.nombre AS curso
+        FROM inscripciones i
+        LEFT JOIN participantes p ON i.id_participante = p.id_participante
+        LEFT JOIN cursos c ON i.id_curso = c.id_curso
+        WHERE i.id_inscripcion = %s
+    """, lambda azar, ids: (_al_azar(azar, ids['inscripciones']),)),
+    ('versiones de tablas', """
+        SELECT tabla, version, UNIX_TIMESTAMP(actualizada_en)
+        FROM versiones_tablas WHERE tabla IN (%s, %s)
+    """, lambda azar, ids: ('categorias', 'cursos')),
+]
+
+
+def estado_sesion(conn, nombres):
+    """
+    Contadores de SHOW SESSION STATUS de la conexión.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN (%s)" % ', '.join(['%s'] * len(nombres)),
+                   tuple(nombres))
+    valores = {nombre: int(valor) for nombre, valor in cursor.fetchall()}
+    cursor.close()
+    return valores
+
+
+def medir_consulta(ejecutar, parametros, repeticiones):
+    """
+    Latencias (s) de `repeticiones` ejecuciones, después de un calentamiento
+    con los mismos parámetros para que ambos modos lean páginas ya en memoria.
+    """
+    for params in parametros[:min(200, repeticiones)]:
+        ejecutar(params)
+    latencias = []
+    for params in parametros:
+        inicio = time.perf_counter()
+        ejecutar(params)
+        latencias.append(time.perf_counter() - inicio)
+    return sorted(latencias)
+
+
+def comando_preparadas(args):
+    ids = ids_maximos()
+    conn = db.conectar()
+    preparadas = db.SentenciasPreparadas(conn, len(CONSULTAS_CALIENTES))
+    contadores = ('Com_select', 'Com_stmt_prepare', 'Com_stmt_execute')
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': version_del_codigo(),
+        'repeticiones': args.repeticiones,
+        'escala': ids,
+        'consultas': {},
+    }
+    try:
+        for nombre, sql, armar in CONSULTAS_CALIENTES:
+            azar = random.Random(args.semilla)
+            parametros = [armar(azar, ids) for _ in range(args.repeticiones)]
+
+            def como_texto(params):
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                cursor.close()
+
+            def preparada(params):
+                texto, cursor = preparadas.obtener(sql, dictionary=True)
+                cursor.execute(texto, params)
+                cursor.fetchall()
+
+            datos = {}
+            for modo, ejecutar in (('texto', como_texto), ('preparada', preparada)):
+                antes = estado_sesion(conn, contadores)
+                latencias = medir_consulta(ejecutar, parametros, args.repeticiones)
+                despues = estado_sesion(conn, contadores)
+                datos[modo] = {
+                    'media_us': round(sum(latencias) / len(latencias) * 1e6, 1),
+                    'p50_us': round(percentil(latencias, 50) * 1e6, 1),
+                    'p95_us': round(percentil(latencias, 95) * 1e6, 1),
+                    # El SHOW SESSION STATUS de la medición cuenta como un Com_select
+                    **{c: despues.get(c, 0) - antes.get(c, 0) for c in contadores},
+                }
+            texto, prep = datos['texto'], datos['preparada']
+            datos['ahorro_p50_pct'] = round((texto['p50_us'] - prep['p50_us']) / texto['p50_us'] * 100, 1)
+            resultado['consultas'][nombre] = datos
+            print(f"  {nombre:24} texto p50 {texto['p50_us']:>8} us  p95 {texto['p95_us']:>8} us   "
+                  f"preparada p50 {prep['p50_us']:>8} us  p95 {prep['p95_us']:>8} us   "
+                  f"ahorro {datos['ahorro_p50_pct']:+.1f}%  (preparaciones: {prep['Com_stmt_prepare']})",
+                  flush=True)
+    finally:
+        conn.close()
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+def comando_sembrar(args):
+    conn = db.conectar()
+    try:
+        inicio = time.monotonic()
+        cantidades = semillas.escalar(args.escala, categorias=args.categorias, cursos=args.cursos,
+                                      participantes=args.participantes, inscripciones=args.inscripciones)
+        semillas.sembrar(conn, semilla=args.semilla, tamano_lote=args.lote,
+                         avance=lambda m: print(f"[{time.monotonic() - inicio:7.1f} s] {m}", flush=True),
+                         **cantidades)
+        semillas.crear_usuario(conn, args.usuario, args.password)
+        print(f"Usuario para el benchmark: {args.usuario}")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga de KevzaCursos.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    sembrar = subcomandos.add_parser('sembrar', help='Llenar la base de datos local con datos de prueba.')
+    sembrar.add_argument('--escala', type=float, default=1.0,
+                         help='1 = 100 mil participantes y 500 mil inscripciones (ver semillas.POR_ESCALA).')
+    sembrar.add_argument('--semilla', type=int, default=42)
+    for tabla in ('categorias', 'cursos', 'participantes', 'inscripciones'):
+        sembrar.add_argument(f'--{tabla}', type=int, default=None, help='Reemplaza la cantidad de la escala.')
+    sembrar.add_argument('--lote', type=int, default=5000, help='Filas por INSERT.')
+
+    correr = subcomandos.add_parser('correr', help='Medir las rutas contra un servidor en marcha.')
+    correr.add_argument('--url', default='http://localhost:5000')
+    correr.add_argument('--grupos', default='lectura,escritura,exportacion')
+    correr.add_argument('--concurrencia', default='1,8,32', help='Niveles separados por coma.')
+    correr.add_argument('--duracion', type=float, default=30, help='Segundos por grupo y nivel.')
+    correr.add_argument('--timeout', type=float, default=300, help='Segundos máximos por petición.')
+    correr.add_argument('--salida', help='Archivo JSON de resultados (por defecto, a la pantalla).')
+
+    for subcomando in (sembrar, correr):
+        subcomando.add_argument('--usuario', default='benchmark')
+        subcomando.add_argument('--password', default='benchmark')
+
+    comparar = subcomandos.add_parser('comparar', help='Comparar dos archivos de resultados.')
+    comparar.add_argument('antes')
+    comparar.add_argument('despues')
+
+    preparadas = subcomandos.add_parser(
+        'preparadas', help='Comparar las consultas fijas más usadas como texto y como sentencia preparada.')
+    preparadas.add_argument('--repeticiones', type=int, default=5000, help='Ejecuciones por consulta y modo.')
+    preparadas.add_argument('--semilla', type=int, default=42)
+    preparadas.add_argument('--salida', help='Archivo JSON de resultados.')
+
+    args = parser.parse_args()
+    {'sembrar': comando_sembrar, 'correr': comando_correr, 'comparar': comando_comparar,
+     'preparadas': comando_preparadas}[args.comando](args)
+
+
+if __name__ == '__main__':
+    main()
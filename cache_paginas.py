@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+import config
+import versiones_tablas
+
+# ----------------- Caché de páginas completas ------------------
+
+
+class CachePaginas:
+    """
+    Guarda el HTML ya generado de páginas de consulta, por ruta y parámetros,
+    junto con las versiones de las tablas de las que depende cada página.
+
+    Una página guardada se sirve mientras esas versiones sigan siendo las
+    actuales. Las rutas que escriben avisan con registrar_cambio() justo
+    después del commit; los cambios hechos por otros procesos se detectan
+    releyendo versiones_tablas como mucho cada config.PAGE_CACHE_REVISION
+    segundos. Entre revisiones, un acierto no toca la base de datos.
+    """
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._candado = threading.Lock()
+        self._paginas = OrderedDict()    # clave -> (versiones, contenido, content_type)
+        self._versiones = {}             # {tabla: versión} más reciente conocida
+        self._tablas = set()             # tablas que usan las páginas guardadas
+        self._revisado = 0.0
+        self.contadores = {'aciertos': 0, 'fallos': 0}
+
+    def asegurar_vigente(self, obtener_conexion, tablas):
+        """
+        Relee las versiones de la base de datos si pasó el intervalo de
+        revisión o si aún no se conoce alguna de `tablas`.
+        """
+        with self._candado:
+            self._tablas.update(tablas)
+            desconocidas = any(t not in self._versiones for t in tablas)
+            if not desconocidas and time.monotonic() - self._revisado < config.PAGE_CACHE_REVISION:
+                return
+            consultar = tuple(sorted(self._tablas))
+        versiones, _ = versiones_tablas.leer(obtener_conexion(), consultar)
+        with self._candado:
+            for tabla, version in versiones.items():
+                # Nunca retroceder: un registrar_cambio() local puede ser más reciente
+                if version > self._versiones.get(tabla, -1):
+                    self._versiones[tabla] = version
+            self._revisado = time.monotonic()
+
+    def versiones_actuales(self, tablas):
+        with self._candado:
+            return {t: self._versiones.get(t) for t in tablas}
+
+    def obtener(self, clave, tablas):
+        """
+        Devuelve (contenido, content_type) si la página guardada sigue vigente.
+        """
+        with self._candado:
+            entrada = self._paginas.get(clave)
+            if entrada is not None and entrada[0] == {t: self._versiones.get(t) for t in tablas}:
+                self._paginas.move_to_end(clave)
+                self.contadores['aciertos'] += 1
+                return entrada[1], entrada[2]
+            self.contadores['fallos'] += 1
+            return None
+
+    def guardar(self, clave, versiones, contenido, content_type):
+        """
+        Guarda una página generada con los datos de `versiones` (las vigentes
+        antes de generarla). Se descartan las menos usadas si se pasa del máximo.
+        """
+        with self._candado:
+            self._paginas[clave] = (versiones, contenido, content_type)
+            self._paginas.move_to_end(clave)
+            while len(self._paginas) > self.maximo:
+                self._paginas.popitem(last=False)
+
+    def registrar_cambio(self, versiones):
+        """
+        Para llamar después del commit con las versiones que devolvió
+        marcar_cambio(): las páginas que dependen de esas tablas dejan de servirse.
+        """
+        with self._candado:
+            for tabla, version in versiones.items():
+                if version > self._versiones.get(tabla, -1):
+                    self._versiones[tabla] = version
+
+    def vaciar(self):
+        with self._candado:
+            self._paginas.clear()
+            self._versiones.clear()
+            self._revisado = 0.0
+
+
+cache = CachePaginas(config.PAGE_CACHE_MAX)
@@ -0,0 +1,235 @@
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+import config
+
+# ----------------- Índice del catálogo de cursos en memoria ------------------
+
+CONSULTA_CURSOS = """
+    SELECT cursos.id_curso, cursos.nombre, cursos.descripcion, categorias.nombre AS categoria
+    FROM cursos
+    LEFT JOIN categorias ON cursos.id_categoria = categorias.id_categoria
+"""
+
+CAMPOS_BUSQUEDA = ('nombre', 'descripcion', 'categoria')
+
+TABLAS = ('categorias', 'cursos')
+
+
+def normalizar(texto):
+    """
+    Minúsculas y sin acentos, igual que la collation *_ai_ci de MySQL,
+    para que la búsqueda en memoria coincida con la que hacía LIKE.
+    """
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def recortar(texto, largo=None):
+    """
+    Texto para mostrar en un listado: como mucho `largo` caracteres
+    (config.DESCRIPCION_LISTADO por defecto) y '…' si se cortó.
+    """
+    largo = config.DESCRIPCION_LISTADO if largo is None else largo
+    if texto is None or len(texto) <= largo:
+        return texto
+    return texto[:largo] + '…'
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceCatalogo:
+    """
+    Catálogo de cursos (con el nombre de su categoría) cargado una vez por
+    proceso, con un índice de trigramas sobre nombre, descripción y categoría.
+    Se busca en la descripción completa, pero las filas guardadas para el
+    listado solo conservan la descripción recortada.
+
+    Las rutas que modifican cursos o categorías lo parchan al momento
+    (escritura directa). Los cambios hechos por otros procesos se detectan
+    comparando la tabla versiones_tablas, como mucho cada
+    config.CATALOGO_REVISION segundos.
+    """
+
+    def __init__(self):
+        self._candado = threading.RLock()
+        self._cursos = {}                      # id_curso -> fila
+        self._textos = {}                      # id_curso -> textos normalizados por campo
+        self._trigramas = defaultdict(set)     # trigrama -> {id_curso}
+        self._versiones = None                 # {tabla: versión} con la que se cargó
+        self._revisado = 0.0
+
+    # --- Carga y vigencia ---
+
+    def cargar(self, cursor):
+        """
+        Lee el catálogo completo de la base de datos y reconstruye el índice.
+        """
+        versiones = leer_versiones(cursor)
+        cursor.execute(CONSULTA_CURSOS)
+        filas = cursor.fetchall()
+        with self._candado:
+            if self._es_anterior(versiones):
+                # Otra carga más reciente (o un parche local) ganó mientras se leía
+                return
+            self._cursos.clear()
+            self._textos.clear()
+            self._trigramas.clear()
+            for fila in filas:
+                self._indexar(fila)
+            self._versiones = versiones
+            self._revisado = time.monotonic()
+
+    def asegurar_vigente(self, obtener_conexion):
+        """
+        Carga el catálogo si aún no se ha cargado o si otro proceso lo modificó.
+        Solo consulta la base de datos cuando pasó el intervalo de revisión.
+
+        La conexión puede ser de una réplica atrasada: si sus versiones son
+        anteriores a las del índice se conserva el índice actual, para no
+        deshacer los parches de las escrituras hechas en este proceso.
+        """
+        if self._versiones is not None and \
+                time.monotonic() - self._revisado < config.CATALOGO_REVISION:
+            return
+        cursor = obtener_conexion().cursor(dictionary=True)
+        try:
+            if self._versiones is not None:
+                versiones = leer_versiones(cursor)
+                if versiones == self._versiones or self._es_anterior(versiones):
+                    self._revisado = time.monotonic()
+                    return
+            self.cargar(cursor)
+        finally:
+            cursor.close()
+
+    def _es_anterior(self, versiones):
+        """
+        Alguna de `versiones` es menor que la del índice cargado.
+        """
+        with self._candado:
+            if self._versiones is None:
+                return False
+            return any(versiones.get(tabla, -1) < version for tabla, version in self._versiones.items())
+
+    def versiones(self):
+        """
+        Copia de las versiones con las que está cargado el índice, o None si no está cargado.
+        """
+        with self._candado:
+            return dict(self._versiones) if self._versiones is not None else None
+
+    def invalidar(self):
+        """
+        Descarta el catálogo; se volverá a cargar en la siguiente búsqueda.
+        """
+        with self._candado:
+            self._versiones = None
+
+    # --- Búsqueda ---
+
+    def todos(self):
+        with self._candado:
+            return [self._cursos[i] for i in sorted(self._cursos)]
+
+    def buscar(self, texto):
+        """
+        Cursos cuyo nombre, descripción o categoría contienen `texto`
+        (sin distinguir mayúsculas ni acentos), en orden de id.
+        """
+        consulta = normalizar(texto)
+        with self._candado:
+            if len(consulta) >= 3:
+                listas = sorted((self._trigramas.get(t, set()) for t in trigramas(consulta)), key=len)
+                candidatos = set(listas[0]).intersection(*listas[1:])
+            else:
+                candidatos = self._cursos.keys()
+            encontrados = [i for i in candidatos
+                           if any(consulta in campo for campo in self._textos[i])]
+            return [self._cursos[i] for i in sorted(encontrados)]
+
+    # --- Escritura directa desde las rutas ---
+
+    def recargar_cursos(self, cursor, versiones, id_curso=None, id_categoria=None):
+        """
+        Vuelve a leer de la base de datos un curso (o todos los de una categoría)
+        y actualiza el índice. `versiones` son las versiones devueltas por
+        marcar_cambio(); si el índice no estaba al día se invalida completo.
+        """
+        if id_curso is not None:
+            cursor.execute(CONSULTA_CURSOS + " WHERE cursos.id_curso = %s", (id_curso,))
+        else:
+            cursor.execute(CONSULTA_CURSOS + " WHERE cursos.id_categoria = %s", (id_categoria,))
+        filas = cursor.fetchall()
+        with self._candado:
+            if not self._avanzar_version(versiones):
+                return
+            if id_curso is not None:
+                self._quitar(id_curso)
+            for fila in filas:
+                self._quitar(fila['id_curso'])
+                self._indexar(fila)
+
+    def quitar_curso(self, id_curso, versiones):
+        with self._candado:
+            if self._avanzar_version(versiones):
+                self._quitar(id_curso)
+
+    def registrar_cambio(self, versiones):
+        """
+        Para cambios que no alteran ningún curso del índice (p. ej. una categoría nueva).
+        """
+        with self._candado:
+            self._avanzar_version(versiones)
+
+    # --- Internos ---
+
+    def _avanzar_version(self, versiones):
+        if self._versiones is None:
+            return False
+        for tabla, version in versiones.items():
+            if tabla not in self._versiones:
+                continue
+            if self._versiones[tabla] != version - 1:
+                # Hubo cambios de otro proceso que no conocemos: recargar todo
+                self._versiones = None
+                return False
+        for tabla, version in versiones.items():
+            if tabla in self._versiones:
+                self._versiones[tabla] = version
+        return True
+
+    def _indexar(self, fila):
+        id_curso = fila['id_curso']
+        textos = tuple(normalizar(fila.get(campo)) for campo in CAMPOS_BUSQUEDA)
+        fila['descripcion'] = recortar(fila.get('descripcion'))
+        self._cursos[id_curso] = fila
+        self._textos[id_curso] = textos
+        for campo in textos:
+            for t in trigramas(campo):
+                self._trigramas[t].add(id_curso)
+
+    def _quitar(self, id_curso):
+        textos = self._textos.pop(id_curso, None)
+        self._cursos.pop(id_curso, None)
+        if textos is None:
+            return
+        for campo in textos:
+            for t in trigramas(campo):
+                ids = self._trigramas.get(t)
+                if ids is not None:
+                    ids.discard(id_curso)
+                    if not ids:
+                        del self._trigramas[t]
+
+
+def leer_versiones(cursor):
+    cursor.execute("SELECT tabla, version FROM versiones_tablas WHERE tabla IN (%s, %s)", TABLAS)
+    return {fila['tabla']: fila['version'] for fila in cursor.fetchall()}
+
+
+indice = IndiceCatalogo()
@@ -1,7 +1,97 @@
 
 import os
+import tempfile
 
 DB_HOST = os.getenv('DB_HOST')          
 DB_USER = os.getenv('DB_USER')          
 DB_PASSWORD = os.getenv('DB_PASSWORD')  
-DB_NAME = os.getenv('DB_NAME')          
\ No newline at end of file
+DB_NAME = os.getenv('DB_NAME')          
+
+SECRET_KEY = os.getenv('SECRET_KEY')                                 # Obligatoria fuera del modo de depuración.
+DEBUG = os.getenv('DEBUG_MODE', 'False').lower() in ('1', 'true')   # Servidor de desarrollo con recarga automática.
+
+# Pool de conexiones a la base de datos.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))                 # Conexiones máximas por proceso.
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))          # Segundos a esperar por una conexión libre.
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '10'))     # Segundos para abrir una conexión nueva.
+DB_POOL_RECYCLE = float(os.getenv('DB_POOL_RECYCLE', '3600'))       # Segundos antes de renovar una conexión (0 = nunca).
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', '30'))   # Segundos inactiva antes de comprobarla con ping.
+DB_PREPARED_MAX = int(os.getenv('DB_PREPARED_MAX', '64'))           # Sentencias preparadas por conexión (0 = no preparar).
+
+
+# Paginación de los listados.
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '50'))               # Filas por página por defecto.
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '200'))      # Máximo permitido en ?por_pagina=.
+
+
+# Listados.
+DESCRIPCION_LISTADO = int(os.getenv('DESCRIPCION_LISTADO', '150'))  # Caracteres de las descripciones en los listados (completas al editar).
+
+
+# Búsqueda de participantes.
+FT_MIN_TOKEN = int(os.getenv('FT_MIN_TOKEN', '2'))          # Debe coincidir con ngram_token_size de MySQL.
+
+
+# Catálogo de cursos en memoria.
+CATALOGO_REVISION = float(os.getenv('CATALOGO_REVISION', '2'))     # Segundos entre revisiones de cambios hechos por otros procesos.
+
+
+# Exportaciones.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))     # Filas leídas de la base de datos por bloque.
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'kevza_exportaciones'))  # Archivos de los trabajos de exportación.
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))              # Procesos que generan exportaciones en segundo plano.
+EXPORT_MAX_PENDIENTES = int(os.getenv('EXPORT_MAX_PENDIENTES', '10'))  # Trabajos sin terminar permitidos a la vez.
+EXPORT_TTL = int(os.getenv('EXPORT_TTL', '3600'))                   # Segundos que se conserva un archivo generado.
+EXPORT_LIMPIEZA = int(os.getenv('EXPORT_LIMPIEZA', '300'))          # Segundos entre limpiezas de trabajos expirados.
+
+
+# Importación masiva de participantes.
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))    # Filas por INSERT y por commit.
+IMPORT_MAX_MB = int(os.getenv('IMPORT_MAX_MB', '20'))               # Tamaño máximo del archivo subido.
+IMPORT_ERRORES_MAX = int(os.getenv('IMPORT_ERRORES_MAX', '500'))    # Errores que se muestran en el reporte.
+
+
+# Búsqueda mientras se escribe en los selectores de participante y curso.
+TYPEAHEAD_LIMIT = int(os.getenv('TYPEAHEAD_LIMIT', '10'))           # Resultados por página.
+
+
+# Caché de páginas de consulta (categorías y catálogo de cursos).
+PAGE_CACHE_MAX = int(os.getenv('PAGE_CACHE_MAX', '256'))            # Páginas guardadas por proceso.
+PAGE_CACHE_REVISION = float(os.getenv('PAGE_CACHE_REVISION', '2'))  # Segundos entre revisiones de cambios hechos por otros procesos.
+
+
+# Hash de contraseñas.
+PASSWORD_METHOD = os.getenv('PASSWORD_METHOD', 'scrypt:32768:8:1')  # Método y costo de werkzeug (p. ej. 'pbkdf2:sha256:600000').
+PASSWORD_WORKERS = int(os.getenv('PASSWORD_WORKERS', '2'))          # Hilos que calculan hashes a la vez por proceso.
+PASSWORD_COLA_MAX = int(os.getenv('PASSWORD_COLA_MAX', '16'))       # Cálculos que pueden esperar turno.
+PASSWORD_TIMEOUT = float(os.getenv('PASSWORD_TIMEOUT', '5'))        # Segundos a esperar turno antes de responder 503.
+
+
+# Servidor de producción (gunicorn.conf.py).
+WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')                    # Dirección y puerto.
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 1)))  # Procesos; por defecto uno por núcleo.
+WEB_THREADS = int(os.getenv('WEB_THREADS', '4'))                    # Hilos por proceso (no más que DB_POOL_SIZE).
+WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', '120'))                  # Segundos sin respuesta antes de reiniciar un proceso.
+WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))  # Segundos para terminar las peticiones en curso al reiniciar.
+WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', '5'))                # Segundos que se mantiene abierta una conexión inactiva.
+WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', '5000'))       # Peticiones antes de reciclar un proceso (0 = nunca).
+WEB_PRECALENTAR = os.getenv('WEB_PRECALENTAR', 'True').lower() in ('1', 'true')  # Cargar plantillas y catálogo antes de recibir tráfico.
+
+
+# Métricas en /metrics (formato de Prometheus).
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'kevza_metricas'))  # Copia de las métricas de cada proceso.
+METRICS_FLUSH = float(os.getenv('METRICS_FLUSH', '5'))              # Segundos entre copias a disco por proceso.
+METRICS_TTL = int(os.getenv('METRICS_TTL', '3600'))                 # Segundos sin copia antes de pasar un proceso al acumulado de terminados.
+
+
+# Consultas lentas y presupuesto de consultas por petición.
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '200'))      # Consultas más lentas que esto van al log con su EXPLAIN (0 = no registrar).
+DB_SLOW_EXPLAIN_INTERVALO = float(os.getenv('DB_SLOW_EXPLAIN_INTERVALO', '60'))  # Segundos entre EXPLAIN de una misma consulta.
+DB_QUERY_BUDGET = int(os.getenv('DB_QUERY_BUDGET', '15'))           # Consultas por petición; las rutas pueden fijar otro con @presupuesto_consultas.
+DB_QUERY_BUDGET_ESTRICTO = os.getenv('DB_QUERY_BUDGET_ESTRICTO', 'False').lower() in ('1', 'true')  # Fallar la petición en lugar de solo registrarla (para pruebas).
+
+
+# Réplicas de lectura.
+DB_REPLICAS = [h.strip() for h in os.getenv('DB_REPLICAS', '').split(',') if h.strip()]  # 'host' o 'host:puerto', separadas por coma.
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))    # Segundos de retraso a partir de los cuales no se usa una réplica.
+DB_REPLICA_REVISION = float(os.getenv('DB_REPLICA_REVISION', '2'))  # Segundos entre revisiones del retraso de cada réplica.
@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import config
+
+# ----------------- Hash de contraseñas ------------------
+#
+# Calcular o verificar un hash de contraseña es lento a propósito. Para que
+# una ráfaga de inicios de sesión no ocupe todos los hilos de los workers,
+# el cálculo se hace en un pool acotado de config.PASSWORD_WORKERS hilos
+# (hashlib libera el GIL durante scrypt y pbkdf2). Si además hay más de
+# config.PASSWORD_COLA_MAX cálculos esperando turno, se rechaza la petición
+# en lugar de encolarla sin límite.
+
+
+class HashSaturado(Exception):
+    """
+    Se lanza cuando no hubo turno para calcular un hash en config.PASSWORD_TIMEOUT segundos.
+    """
+
+
+_executor = None
+_executor_pid = None
+_cupos = None
+_candado = threading.Lock()
+_metodo_actual = None
+
+
+def _obtener_executor():
+    global _executor, _executor_pid, _cupos
+    if _executor is None or _executor_pid != os.getpid():
+        with _candado:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=config.PASSWORD_WORKERS,
+                                               thread_name_prefix='hash')
+                _cupos = threading.BoundedSemaphore(config.PASSWORD_WORKERS + config.PASSWORD_COLA_MAX)
+                _executor_pid = os.getpid()
+    return _executor, _cupos
+
+
+def _ejecutar(funcion, *args):
+    executor, cupos = _obtener_executor()
+    if not cupos.acquire(timeout=config.PASSWORD_TIMEOUT):
+        raise HashSaturado('Hay demasiadas contraseñas en proceso.')
+    try:
+        return executor.submit(funcion, *args).result()
+    finally:
+        cupos.release()
+
+
+def generar(password):
+    """
+    Hash de `password` con el método y costo de config.PASSWORD_METHOD.
+    """
+    return _ejecutar(generate_password_hash, password, config.PASSWORD_METHOD)
+
+
+def generar_varios(passwords):
+    """
+    Hashes de varias contraseñas (p. ej. un lote de la importación) calculados
+    en paralelo en el mismo pool. Se envían de config.PASSWORD_WORKERS en
+    config.PASSWORD_WORKERS para que la cola siga libre para los inicios de
+    sesión; el rendimiento máximo es el de esos hilos. Devuelve una lista con
+    el hash de cada contraseña o una HashSaturado si esa no alcanzó turno.
+    """
+    executor, cupos = _obtener_executor()
+    hashes = []
+    for inicio in range(0, len(passwords), config.PASSWORD_WORKERS):
+        futuros = []
+        for password in passwords[inicio:inicio + config.PASSWORD_WORKERS]:
+            if not cupos.acquire(timeout=config.PASSWORD_TIMEOUT):
+                futuros.append(None)
+                continue
+            futuro = executor.submit(generate_password_hash, password, config.PASSWORD_METHOD)
+            futuro.add_done_callback(lambda _: cupos.release())
+            futuros.append(futuro)
+        hashes.extend(futuro.result() if futuro else HashSaturado('Hay demasiadas contraseñas en proceso.')
+                      for futuro in futuros)
+    return hashes
+
+
+def verificar(password_hash, password):
+    """
+    True si `password` corresponde al hash guardado. Un hash vacío no coincide con nada.
+    """
+    if not password_hash:
+        return False
+    return _ejecutar(check_password_hash, password_hash, password)
+
+
+def metodo_actual():
+    """
+    Método completo con sus parámetros (p. ej. 'scrypt:32768:8:1') tal como
+    queda al inicio de los hashes nuevos.
+    """
+    global _metodo_actual
+    if _metodo_actual is None:
+        _metodo_actual = generar('').split('$', 1)[0]
+    return _metodo_actual
+
+
+def necesita_rehash(password_hash):
+    """
+    True si el hash se creó con otro método o con otro costo que los configurados.
+    """
+    return bool(password_hash) and password_hash.split('$', 1)[0] != metodo_actual()
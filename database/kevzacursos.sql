@@ -44,6 +44,9 @@ CREATE TABLE inscripciones (
     FOREIGN KEY (id_participante) REFERENCES participantes(id_participante)
 );
 
+-- Los cambios al esquema posteriores a este script (índices, tablas de resumen, etc.)
+-- están en database/migraciones y se aplican con: flask --app app migrar
+
 -- 7. Insertar categorías predeterminadas (estas son las categorías que estarán disponibles inicialmente).
 INSERT INTO categorias (nombre, descripcion) VALUES
 ('TECNOLOGIAS COMPUTACIONALES II', 'Curso sobre herramientas y lenguajes avanzados para el desarrollo de software.'),
@@ -0,0 +1,8 @@
+-- Versión de cada tabla: las rutas que escriben la incrementan y los cachés en memoria la comparan.
+CREATE TABLE versiones_tablas (
+    tabla VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO versiones_tablas (tabla) VALUES
+('categorias'), ('cursos'), ('participantes'), ('inscripciones');
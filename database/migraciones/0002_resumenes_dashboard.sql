@@ -0,0 +1,45 @@
+-- Tablas de resumen del dashboard: las mantienen las rutas de escritura de app.py.
+-- Para recalcularlas: flask --app app reconstruir-resumenes
+CREATE TABLE resumen_totales (
+    entidad VARCHAR(50) PRIMARY KEY,
+    total BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE resumen_cursos (
+    id_curso INT PRIMARY KEY,
+    inscritos BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_resumen_cursos_inscritos (inscritos)
+);
+
+CREATE TABLE resumen_categorias (
+    id_categoria INT PRIMARY KEY,
+    inscritos BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE resumen_mensual (
+    mes CHAR(7) PRIMARY KEY, -- 'AAAA-MM'
+    total BIGINT NOT NULL DEFAULT 0
+);
+
+-- Carga inicial con los datos existentes.
+INSERT INTO resumen_totales (entidad, total)
+SELECT 'cursos', COUNT(*) FROM cursos
+UNION ALL SELECT 'participantes', COUNT(*) FROM participantes
+UNION ALL SELECT 'inscripciones', COUNT(*) FROM inscripciones;
+
+INSERT INTO resumen_cursos (id_curso, inscritos)
+SELECT id_curso, COUNT(*) FROM inscripciones
+WHERE id_curso IS NOT NULL
+GROUP BY id_curso;
+
+INSERT INTO resumen_categorias (id_categoria, inscritos)
+SELECT c.id_categoria, COUNT(*)
+FROM inscripciones i
+JOIN cursos c ON i.id_curso = c.id_curso
+WHERE c.id_categoria IS NOT NULL
+GROUP BY c.id_categoria;
+
+INSERT INTO resumen_mensual (mes, total)
+SELECT DATE_FORMAT(fecha, '%Y-%m') AS mes, COUNT(*) FROM inscripciones
+WHERE fecha IS NOT NULL
+GROUP BY mes;
@@ -0,0 +1,9 @@
+-- Búsqueda de participantes: teléfono normalizado (solo dígitos) y fecha de registro indexados,
+-- más un índice FULLTEXT con parser n-gram sobre nombre y correo.
+ALTER TABLE participantes
+ADD COLUMN telefono_normalizado VARCHAR(15) AS (REGEXP_REPLACE(telefono, '[^0-9]', '')) STORED,
+ADD INDEX idx_participantes_telefono_normalizado (telefono_normalizado),
+ADD INDEX idx_participantes_fecha_registro (fecha_registro);
+
+ALTER TABLE participantes
+ADD FULLTEXT INDEX ft_participantes_nombre_correo (nombre, correo) WITH PARSER ngram;
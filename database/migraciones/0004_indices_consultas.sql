@@ -0,0 +1,24 @@
+-- Índices y restricciones únicas en las que se apoyan las validaciones de las rutas.
+-- Antes de aplicarla conviene revisar que no haya duplicados en los datos existentes:
+-- la migración falla si los hay.
+
+-- registrar_categoria: no se permiten dos categorías con el mismo nombre.
+ALTER TABLE categorias
+ADD UNIQUE INDEX uq_categorias_nombre (nombre);
+
+-- registrar_curso: no se permiten dos cursos con el mismo nombre.
+ALTER TABLE cursos
+ADD UNIQUE INDEX uq_cursos_nombre (nombre);
+
+-- registrar_participante: nombre, correo y teléfono no se repiten (usuario ya era UNIQUE).
+-- El índice de nombre también sirve para ordenar y paginar por nombre.
+ALTER TABLE participantes
+ADD UNIQUE INDEX uq_participantes_nombre (nombre),
+ADD UNIQUE INDEX uq_participantes_correo (correo),
+ADD UNIQUE INDEX uq_participantes_telefono (telefono);
+
+-- inscribir: un participante solo se inscribe una vez a cada curso.
+-- consultar_inscripciones: orden y paginación por (fecha, id_inscripcion).
+ALTER TABLE inscripciones
+ADD UNIQUE INDEX uq_inscripciones_participante_curso (id_participante, id_curso),
+ADD INDEX idx_inscripciones_fecha (fecha, id_inscripcion);
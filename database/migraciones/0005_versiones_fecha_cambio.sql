@@ -0,0 +1,4 @@
+-- Momento del último cambio de cada tabla, para el encabezado Last-Modified de la API JSON.
+-- Se actualiza solo cada vez que marcar_cambio() incrementa la versión.
+ALTER TABLE versiones_tablas
+ADD COLUMN actualizada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
@@ -0,0 +1,587 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import mysql.connector
+
+import config
+import metricas
+
+# ----------------- Medición del tiempo en MySQL ------------------
+
+log_consultas = logging.getLogger('kevza.consultas')
+
+# Sentencias que admiten EXPLAIN
+EXPLICABLES = ('select', 'with', 'insert', 'replace', 'update', 'delete')
+
+_explicadas = {}        # consulta normalizada -> momento del último EXPLAIN
+_explicadas_candado = threading.Lock()
+
+
+def explicar(conexion, sql, params):
+    """
+    Plan de ejecución de `sql` en una línea por tabla, o el motivo por el que no se pudo obtener.
+    """
+    try:
+        cursor = conexion.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+        finally:
+            cursor.close()
+    except mysql.connector.Error as error:
+        return f"(sin plan: {error})"
+    return '\n'.join(
+        f"  {fila.get('table')}: type={fila.get('type')} key={fila.get('key')} "
+        f"rows={fila.get('rows')} extra={fila.get('Extra')}"
+        for fila in plan
+    )
+
+
+def registrar_consulta_lenta(conexion, sql, params, segundos, filas):
+    """
+    Escribe en el log 'kevza.consultas' una consulta que pasó de
+    config.DB_SLOW_QUERY_MS, con su plan de EXPLAIN si se pasa `conexion`.
+    El plan de una misma consulta normalizada se pide como mucho cada
+    config.DB_SLOW_EXPLAIN_INTERVALO segundos.
+    """
+    normalizada = metricas.normalizar_sql(sql)
+    metricas.incrementar('kevza_consultas_lentas_total', consulta=normalizada)
+    plan = ''
+    if conexion is not None and normalizada.split(' ', 1)[0].lower() in EXPLICABLES:
+        ahora = time.monotonic()
+        with _explicadas_candado:
+            anterior = _explicadas.get(normalizada)
+            toca = anterior is None or ahora - anterior >= config.DB_SLOW_EXPLAIN_INTERVALO
+            if toca:
+                _explicadas[normalizada] = ahora
+        if toca:
+            plan = '\n' + explicar(conexion, sql, params)
+    log_consultas.warning("Consulta lenta: %.0f ms, %d filas: %s%s", segundos * 1000, filas, normalizada, plan)
+
+
+class CursorMedido:
+    """
+    Envuelve un cursor de mysql.connector y suma a las métricas de la
+    petición en curso cada consulta y el tiempo de execute y de los fetch.
+    El resto de atributos (rowcount, lastrowid, with_rows...) pasan tal cual.
+
+    El tiempo de una consulta incluye la lectura de sus filas, así que se
+    da por terminada al ejecutar la siguiente, al cerrar el cursor o al
+    regresar la conexión al pool; en ese momento se anotan sus filas y, si
+    fue lenta, se registra en el log con su plan.
+    """
+
+    def __init__(self, cursor, conexion):
+        self._cursor = cursor
+        self._conexion = conexion
+        self._actual = None     # (sql, params, explicable, entrada) de la última consulta
+
+    def _ejecutar(self, metodo, sql, params, args, kwargs, explicable=True):
+        self.terminar_consulta()
+        inicio = time.perf_counter()
+        try:
+            return metodo(sql, params, *args, **kwargs)
+        finally:
+            entrada = metricas.registrar_consulta(time.perf_counter() - inicio, sql)
+            self._actual = (sql, params, explicable, entrada)
+
+    def _leer(self, metodo, *args):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args)
+        finally:
+            segundos = time.perf_counter() - inicio
+            metricas.registrar_consulta(segundos)
+            if self._actual is not None:
+                self._actual[3][1] += segundos
+
+    def terminar_consulta(self):
+        if self._actual is None:
+            return
+        sql, params, explicable, entrada = self._actual
+        self._actual = None
+        entrada[2] = max(self._cursor.rowcount or 0, 0)
+        if config.DB_SLOW_QUERY_MS and entrada[1] * 1000 >= config.DB_SLOW_QUERY_MS:
+            registrar_consulta_lenta(self._conexion if explicable else None, sql, params,
+                                     entrada[1], entrada[2])
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        return self._ejecutar(self._cursor.execute, sql, params, args, kwargs)
+
+    def executemany(self, sql, datos, *args, **kwargs):
+        return self._ejecutar(self._cursor.executemany, sql, datos, args, kwargs, explicable=False)
+
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+
+    def close(self):
+        self.terminar_consulta()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class ConexionMedida:
+    """
+    Envuelve una conexión para que sus cursores sean CursorMedido y se mida
+    también el tiempo de commit y rollback. `hubo_commit` indica si se
+    confirmó algún cambio mientras estuvo prestada.
+    """
+
+    def __init__(self, conexion, preparadas=None):
+        self._conexion = conexion
+        self._preparadas = preparadas
+        self._cursores = []
+        self.hubo_commit = False
+
+    def cursor(self, *args, preparada=False, **kwargs):
+        """
+        Cursor medido. Con preparada=True (solo admite además dictionary)
+        usa las sentencias preparadas de la conexión; si la conexión no
+        viene del pool o están desactivadas, es un cursor normal.
+        """
+        if preparada and self._preparadas is not None:
+            cursor = CursorPreparado(self._preparadas, kwargs.get('dictionary', False), self._conexion)
+        else:
+            cursor = CursorMedido(self._conexion.cursor(*args, **kwargs), self._conexion)
+        self._cursores.append(cursor)
+        return cursor
+
+    def terminar_consultas(self):
+        """
+        Da por terminadas las consultas de los cursores que quedaron sin cerrar.
+        """
+        for cursor in self._cursores:
+            cursor.terminar_consulta()
+        self._cursores.clear()
+
+    def commit(self):
+        inicio = time.perf_counter()
+        self.hubo_commit = True
+        try:
+            self._conexion.commit()
+        finally:
+            metricas.registrar_consulta(time.perf_counter() - inicio)
+
+    def rollback(self):
+        inicio = time.perf_counter()
+        try:
+            self._conexion.rollback()
+        finally:
+            metricas.registrar_consulta(time.perf_counter() - inicio)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+
+# ----------------- Sentencias preparadas ------------------
+#
+# Las consultas fijas de la aplicación (búsquedas por id, el INSERT de
+# inscribir, las versiones de tablas...) se preparan en el
+# servidor una sola vez por conexión del pool; después solo se envían los
+# parámetros y MySQL no vuelve a analizar ni planear el texto.
+
+
+class SentenciasPreparadas:
+    """
+    Sentencias preparadas de una conexión, por texto SQL y tipo de fila.
+    Guarda como mucho `maximo` y, al pasarse, cierra en el servidor la que
+    lleva más tiempo sin usarse.
+    """
+
+    def __init__(self, conexion, maximo):
+        self._conexion = conexion
+        self.maximo = maximo
+        self._cursores = OrderedDict()     # (sql, dictionary) -> (sql, cursor preparado)
+
+    def obtener(self, sql, dictionary=False):
+        """
+        Devuelve (sql, cursor preparado). El sql devuelto es el mismo objeto
+        con el que se preparó, porque mysql.connector vuelve a preparar la
+        sentencia si recibe otro objeto aunque el texto sea igual.
+        """
+        clave = (sql, dictionary)
+        guardada = self._cursores.get(clave)
+        if guardada is not None:
+            self._cursores.move_to_end(clave)
+            metricas.incrementar('kevza_sentencias_preparadas_total', resultado='reutilizada')
+            return guardada
+        guardada = self._cursores[clave] = (sql, self._conexion.cursor(prepared=True, dictionary=dictionary))
+        metricas.incrementar('kevza_sentencias_preparadas_total', resultado='preparada')
+        while len(self._cursores) > self.maximo:
+            _, (_, cursor) = self._cursores.popitem(last=False)
+            try:
+                cursor.close()
+            except mysql.connector.Error:
+                pass
+        return guardada
+
+    def __len__(self):
+        return len(self._cursores)
+
+
+class CursorPreparado(CursorMedido):
+    """
+    Cursor medido que ejecuta cada consulta con la sentencia preparada de su
+    conexión (ver SentenciasPreparadas). Se usa como un cursor normal, pero
+    los parámetros deben ser una tupla o lista. Al cerrarlo se leen las filas
+    pendientes y la sentencia queda preparada para la siguiente petición.
+    """
+
+    def __init__(self, preparadas, dictionary, conexion):
+        super().__init__(None, conexion)
+        self._preparadas = preparadas
+        self._dictionary = dictionary
+
+    def terminar_consulta(self):
+        # Un cursor preparado no guarda sus filas: las que no se leyeron
+        # bloquearían la conexión para la siguiente consulta
+        if self._actual is not None and self._conexion.unread_result:
+            self._leer(self._cursor.fetchall)
+        super().terminar_consulta()
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self.terminar_consulta()
+        sql, self._cursor = self._preparadas.obtener(sql, self._dictionary)
+        return self._ejecutar(self._cursor.execute, sql, params, args, kwargs)
+
+    def executemany(self, sql, datos, *args, **kwargs):
+        self.terminar_consulta()
+        sql, self._cursor = self._preparadas.obtener(sql, self._dictionary)
+        return self._ejecutar(self._cursor.executemany, sql, datos, args, kwargs, explicable=False)
+
+    def close(self):
+        self.terminar_consulta()
+        self._cursor = None
+
+
+# ----------------- Pool de conexiones ------------------
+
+
+class PoolAgotado(Exception):
+    """
+    Se lanza cuando no hay conexiones libres en el pool y se agotó
+    el tiempo de espera configurado (DB_POOL_TIMEOUT).
+    """
+
+
+class PoolConexiones:
+    """
+    Pool acotado de conexiones MySQL.
+
+    Reutiliza conexiones ya abiertas para evitar el saludo TCP y la
+    autenticación en cada petición. Si todas las conexiones están en uso
+    espera hasta `timeout` segundos a que se libere una; si no, lanza
+    PoolAgotado. Lleva contadores de aciertos, esperas y agotamientos.
+    Las conexiones se entregan envueltas en ConexionMedida, cada una con sus
+    sentencias preparadas (hasta `preparadas` por conexión; 0 = no usarlas).
+    """
+
+    def __init__(self, tamano, timeout, reciclar, ping_tras, preparadas=0, **parametros):
+        self.tamano = tamano
+        self.timeout = timeout
+        self.reciclar = reciclar
+        self.ping_tras = ping_tras
+        self.preparadas = preparadas
+        self.parametros = parametros
+
+        self._libres = []          # lista de (conexion, creada_en, liberada_en)
+        self._creadas_en = {}      # id(conexion) -> momento de creación
+        self._preparadas = {}      # id(conexion) -> SentenciasPreparadas
+        self._en_uso = 0
+        self._condicion = threading.Condition()
+
+        self.contadores = {
+            'creadas': 0,
+            'aciertos': 0,
+            'esperas': 0,
+            'agotamientos': 0,
+            'descartadas': 0,
+        }
+
+    def _descartar(self, conn):
+        self._creadas_en.pop(id(conn), None)
+        self._preparadas.pop(id(conn), None)
+        self.contadores['descartadas'] += 1
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    def obtener(self):
+        """
+        Devuelve una conexión lista para usarse. Primero reutiliza una libre,
+        después abre una nueva si no se ha llegado al tamaño máximo y, por
+        último, espera a que otra petición libere la suya.
+        """
+        limite = time.monotonic() + self.timeout
+        with self._condicion:
+            esperando = False
+            while True:
+                while self._libres:
+                    conn, creada_en, liberada_en = self._libres.pop()
+                    ahora = time.monotonic()
+                    if self.reciclar and ahora - creada_en > self.reciclar:
+                        self._descartar(conn)
+                        continue
+                    if ahora - liberada_en > self.ping_tras:
+                        # Conexión inactiva un buen rato: comprobar que sigue viva
+                        try:
+                            conn.ping(reconnect=False)
+                        except mysql.connector.Error:
+                            self._descartar(conn)
+                            continue
+                    self._en_uso += 1
+                    self.contadores['aciertos'] += 1
+                    return ConexionMedida(conn, self._preparadas.get(id(conn)))
+
+                if self._en_uso + len(self._libres) < self.tamano:
+                    self._en_uso += 1
+                    break
+
+                if not esperando:
+                    esperando = True
+                    self.contadores['esperas'] += 1
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._condicion.wait(restante):
+                    if not self._libres:
+                        self.contadores['agotamientos'] += 1
+                        raise PoolAgotado('No hay conexiones disponibles en el pool.')
+
+        # Abrir la conexión fuera del candado para no bloquear a los demás
+        try:
+            conn = mysql.connector.connect(**self.parametros)
+        except Exception:
+            with self._condicion:
+                self._en_uso -= 1
+                self._condicion.notify()
+            raise
+
+        with self._condicion:
+            self._creadas_en[id(conn)] = time.monotonic()
+            if self.preparadas:
+                self._preparadas[id(conn)] = SentenciasPreparadas(conn, self.preparadas)
+            self.contadores['creadas'] += 1
+        return ConexionMedida(conn, self._preparadas.get(id(conn)))
+
+    def liberar(self, conn, descartar=False):
+        """
+        Regresa la conexión al pool. Cualquier transacción abierta se
+        deshace para que la siguiente petición no vea una instantánea vieja.
+        """
+        if isinstance(conn, ConexionMedida):
+            conn.terminar_consultas()
+            conn = conn._conexion
+        if not descartar:
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                descartar = True
+
+        with self._condicion:
+            self._en_uso -= 1
+            creada_en = self._creadas_en.get(id(conn), time.monotonic())
+            if descartar:
+                self._descartar(conn)
+            else:
+                self._libres.append((conn, creada_en, time.monotonic()))
+            self._condicion.notify()
+
+    def estadisticas(self):
+        """
+        Devuelve una copia de los contadores junto con el estado actual del pool.
+        """
+        with self._condicion:
+            datos = dict(self.contadores)
+            datos['en_uso'] = self._en_uso
+            datos['libres'] = len(self._libres)
+            datos['tamano'] = self.tamano
+            return datos
+
+
+def parametros_conexion(host=None):
+    """
+    Parámetros de conexión a MySQL tomados de config.py. `host` permite
+    apuntar a una réplica ('host' o 'host:puerto'); por defecto, la primaria.
+    """
+    parametros = dict(
+        host=config.DB_HOST,
+        user=config.DB_USER,
+        password=config.DB_PASSWORD,
+        database=config.DB_NAME,
+        connection_timeout=config.DB_CONNECT_TIMEOUT,
+    )
+    if host:
+        nombre, _, puerto = host.partition(':')
+        parametros['host'] = nombre
+        if puerto:
+            parametros['port'] = int(puerto)
+    return parametros
+
+
+def conectar(host=None):
+    """
+    Abre una conexión independiente, fuera del pool. Para procesos que no
+    atienden peticiones (trabajos de exportación, comandos). Con `host`, a esa réplica.
+    """
+    return mysql.connector.connect(**parametros_conexion(host))
+
+
+PRIMARIA = 'primaria'
+
+_pools = {}             # PRIMARIA o host de la réplica -> PoolConexiones
+_pools_pid = None
+_pool_candado = threading.Lock()
+
+
+def obtener_pool(destino=PRIMARIA):
+    """
+    Devuelve el pool del proceso actual hacia `destino` (la primaria o el
+    host de una réplica), creándolo la primera vez. Se vuelven a crear si el
+    proceso cambió (por ejemplo, tras un fork).
+    """
+    global _pools, _pools_pid
+    pool = _pools.get(destino) if _pools_pid == os.getpid() else None
+    if pool is None:
+        with _pool_candado:
+            if _pools_pid != os.getpid():
+                _pools = {}
+                _pools_pid = os.getpid()
+            pool = _pools.get(destino)
+            if pool is None:
+                pool = _pools[destino] = PoolConexiones(
+                    tamano=config.DB_POOL_SIZE,
+                    timeout=config.DB_POOL_TIMEOUT,
+                    reciclar=config.DB_POOL_RECYCLE,
+                    ping_tras=config.DB_POOL_PING_AFTER,
+                    preparadas=config.DB_PREPARED_MAX,
+                    **parametros_conexion(None if destino == PRIMARIA else destino)
+                )
+    return pool
+
+
+def pools():
+    """
+    {destino: pool} de los pools ya creados en este proceso.
+    """
+    return dict(_pools) if _pools_pid == os.getpid() else {}
+
+
+# ----------------- Réplicas de lectura ------------------
+#
+# Las rutas de solo lectura pueden usar las réplicas de config.DB_REPLICAS.
+# Cada proceso revisa el retraso de cada réplica como mucho cada
+# config.DB_REPLICA_REVISION segundos y solo usa las que estén a
+# config.DB_REPLICA_MAX_LAG segundos o menos de la primaria; entre ellas
+# reparte las lecturas por turnos. Si ninguna está al día, se lee de la primaria.
+
+_retrasos = {}          # host -> (momento de la revisión, segundos de retraso o None si no se puede usar)
+_retrasos_candado = threading.Lock()
+_turno = itertools.count()
+
+
+def medir_retraso(conn):
+    """
+    Segundos de retraso de la réplica según SHOW REPLICA STATUS, o None si
+    la conexión no es una réplica o la replicación está detenida.
+    """
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.ProgrammingError:
+            cursor.execute("SHOW SLAVE STATUS")        # MySQL anterior a 8.0.22
+        estado = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not estado:
+        return None
+    return estado.get('Seconds_Behind_Source', estado.get('Seconds_Behind_Master'))
+
+
+def marcar_caida(host):
+    """
+    Deja de usar la réplica hasta la siguiente revisión (p. ej. si no se pudo conectar).
+    """
+    with _retrasos_candado:
+        _retrasos[host] = (time.monotonic(), None)
+
+
+def _retraso(host):
+    ahora = time.monotonic()
+    with _retrasos_candado:
+        revisado, retraso = _retrasos.get(host, (None, None))
+        if revisado is not None and ahora - revisado < config.DB_REPLICA_REVISION:
+            return retraso
+        # Los demás hilos usan el valor anterior mientras este revisa
+        _retrasos[host] = (ahora, retraso)
+    pool = obtener_pool(host)
+    try:
+        conn = pool.obtener()
+    except PoolAgotado:
+        # Réplica ocupada, no caída: se omite en esta petición y los demás
+        # hilos siguen usando el último retraso medido
+        return None
+    except mysql.connector.Error:
+        marcar_caida(host)
+        return None
+    try:
+        retraso = medir_retraso(conn)
+    except mysql.connector.Error:
+        pool.liberar(conn, descartar=True)
+        marcar_caida(host)
+        return None
+    pool.liberar(conn)
+    with _retrasos_candado:
+        _retrasos[host] = (time.monotonic(), retraso)
+    return retraso
+
+
+def elegir_replica():
+    """
+    Host de una réplica al día, por turnos, o None si no hay ninguna.
+    """
+    disponibles = []
+    for host in config.DB_REPLICAS:
+        retraso = _retraso(host)
+        if retraso is not None and retraso <= config.DB_REPLICA_MAX_LAG:
+            disponibles.append(host)
+    if not disponibles:
+        return None
+    return disponibles[next(_turno) % len(disponibles)]
+
+
+def obtener_para_lectura():
+    """
+    Devuelve (destino, conexión) de una réplica al día o, si no hay o no
+    responde, de la primaria. La conexión se regresa con obtener_pool(destino).liberar().
+    """
+    host = elegir_replica()
+    if host is not None:
+        try:
+            return host, obtener_pool(host).obtener()
+        except PoolAgotado:
+            pass                    # ocupada: esta petición lee de la primaria
+        except mysql.connector.Error:
+            marcar_caida(host)
+    return PRIMARIA, obtener_pool().obtener()
@@ -0,0 +1,18 @@
+#!/bin/sh
+# Aplica las migraciones pendientes (database/migraciones) y después arranca
+# el comando del contenedor (gunicorn). En el primer arranque MySQL tarda en
+# aceptar conexiones mientras carga kevzacursos.sql, así que se reintenta.
+set -e
+
+intentos=0
+until flask --app app migrar; do
+    intentos=$((intentos + 1))
+    if [ "$intentos" -ge "${MIGRAR_INTENTOS:-30}" ]; then
+        echo "No se pudieron aplicar las migraciones después de $intentos intentos." >&2
+        exit 1
+    fi
+    echo "La base de datos aún no responde, reintentando en 2 s..." >&2
+    sleep 2
+done
+
+exec "$@"
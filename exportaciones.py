@@ -0,0 +1,295 @@
+from datetime import date, datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, PageBreak
+
+import config
+
+# ----------------- Exportaciones a Excel ------------------
+
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def leer_en_bloques(cursor, tamano=None):
+    """
+    Recorre las filas de un cursor sin buffer leyendo `tamano` filas a la vez,
+    de modo que nunca está el resultado completo en memoria. Cierra el cursor al terminar.
+    """
+    tamano = tamano or config.EXPORT_CHUNK_SIZE
+    try:
+        while True:
+            filas = cursor.fetchmany(tamano)
+            if not filas:
+                break
+            yield from filas
+    finally:
+        cursor.close()
+
+
+FORMATO_FECHA = 'dd/mm/yyyy'
+
+
+def _celda(hoja, valor, negritas=False):
+    """
+    Celda de una hoja write_only: fechas con formato dd/mm/aaaa, encabezados
+    en negritas y texto sin los caracteres de control que XLSX no admite.
+    Los demás valores se escriben tal cual.
+    """
+    if isinstance(valor, str):
+        valor = ILLEGAL_CHARACTERS_RE.sub('', valor)
+    elif isinstance(valor, datetime):
+        valor = valor.date()
+    if not negritas and not isinstance(valor, date):
+        return valor
+    celda = WriteOnlyCell(hoja, value=valor)
+    if negritas:
+        celda.font = Font(bold=True)
+    else:
+        celda.number_format = FORMATO_FECHA
+    return celda
+
+
+def generar_xlsx(salida, nombre_hoja, encabezados, filas):
+    """
+    Escribe en `salida` un archivo XLSX a partir de un iterable de filas.
+
+    Usa el modo write_only de openpyxl: cada fila se escribe a un archivo
+    temporal en cuanto se lee, así que la memoria usada no depende del
+    número de filas.
+    """
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(nombre_hoja)
+    hoja.append([_celda(hoja, e, negritas=True) for e in encabezados])
+    for fila in filas:
+        hoja.append([_celda(hoja, v) for v in fila])
+    libro.save(salida)
+
+
+# ----------------- Exportaciones a PDF por páginas ------------------
+
+FUENTE = 'Helvetica'
+FUENTE_ENCABEZADO = 'Helvetica-Bold'
+RELLENO = 3                 # Relleno por lado de cada celda (el de reportlab por defecto)
+RELLENO_ENCABEZADO = 6      # Relleno inferior de la fila de encabezados
+
+
+def _estilo_tabla(tamano_fuente, grosor_rejilla):
+    """
+    Estilo de tabla compartido por todas las páginas de un documento.
+    """
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), FUENTE_ENCABEZADO),
+        ('FONTSIZE', (0, 0), (-1, -1), tamano_fuente),
+        ('LEADING', (0, 0), (-1, -1), tamano_fuente + 1),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), RELLENO_ENCABEZADO),
+        ('GRID', (0, 0), (-1, -1), grosor_rejilla, colors.black),
+    ])
+
+
+def _partir_celda(texto, ancho, tamano_fuente, max_lineas):
+    """
+    Devuelve el texto de la celda y su número de líneas. Solo se parte en
+    varias líneas si no cabe en el ancho de la columna; las palabras más
+    largas que la columna (correos, hashes) se cortan por caracteres.
+    Un texto que no cabría en una página se recorta a `max_lineas`.
+    """
+    if not texto or stringWidth(texto, FUENTE, tamano_fuente) <= ancho:
+        return texto, 1
+    lineas = []
+    for linea in simpleSplit(texto, FUENTE, tamano_fuente, ancho):
+        while len(linea) > 1 and stringWidth(linea, FUENTE, tamano_fuente) > ancho:
+            # Búsqueda binaria del prefijo más largo que cabe
+            bajo, alto = 1, len(linea) - 1
+            while bajo < alto:
+                medio = (bajo + alto + 1) // 2
+                if stringWidth(linea[:medio], FUENTE, tamano_fuente) <= ancho:
+                    bajo = medio
+                else:
+                    alto = medio - 1
+            lineas.append(linea[:bajo])
+            linea = linea[bajo:]
+        lineas.append(linea)
+    if len(lineas) > max_lineas:
+        lineas = lineas[:max_lineas]
+        ultima = lineas[-1]
+        while ultima and stringWidth(ultima + '…', FUENTE, tamano_fuente) > ancho:
+            ultima = ultima[:-1]
+        lineas[-1] = ultima + '…'
+    return '\n'.join(lineas), max(len(lineas), 1)
+
+
+def _tablas_por_pagina(encabezados, anchos, filas, alto_pagina, tamano_fuente, estilo):
+    """
+    Agrupa las filas en tablas que caben en una página cada una, calculando
+    la altura de cada fila al partir sus celdas. Las tablas se generan una a
+    una, así que solo hay una página de filas en memoria a la vez.
+    """
+    interlineado = tamano_fuente + 1
+    alto_encabezado = interlineado + RELLENO + RELLENO_ENCABEZADO
+    anchos_utiles = [a - 2 * RELLENO for a in anchos]
+    max_lineas = max(int((alto_pagina - alto_encabezado - 2 * RELLENO) // interlineado), 1)
+
+    def nueva_tabla(bloque, alturas):
+        return Table(bloque, colWidths=anchos, rowHeights=alturas, repeatRows=1, style=estilo)
+
+    bloque, alturas, alto = [encabezados], [alto_encabezado], alto_encabezado
+    for fila in filas:
+        celdas, lineas = zip(*(_partir_celda('' if v is None else str(v), a, tamano_fuente, max_lineas)
+                               for v, a in zip(fila, anchos_utiles)))
+        alto_fila = max(lineas) * interlineado + 2 * RELLENO
+        if len(bloque) > 1 and alto + alto_fila > alto_pagina:
+            yield nueva_tabla(bloque, alturas)
+            yield PageBreak()
+            bloque, alturas, alto = [encabezados], [alto_encabezado], alto_encabezado
+        bloque.append(list(celdas))
+        alturas.append(alto_fila)
+        alto += alto_fila
+    yield nueva_tabla(bloque, alturas)
+
+
+class _FlowablesPerezosos:
+    """
+    Lista de flowables que se genera conforme reportlab la consume.
+    SimpleDocTemplate.build() solo mira y quita elementos del frente de la
+    lista (e inserta ahí los pedazos de una tabla partida), así que basta con
+    ir materializando el siguiente elemento del generador cuando hace falta.
+    """
+
+    def __init__(self, generador):
+        self._frente = []
+        self._generador = generador
+
+    def _asegurar(self, cantidad):
+        while len(self._frente) < cantidad:
+            siguiente = next(self._generador, None)
+            if siguiente is None:
+                return False
+            self._frente.append(siguiente)
+        return True
+
+    def __len__(self):
+        self._asegurar(1)
+        return len(self._frente)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, int) and indice >= 0:
+            if not self._asegurar(indice + 1):
+                raise IndexError(indice)
+        return self._frente[indice]
+
+    def __setitem__(self, indice, valor):
+        self._frente[indice] = valor
+
+    def __delitem__(self, indice):
+        del self._frente[indice]
+
+    def insert(self, indice, valor):
+        self._frente.insert(indice, valor)
+
+
+def generar_pdf(salida, encabezados, anchos, filas, tamano_pagina=landscape(letter),
+                tamano_fuente=6, grosor_rejilla=0.25):
+    """
+    Escribe en `salida` un PDF con una tabla de `filas` paginada.
+
+    Las filas se consumen de un iterable (p. ej. leer_en_bloques) y se
+    convierten en una tabla por página, de modo que el tiempo de generación
+    crece linealmente con el número de filas y la memoria usada para el
+    acomodo no depende de él.
+    """
+    doc = SimpleDocTemplate(salida, pagesize=tamano_pagina)
+    # Altura útil del marco (SimpleDocTemplate deja 6 puntos de relleno arriba y abajo)
+    alto_pagina = doc.height - 12
+    estilo = _estilo_tabla(tamano_fuente, grosor_rejilla)
+    doc.build(_FlowablesPerezosos(
+        _tablas_por_pagina(encabezados, anchos, filas, alto_pagina, tamano_fuente, estilo)))
+
+
+# ----------------- Definición de las exportaciones ------------------
+#
+# Cada exportación se describe una sola vez; los trabajos en segundo plano
+# (trabajos.py) la generan con escribir().
+
+_COLUMNAS_PARTICIPANTES = ['ID', 'Nombre', 'Correo', 'Teléfono', 'Dirección', 'Edad', 'Género', 'Ocupación', 'Fecha Registro', 'Usuario', 'Contraseña']
+_SQL_PARTICIPANTES = 'SELECT id_participante, nombre, correo, telefono, direccion, edad, genero, ocupacion, fecha_registro, usuario, password FROM participantes'
+
+_COLUMNAS_INSCRIPCIONES = ['ID Inscripción', 'ID Curso', 'ID Participante', 'Fecha']
+_SQL_INSCRIPCIONES = 'SELECT id_inscripcion, id_curso, id_participante, fecha FROM inscripciones'
+
+_COLUMNAS_CURSOS = ['ID', 'Nombre', 'Descripción', 'Duración', 'ID Categoría']
+_SQL_CURSOS = 'SELECT id_curso, nombre, descripcion, duracion, id_categoria FROM cursos'
+
+DEFINICIONES = {
+    'participantes_excel': {
+        'formato': 'xlsx', 'entidad': 'participantes', 'archivo': 'participantes.xlsx',
+        'sql': _SQL_PARTICIPANTES, 'columnas': _COLUMNAS_PARTICIPANTES, 'hoja': 'Participantes',
+    },
+    'participantes_pdf': {
+        'formato': 'pdf', 'entidad': 'participantes', 'archivo': 'participantes.pdf',
+        'sql': _SQL_PARTICIPANTES, 'columnas': _COLUMNAS_PARTICIPANTES,
+        'anchos': [
+            0.8*cm,   # ID
+            3.2*cm,   # Nombre
+            3.5*cm,   # Correo
+            1.7*cm,   # Teléfono
+            5*cm,     # Dirección
+            0.9*cm,   # Edad
+            1.5*cm,   # Género
+            1.8*cm,   # Ocupación
+            1.9*cm,   # Fecha registro
+            2*cm,     # Usuario
+            5*cm      # Contraseña
+        ],
+    },
+    'inscripciones_excel': {
+        'formato': 'xlsx', 'entidad': 'inscripciones', 'archivo': 'inscripciones.xlsx',
+        'sql': _SQL_INSCRIPCIONES, 'columnas': _COLUMNAS_INSCRIPCIONES, 'hoja': 'Inscripciones',
+    },
+    'inscripciones_pdf': {
+        'formato': 'pdf', 'entidad': 'inscripciones', 'archivo': 'inscripciones.pdf',
+        'sql': _SQL_INSCRIPCIONES, 'columnas': _COLUMNAS_INSCRIPCIONES,
+        'anchos': [4*cm, 4*cm, 4*cm, 4*cm],
+        'opciones': {'tamano_pagina': letter, 'tamano_fuente': 8, 'grosor_rejilla': 0.5},
+    },
+    'cursos_excel': {
+        'formato': 'xlsx', 'entidad': 'cursos', 'archivo': 'cursos.xlsx',
+        'sql': _SQL_CURSOS, 'columnas': _COLUMNAS_CURSOS, 'hoja': 'Cursos',
+    },
+    'cursos_pdf': {
+        'formato': 'pdf', 'entidad': 'cursos', 'archivo': 'cursos.pdf',
+        'sql': _SQL_CURSOS, 'columnas': _COLUMNAS_CURSOS,
+        'anchos': [
+            1.2*cm,   # ID
+            4*cm,     # Nombre
+            11*cm,    # Descripción
+            2*cm,     # Duración
+            2.5*cm    # ID Categoría
+        ],
+    },
+}
+
+MIME = {'xlsx': MIME_XLSX, 'pdf': 'application/pdf'}
+
+
+def escribir(tipo, filas, salida):
+    """
+    Escribe en el archivo `salida` la exportación `tipo` con las filas dadas.
+    """
+    definicion = DEFINICIONES[tipo]
+    if definicion['formato'] == 'xlsx':
+        generar_xlsx(salida, definicion['hoja'], definicion['columnas'], filas)
+    else:
+        generar_pdf(salida, definicion['columnas'], definicion['anchos'], filas,
+                    **definicion.get('opciones', {}))
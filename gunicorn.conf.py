@@ -0,0 +1,34 @@
+# Con otro nombre: gunicorn toma cada variable de este archivo como un ajuste, y `config` es uno de ellos
+import config as ajustes
+
+# ----------------- Servidor de producción (gunicorn) ------------------
+#
+# Uso: gunicorn -c gunicorn.conf.py "app:crear_app()"
+#
+# Varios procesos (uno por núcleo por defecto), cada uno con varios hilos.
+# La aplicación se carga y precalienta una vez en el proceso principal antes
+# de hacer fork, así los workers arrancan listos para atender.
+#
+# Reinicios sin cortar peticiones:
+# - kill -HUP <pid principal>: recarga la configuración y reemplaza los workers
+#   uno a uno. Con preload_app no vuelve a cargar el código.
+# - kill -USR2 <pid principal> y luego kill -QUIT <pid anterior>: arranca un
+#   proceso principal nuevo con el código actualizado y retira el anterior
+#   cuando el nuevo ya atiende.
+
+bind = ajustes.WEB_BIND
+workers = ajustes.WEB_WORKERS
+worker_class = 'gthread'
+threads = ajustes.WEB_THREADS
+timeout = ajustes.WEB_TIMEOUT
+graceful_timeout = ajustes.WEB_GRACEFUL_TIMEOUT
+keepalive = ajustes.WEB_KEEPALIVE
+
+# Reciclar workers de vez en cuando; el jitter evita que se reinicien todos a la vez
+max_requests = ajustes.WEB_MAX_REQUESTS
+max_requests_jitter = max(1, ajustes.WEB_MAX_REQUESTS // 10) if ajustes.WEB_MAX_REQUESTS else 0
+
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
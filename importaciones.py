@@ -0,0 +1,323 @@
+import csv
+import io
+import itertools
+import time
+from datetime import date
+
+from mysql.connector.errors import DataError, IntegrityError
+
+import cache_paginas
+import config
+import contrasenas
+import resumenes
+from versiones_tablas import marcar_cambio
+from catalogo import normalizar
+
+# ----------------- Importación masiva de participantes ------------------
+#
+# Lee un CSV o XLSX subido fila por fila y lo inserta por lotes de
+# config.IMPORT_BATCH_SIZE. Por cada lote se hace:
+#
+# - una consulta IN (...) por campo único para descartar los valores que
+#   ya existen en la base de datos;
+# - un solo executemany (que el conector envía como un INSERT de varias
+#   filas) y un commit.
+#
+# Las filas rechazadas se devuelven en el reporte con su número de fila y el motivo.
+# Las contraseñas de cada lote se convierten a hash en paralelo en el pool
+# acotado de contrasenas, así que un archivo con contraseñas avanza al ritmo
+# de config.PASSWORD_WORKERS hashes a la vez.
+# También lee los archivos de ids para la inscripción masiva.
+
+COLUMNAS = ('nombre', 'correo', 'telefono', 'direccion', 'edad', 'genero', 'ocupacion', 'usuario', 'password')
+
+OBLIGATORIAS = ('nombre', 'correo', 'telefono')
+
+# Campos con índice único en participantes, con el mensaje para el reporte
+UNICOS = {
+    'nombre': "Ya existe un participante con ese nombre completo.",
+    'correo': "Ya existe un participante con ese correo electrónico.",
+    'telefono': "Ya existe un participante con ese teléfono.",
+    'usuario': "Ese nombre de usuario ya está en uso.",
+}
+
+# Largo máximo de cada columna de texto en participantes (VARCHAR)
+LARGOS = {
+    'nombre': 100,
+    'correo': 100,
+    'telefono': 15,
+    'direccion': 255,
+    'genero': 10,
+    'ocupacion': 100,
+    'usuario': 50,
+}
+
+# Encabezados alternativos aceptados en el archivo (ya normalizados)
+ALIAS = {
+    'nombre completo': 'nombre',
+    'correo electronico': 'correo',
+    'email': 'correo',
+    'nombre de usuario': 'usuario',
+    'contrasena': 'password',
+}
+
+INSERT = """
+    INSERT INTO participantes (nombre, correo, telefono, direccion, edad, genero,
+                               ocupacion, usuario, password, fecha_registro)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class ArchivoInvalido(Exception):
+    """
+    El archivo no se puede leer o le faltan columnas obligatorias.
+    """
+
+
+def _columna(encabezado):
+    nombre = normalizar(encabezado).strip()
+    return ALIAS.get(nombre, nombre)
+
+
+def _validar_encabezados(encabezados):
+    columnas = [_columna(e) for e in encabezados]
+    faltan = [c for c in OBLIGATORIAS if c not in columnas]
+    if faltan:
+        raise ArchivoInvalido("Faltan columnas obligatorias: " + ", ".join(faltan) + ".")
+    return columnas
+
+
+def leer_csv(archivo):
+    """
+    Filas de un CSV como diccionarios {columna: texto}. Acepta ',' o ';'
+    como separador y UTF-8 con o sin BOM.
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        filas = _filas_csv(texto)
+        columnas = _validar_encabezados(next(filas))
+        for valores in filas:
+            if any(v.strip() for v in valores):
+                yield dict(zip(columnas, valores))
+            else:
+                yield None
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El CSV debe estar codificado en UTF-8.")
+    finally:
+        texto.detach()
+
+
+def leer_xlsx(archivo):
+    """
+    Filas de la primera hoja de un XLSX. Se abre en modo de solo lectura,
+    que recorre la hoja sin cargarla completa en memoria.
+    """
+    import openpyxl
+
+    try:
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ArchivoInvalido("No se pudo leer el archivo XLSX.")
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        columnas = _validar_encabezados([str(v or '') for v in next(filas, ())])
+        for valores in filas:
+            if any(v is not None and str(v).strip() for v in valores):
+                yield dict(zip(columnas, ('' if v is None else _texto_celda(v) for v in valores)))
+            else:
+                yield None
+    finally:
+        libro.close()
+
+
+def _texto_celda(valor):
+    # Excel guarda teléfonos y edades como números: 5512345678.0 -> '5512345678'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def leer_filas(archivo, nombre_archivo):
+    """
+    Elige el lector según la extensión del archivo subido.
+    """
+    extension = nombre_archivo.rsplit('.', 1)[-1].lower() if '.' in nombre_archivo else ''
+    if extension == 'csv':
+        return leer_csv(archivo)
+    if extension == 'xlsx':
+        return leer_xlsx(archivo)
+    raise ArchivoInvalido("Solo se aceptan archivos .csv o .xlsx.")
+
+
+def leer_ids_participantes(archivo):
+    """
+    Ids de participante de un CSV o TXT para la inscripción masiva: la columna
+    id_participante si el archivo tiene encabezados, si no la primera columna.
+    Devuelve (ids, valores_no_validos).
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    ids, invalidos = [], 0
+    try:
+        filas = _filas_csv(texto)
+        primera = next(filas)
+        encabezados = [_columna(v) for v in primera]
+        if 'id_participante' in encabezados:
+            columna = encabezados.index('id_participante')
+        else:
+            columna = 0
+            filas = itertools.chain([primera], filas)
+        for valores in filas:
+            valor = valores[columna].strip() if len(valores) > columna else ''
+            if valor.isdigit():
+                ids.append(int(valor))
+            elif valor:
+                invalidos += 1
+    except UnicodeDecodeError:
+        raise ArchivoInvalido("El archivo debe estar codificado en UTF-8.")
+    finally:
+        texto.detach()
+    return ids, invalidos
+
+
+def _filas_csv(texto):
+    """
+    Filas de un CSV como listas; el separador (',' o ';') se deduce de la primera línea.
+    """
+    muestra = texto.readline()
+    separador = ';' if muestra.count(';') > muestra.count(',') else ','
+    yield next(csv.reader([muestra], delimiter=separador), [])
+    yield from csv.reader(texto, delimiter=separador)
+
+
+def _limpiar(fila):
+    """
+    Valida una fila y la convierte a los valores que se insertan.
+    Devuelve (valores, error).
+    """
+    datos = {c: str(fila.get(c) or '').strip() for c in COLUMNAS}
+    faltan = [c for c in OBLIGATORIAS if not datos[c]]
+    if faltan:
+        return None, "Falta " + ", ".join(faltan) + "."
+    largos = [f"{c} ({len(datos[c])} de {maximo})" for c, maximo in LARGOS.items() if len(datos[c]) > maximo]
+    if largos:
+        return None, "Demasiados caracteres en " + ", ".join(largos) + "."
+    if datos['edad']:
+        try:
+            datos['edad'] = int(datos['edad'])
+        except ValueError:
+            return None, "La edad debe ser un número entero."
+    else:
+        datos['edad'] = None
+    datos['usuario'] = datos['usuario'] or None
+    return datos, None
+
+
+def _existentes(cursor, campo, valores):
+    """
+    Valores (normalizados) de `campo` que ya están en participantes.
+    """
+    if not valores:
+        return set()
+    marcadores = ', '.join(['%s'] * len(valores))
+    cursor.execute(f"SELECT {campo} FROM participantes WHERE {campo} IN ({marcadores})", list(valores))
+    return {normalizar(fila[0]) for fila in cursor.fetchall()}
+
+
+def _insertar_lote(conn, lote, reporte):
+    """
+    Inserta un lote de (numero_fila, datos) ya validados contra sí mismos.
+    """
+    cursor = conn.cursor()
+    # Duplicados contra la base de datos: una consulta por campo único
+    repetidos = {campo: _existentes(cursor, campo, {datos[campo] for _, datos in lote if datos[campo]})
+                 for campo in UNICOS}
+    validos = []
+    for numero, datos in lote:
+        chocan = [mensaje for campo, mensaje in UNICOS.items()
+                  if datos[campo] and normalizar(datos[campo]) in repetidos[campo]]
+        if chocan:
+            reporte['errores'].append((numero, ' '.join(chocan)))
+        else:
+            validos.append((numero, datos))
+
+    # Las contraseñas se convierten a hash en paralelo; las que no alcanzan
+    # turno en el pool se reportan y su fila no se inserta
+    hashes = iter(contrasenas.generar_varios([d['password'] for _, d in validos if d['password']]))
+    hoy = date.today()
+    numeros, filas = [], []
+    for numero, d in validos:
+        password_hash = next(hashes) if d['password'] else None
+        if isinstance(password_hash, contrasenas.HashSaturado):
+            reporte['errores'].append((numero, "No se pudo procesar la contraseña; importa la fila de nuevo."))
+            continue
+        numeros.append(numero)
+        filas.append((d['nombre'], d['correo'], d['telefono'], d['direccion'], d['edad'], d['genero'],
+                      d['ocupacion'], d['usuario'], password_hash, hoy))
+    if filas:
+        try:
+            cursor.executemany(INSERT, filas)
+            insertados = len(filas)
+        except (IntegrityError, DataError):
+            # Otro proceso registró alguno de estos valores entre la consulta y
+            # el INSERT, o algún valor no cabe en su columna: se reintenta fila
+            # por fila para ubicar las que fallan
+            conn.rollback()
+            insertados = 0
+            for numero, valores in zip(numeros, filas):
+                try:
+                    cursor.execute(INSERT, valores)
+                    insertados += 1
+                except IntegrityError:
+                    reporte['errores'].append((numero, "Ya existe un participante con esos datos."))
+                except DataError:
+                    reporte['errores'].append((numero, "Algún valor no cabe en su columna."))
+        resumenes.ajustar_total(conn, 'participantes', insertados)
+        versiones = marcar_cambio(conn, 'participantes')
+        conn.commit()
+        cache_paginas.cache.registrar_cambio(versiones)
+        reporte['insertados'] += insertados
+    cursor.close()
+
+
+def importar_participantes(conn, filas, tamano_lote=None):
+    """
+    Valida e inserta por lotes las filas leídas con leer_filas().
+    Devuelve un reporte con el total de filas, las insertadas, los errores
+    [(numero_fila, motivo)] y los segundos que tomó.
+
+    Las contraseñas que traiga el archivo se guardan con el mismo hash que el
+    registro normal; las filas con contraseña son las más lentas de importar.
+    """
+    tamano_lote = tamano_lote or config.IMPORT_BATCH_SIZE
+    inicio = time.monotonic()
+    reporte = {'filas': 0, 'insertados': 0, 'errores': [], 'segundos': 0.0}
+    vistos = {campo: set() for campo in UNICOS}   # duplicados dentro del mismo archivo
+
+    numeradas = enumerate(filas, start=2)         # la fila 1 son los encabezados
+    while True:
+        bloque = list(itertools.islice(numeradas, tamano_lote))
+        if not bloque:
+            break
+        lote = []
+        for numero, fila in bloque:
+            if fila is None:
+                continue
+            reporte['filas'] += 1
+            datos, error = _limpiar(fila)
+            if error is None:
+                claves = {campo: normalizar(datos[campo]) for campo in UNICOS if datos[campo]}
+                repetidos = [campo for campo, clave in claves.items() if clave in vistos[campo]]
+                if repetidos:
+                    error = "Repite " + ", ".join(repetidos) + " de una fila anterior del archivo."
+                else:
+                    for campo, clave in claves.items():
+                        vistos[campo].add(clave)
+                    lote.append((numero, datos))
+            if error is not None:
+                reporte['errores'].append((numero, error))
+        if lote:
+            _insertar_lote(conn, lote, reporte)
+
+    reporte['errores'].sort()
+    reporte['segundos'] = time.monotonic() - inicio
+    return reporte
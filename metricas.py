@@ -0,0 +1,392 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:     # Windows: sin gunicorn hay un solo proceso
+    fcntl = None
+
+import config
+
+# ----------------- Métricas en formato Prometheus ------------------
+#
+# Cada proceso acumula sus contadores e histogramas en memoria (solo sumas
+# bajo un candado, para que medir cueste poco) y cada config.METRICS_FLUSH
+# segundos guarda una copia en config.METRICS_DIR/<pid>.json. Al pedir
+# /metrics se suman los archivos de todos los procesos, así que el
+# resultado es el mismo sin importar qué worker de gunicorn atienda.
+#
+# Cuando el archivo de un proceso lleva config.METRICS_TTL segundos sin
+# actualizarse (worker reciclado o caído), sus contadores e histogramas se
+# suman a ARCHIVO_RETIRADOS antes de borrarlo, para que los totales nunca
+# bajen; sus gauges se descartan, porque solo valen mientras el proceso vive.
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# nombre -> (tipo, ayuda, buckets)
+DEFINICIONES = {
+    'kevza_peticion_segundos': (
+        'histogram', 'Duración de las peticiones por ruta, método y estado.', BUCKETS_SEGUNDOS),
+    'kevza_peticion_db_consultas': (
+        'histogram', 'Consultas a MySQL por petición.', BUCKETS_CONSULTAS),
+    'kevza_peticion_db_segundos': (
+        'histogram', 'Tiempo en MySQL por petición (execute, fetch y commit).', BUCKETS_SEGUNDOS),
+    'kevza_plantilla_segundos': (
+        'histogram', 'Tiempo de render de cada plantilla Jinja.', BUCKETS_SEGUNDOS),
+    'kevza_exportacion_segundos': (
+        'histogram', 'Tiempo de generación de cada exportación.', BUCKETS_SEGUNDOS),
+    'kevza_pool_conexiones': (
+        'gauge', 'Estado y contadores del pool de conexiones (ver db.PoolConexiones).', None),
+    'kevza_sentencias_preparadas_total': (
+        'counter', 'Ejecuciones con sentencia preparada: preparada por primera vez o reutilizada.', None),
+    'kevza_consultas_lentas_total': (
+        'counter', 'Consultas que pasaron de DB_SLOW_QUERY_MS, por consulta normalizada.', None),
+    'kevza_presupuesto_excedido_total': (
+        'counter', 'Peticiones que hicieron más consultas que el presupuesto de su ruta.', None),
+}
+
+_candado = threading.Lock()
+_histogramas = {}      # (nombre, etiquetas) -> [conteo por bucket..., suma, cuenta]
+_valores = {}          # (nombre, etiquetas) -> valor (gauges y contadores)
+_ultimo_guardado = 0.0
+
+# Consultas de la petición en curso (RegistroConsultas)
+_peticion = contextvars.ContextVar('metricas_peticion', default=None)
+
+DETALLE_MAX = 500       # consultas que se guardan con detalle por petición
+
+ARCHIVO_RETIRADOS = 'retirados.json'
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def observar(nombre, valor, **etiquetas):
+    """
+    Agrega una observación al histograma `nombre`.
+    """
+    buckets = DEFINICIONES[nombre][2]
+    clave = _clave(nombre, etiquetas)
+    with _candado:
+        datos = _histogramas.get(clave)
+        if datos is None:
+            datos = _histogramas[clave] = [0] * len(buckets) + [0.0, 0]
+        for i, limite in enumerate(buckets):
+            if valor <= limite:
+                datos[i] += 1
+                break
+        datos[-2] += valor
+        datos[-1] += 1
+
+
+def fijar(nombre, valor, **etiquetas):
+    with _candado:
+        _valores[_clave(nombre, etiquetas)] = valor
+
+
+def incrementar(nombre, cantidad=1, **etiquetas):
+    clave = _clave(nombre, etiquetas)
+    with _candado:
+        _valores[clave] = _valores.get(clave, 0) + cantidad
+
+
+@contextmanager
+def medir(nombre, **etiquetas):
+    """
+    Observa en el histograma `nombre` los segundos que tarda el bloque.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+
+# --- Consultas a la base de datos por petición ---
+
+_LITERALES = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b|%s")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALORES = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+
+
+def normalizar_sql(sql):
+    """
+    Forma de `sql` sin valores concretos, para agrupar ejecuciones de la
+    misma consulta: literales y parámetros pasan a '?', las listas de IN y
+    VALUES a '(...)' y los espacios se compactan.
+    """
+    sql = _LITERALES.sub('?', ' '.join(sql.split()))
+    sql = _LISTAS.sub('(...)', sql)
+    return _VALORES.sub(r'\1', sql)
+
+
+class RegistroConsultas:
+    """
+    Consultas hechas durante una petición o un bloque vigilar_consultas().
+    `detalle` guarda hasta DETALLE_MAX entradas [sql, segundos, filas].
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.detalle = []
+
+    def repetidas(self, cuantas=5):
+        """
+        Las consultas normalizadas más frecuentes como [(veces, sql), ...].
+        """
+        conteo = Counter(normalizar_sql(entrada[0]) for entrada in self.detalle)
+        return [(veces, sql) for sql, veces in conteo.most_common(cuantas)]
+
+
+class PresupuestoExcedido(AssertionError):
+    """
+    Se lanza cuando se hacen más consultas que las permitidas (ver vigilar_consultas
+    y config.DB_QUERY_BUDGET_ESTRICTO).
+    """
+
+
+def iniciar_peticion():
+    return _peticion.set(RegistroConsultas())
+
+
+def registrar_consulta(segundos, sql=None):
+    """
+    Suma tiempo de MySQL a la petición en curso. Si se pasa `sql` cuenta
+    además una consulta nueva y devuelve su entrada [sql, segundos, filas]
+    para completarla cuando se terminen de leer sus filas.
+    """
+    registro = _peticion.get()
+    entrada = [sql, segundos, 0] if sql is not None else None
+    if registro is not None:
+        registro.segundos += segundos
+        if entrada is not None:
+            registro.consultas += 1
+            if len(registro.detalle) < DETALLE_MAX:
+                registro.detalle.append(entrada)
+    return entrada
+
+
+def terminar_peticion(token, ruta, metodo, estado, segundos):
+    """
+    Observa la duración de la petición y sus consultas; devuelve su RegistroConsultas.
+    """
+    registro = _peticion.get()
+    _peticion.reset(token)
+    observar('kevza_peticion_segundos', segundos, ruta=ruta, metodo=metodo, estado=str(estado))
+    if registro is not None:
+        observar('kevza_peticion_db_consultas', registro.consultas, ruta=ruta)
+        observar('kevza_peticion_db_segundos', registro.segundos, ruta=ruta)
+    return registro
+
+
+def revisar_presupuesto(registro, maximo):
+    """
+    Mensaje con las consultas más repetidas si `registro` pasó de `maximo`
+    consultas; None si está dentro del presupuesto o si `maximo` es None.
+    """
+    if maximo is None or registro is None or registro.consultas <= maximo:
+        return None
+    repetidas = '; '.join(f"{veces} x {sql}" for veces, sql in registro.repetidas())
+    return f"{registro.consultas} consultas (presupuesto {maximo}). Más repetidas: {repetidas}"
+
+
+@contextmanager
+def vigilar_consultas(maximo=None):
+    """
+    Cuenta las consultas hechas dentro del bloque y lanza PresupuestoExcedido
+    si pasan de `maximo`. Devuelve el RegistroConsultas para revisarlo, p. ej.:
+
+        with metricas.vigilar_consultas(3) as registro:
+            importaciones.importar_participantes(conn, filas, 1000)
+    """
+    token = iniciar_peticion()
+    registro = _peticion.get()
+    try:
+        yield registro
+    finally:
+        _peticion.reset(token)
+    mensaje = revisar_presupuesto(registro, maximo)
+    if mensaje:
+        raise PresupuestoExcedido(mensaje)
+
+
+# --- Guardado por proceso y agregación ---
+
+def _ruta_archivo(pid):
+    return os.path.join(config.METRICS_DIR, f"{pid}.json")
+
+
+def guardar():
+    """
+    Escribe la copia de las métricas de este proceso (archivo temporal + rename).
+    """
+    global _ultimo_guardado
+    with _candado:
+        datos = {
+            'histogramas': [[n, e, v] for (n, e), v in _histogramas.items()],
+            'valores': [[n, e, v] for (n, e), v in _valores.items()],
+        }
+        _ultimo_guardado = time.monotonic()
+    os.makedirs(config.METRICS_DIR, exist_ok=True)
+    temporal = _ruta_archivo(os.getpid()) + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo)
+    os.replace(temporal, _ruta_archivo(os.getpid()))
+
+
+def toca_guardar():
+    """
+    True si pasaron config.METRICS_FLUSH segundos desde la última copia de este proceso.
+    """
+    return time.monotonic() - _ultimo_guardado >= config.METRICS_FLUSH
+
+
+def _reiniciar_tras_fork():
+    # Un worker nuevo no hereda lo medido por el proceso padre (p. ej. al precalentar)
+    global _candado, _ultimo_guardado
+    _candado = threading.Lock()
+    _histogramas.clear()
+    _valores.clear()
+    _ultimo_guardado = 0.0
+
+
+if hasattr(os, 'register_at_fork'):     # no existe en Windows
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def _leer_archivo(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _sumar(histogramas, valores, datos, sin_gauges=False):
+    for nombre, etiquetas, v in datos['histogramas']:
+        clave = (nombre, tuple(tuple(e) for e in etiquetas))
+        if clave in histogramas:
+            histogramas[clave] = [a + b for a, b in zip(histogramas[clave], v)]
+        else:
+            histogramas[clave] = v
+    for nombre, etiquetas, v in datos['valores']:
+        if sin_gauges and DEFINICIONES.get(nombre, ('counter',))[0] == 'gauge':
+            continue
+        clave = (nombre, tuple(tuple(e) for e in etiquetas))
+        valores[clave] = valores.get(clave, 0) + v
+
+
+@contextmanager
+def _bloqueo_retirados():
+    """
+    Bloqueo entre procesos para leer o modificar ARCHIVO_RETIRADOS.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(config.METRICS_DIR, 'retirados.lock'), 'a') as candado:
+        fcntl.flock(candado, fcntl.LOCK_EX)
+        yield
+
+
+def _retirar(ruta):
+    """
+    Suma los contadores e histogramas del archivo de un proceso terminado al
+    acumulado de procesos retirados y borra su archivo. Si otro proceso ya lo
+    está retirando no se hace nada, así no se suma dos veces.
+    """
+    ruta_retirados = os.path.join(config.METRICS_DIR, ARCHIVO_RETIRADOS)
+    with _bloqueo_retirados():
+        reclamado = ruta + '.retirando'
+        try:
+            os.rename(ruta, reclamado)
+        except OSError:
+            return
+        datos = _leer_archivo(reclamado)
+        if datos is not None:
+            histogramas, valores = {}, {}
+            for fuente in (_leer_archivo(ruta_retirados), datos):
+                if fuente is not None:
+                    _sumar(histogramas, valores, fuente, sin_gauges=True)
+            temporal = ruta_retirados + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as archivo:
+                json.dump({'histogramas': [[n, e, v] for (n, e), v in histogramas.items()],
+                           'valores': [[n, e, v] for (n, e), v in valores.items()]}, archivo)
+            os.replace(temporal, ruta_retirados)
+        os.remove(reclamado)
+
+
+def _leer_todos():
+    histogramas, valores = {}, {}
+    limite = time.time() - config.METRICS_TTL
+    try:
+        archivos = os.listdir(config.METRICS_DIR)
+    except FileNotFoundError:
+        # Ningún proceso ha podido guardar todavía (o se limpió el directorio temporal)
+        return histogramas, valores
+    for nombre_archivo in archivos:
+        if not nombre_archivo.endswith('.json') or nombre_archivo == ARCHIVO_RETIRADOS:
+            continue
+        ruta = os.path.join(config.METRICS_DIR, nombre_archivo)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                # Proceso que terminó hace tiempo (p. ej. worker reciclado)
+                _retirar(ruta)
+                continue
+        except OSError:
+            continue
+        datos = _leer_archivo(ruta)
+        if datos is not None:
+            _sumar(histogramas, valores, datos)
+    # Después de retirar: así lo recién retirado se cuenta en esta misma lectura
+    with _bloqueo_retirados():
+        retirados = _leer_archivo(os.path.join(config.METRICS_DIR, ARCHIVO_RETIRADOS))
+    if retirados is not None:
+        _sumar(histogramas, valores, retirados)
+    return histogramas, valores
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, extra=()):
+    partes = [f'{k}="{_escapar(v)}"' for k, v in tuple(etiquetas) + tuple(extra)]
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def texto_prometheus():
+    """
+    Métricas de todos los procesos en el formato de texto de Prometheus.
+    Conviene llamar antes a guardar() para incluir lo más reciente de este proceso.
+    """
+    histogramas, valores = _leer_todos()
+    lineas = []
+    for nombre, (tipo, ayuda, buckets) in DEFINICIONES.items():
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if tipo == 'histogram':
+            for (n, etiquetas), datos in sorted(histogramas.items()):
+                if n != nombre:
+                    continue
+                acumulado = 0
+                for limite, conteo in zip(buckets, datos):
+                    acumulado += conteo
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', limite)])} {acumulado}")
+                lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', '+Inf')])} {datos[-1]}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {datos[-2]}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {datos[-1]}")
+        else:
+            for (n, etiquetas), valor in sorted(valores.items()):
+                if n == nombre:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {valor}")
+    return '\n'.join(lineas) + '\n'
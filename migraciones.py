@@ -0,0 +1,295 @@
+import hashlib
+import os
+import re
+
+# ----------------- Migraciones del esquema ------------------
+#
+# database/kevzacursos.sql crea el esquema inicial. Los cambios posteriores
+# viven en database/migraciones como scripts numerados (NNNN_nombre.sql) y
+# se aplican en orden con `flask --app app migrar`. Cada migración aplicada
+# queda registrada en la tabla migraciones_aplicadas con la suma SHA-256 de
+# su contenido, así que un script ya aplicado no se vuelve a ejecutar.
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'migraciones')
+
+PATRON_ARCHIVO = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+TABLA_MIGRACIONES = """
+    CREATE TABLE IF NOT EXISTS migraciones_aplicadas (
+        version INT PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+PATRON_ALTER = re.compile(r'^\s*ALTER\s+TABLE\s+`?(\w+)`?', re.IGNORECASE)
+PATRON_UNICO = re.compile(r'ADD\s+UNIQUE\s+(?:INDEX|KEY)\s+`?(\w+)`?\s*\(([^)]*)\)', re.IGNORECASE)
+
+DUPLICADOS_MAX = 10     # Valores repetidos que se muestran por índice
+
+
+class DuplicadosExistentes(Exception):
+    """
+    Se lanza antes de aplicar una migración que agrega índices únicos sobre
+    columnas que ya tienen valores repetidos. El mensaje lista los valores
+    por índice para corregirlos a mano; no se ejecutó ninguna sentencia.
+    """
+
+
+class Migracion:
+    """
+    Un script de database/migraciones ya leído de disco.
+    """
+
+    def __init__(self, version, nombre, ruta):
+        self.version = version
+        self.nombre = nombre
+        self.ruta = ruta
+        with open(ruta, encoding='utf-8') as archivo:
+            self.texto = archivo.read()
+        self.checksum = hashlib.sha256(self.texto.encode('utf-8')).hexdigest()
+
+    def sentencias(self):
+        return dividir_sentencias(self.texto)
+
+    def indices_unicos(self):
+        """
+        [(tabla, índice, [columnas])] de los ALTER TABLE ... ADD UNIQUE INDEX de la migración.
+        """
+        indices = []
+        for sentencia in self.sentencias():
+            tabla = PATRON_ALTER.match(sentencia)
+            if tabla:
+                for indice, columnas in PATRON_UNICO.findall(sentencia):
+                    indices.append((tabla.group(1), indice,
+                                    [c.strip(' `') for c in columnas.split(',')]))
+        return indices
+
+
+def listar(directorio=DIRECTORIO):
+    """
+    Migraciones disponibles en orden de versión.
+    """
+    migraciones = []
+    for archivo in sorted(os.listdir(directorio)):
+        coincidencia = PATRON_ARCHIVO.match(archivo)
+        if coincidencia:
+            migraciones.append(Migracion(int(coincidencia.group(1)), coincidencia.group(2),
+                                         os.path.join(directorio, archivo)))
+    versiones = [m.version for m in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise ValueError('Hay dos migraciones con el mismo número de versión.')
+    return migraciones
+
+
+def dividir_sentencias(texto):
+    """
+    Separa un script SQL en sentencias por ';', sin cortar dentro de cadenas
+    ni de comentarios. Los comentarios se descartan.
+    """
+    sentencias = []
+    actual = []
+    i = 0
+    while i < len(texto):
+        c = texto[i]
+        if c in ('"', "'", '`'):
+            # Cadena o identificador entre comillas, con comillas escapadas
+            fin = i + 1
+            while fin < len(texto):
+                if texto[fin] == '\\' and c != '`':
+                    fin += 2
+                    continue
+                if texto[fin] == c:
+                    if texto[fin + 1:fin + 2] == c:
+                        fin += 2
+                        continue
+                    break
+                fin += 1
+            actual.append(texto[i:fin + 1])
+            i = fin + 1
+        elif texto.startswith('--', i) or c == '#':
+            fin = texto.find('\n', i)
+            i = len(texto) if fin == -1 else fin
+        elif texto.startswith('/*', i):
+            fin = texto.find('*/', i + 2)
+            i = len(texto) if fin == -1 else fin + 2
+            actual.append(' ')
+        elif c == ';':
+            sentencias.append(''.join(actual).strip())
+            actual = []
+            i += 1
+        else:
+            actual.append(c)
+            i += 1
+    sentencias.append(''.join(actual).strip())
+    return [s for s in sentencias if s]
+
+
+def aplicadas(conn):
+    """
+    {version: checksum} de las migraciones ya registradas.
+    """
+    cursor = conn.cursor()
+    cursor.execute(TABLA_MIGRACIONES)
+    cursor.execute("SELECT version, checksum FROM migraciones_aplicadas")
+    resultado = dict(cursor.fetchall())
+    cursor.close()
+    return resultado
+
+
+def pendientes(conn, directorio=DIRECTORIO):
+    """
+    Devuelve (pendientes, modificadas): las migraciones sin aplicar y las que
+    ya se aplicaron pero cuyo archivo cambió desde entonces.
+    """
+    registradas = aplicadas(conn)
+    faltan, modificadas = [], []
+    for migracion in listar(directorio):
+        if migracion.version not in registradas:
+            faltan.append(migracion)
+        elif registradas[migracion.version] != migracion.checksum:
+            modificadas.append(migracion)
+    return faltan, modificadas
+
+
+def _registrar(conn, migracion):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO migraciones_aplicadas (version, nombre, checksum) VALUES (%s, %s, %s)",
+                   (migracion.version, migracion.nombre, migracion.checksum))
+    conn.commit()
+    cursor.close()
+
+
+def buscar_duplicados(conn, tabla, columnas, limite=DUPLICADOS_MAX):
+    """
+    [(valores, veces)] de los valores de `columnas` que se repiten en `tabla`,
+    los más repetidos primero. Los NULL no cuentan: un índice único los admite.
+    """
+    lista = ', '.join(columnas)
+    no_nulos = ' AND '.join(f"{c} IS NOT NULL" for c in columnas)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT {lista}, COUNT(*) AS veces FROM {tabla}
+        WHERE {no_nulos}
+        GROUP BY {lista} HAVING COUNT(*) > 1
+        ORDER BY veces DESC LIMIT %s
+    """, (limite,))
+    duplicados = [(tuple(fila[:-1]), fila[-1]) for fila in cursor.fetchall()]
+    cursor.close()
+    return duplicados
+
+
+def revisar_duplicados(conn, migracion):
+    """
+    Lanza DuplicadosExistentes si alguno de los índices únicos que agrega la
+    migración no se podría crear por valores repetidos en los datos actuales.
+    """
+    problemas = []
+    for tabla, indice, columnas in migracion.indices_unicos():
+        duplicados = buscar_duplicados(conn, tabla, columnas)
+        if duplicados:
+            valores = '; '.join(f"{', '.join(map(repr, v))} ({veces} veces)" for v, veces in duplicados)
+            problemas.append(f"  {tabla}.{indice} ({', '.join(columnas)}): {valores}")
+    if problemas:
+        raise DuplicadosExistentes(
+            f"{migracion.version:04d}_{migracion.nombre} agrega índices únicos, pero hay valores repetidos "
+            f"(se muestran hasta {DUPLICADOS_MAX} por índice). Corrígelos y vuelve a migrar:\n"
+            + '\n'.join(problemas))
+
+
+def aplicar(conn, migracion):
+    """
+    Ejecuta una migración y la registra. MySQL confirma cada sentencia DDL por
+    separado, así que si una falla las anteriores ya quedaron aplicadas y la
+    migración no se registra: hay que corregir el problema y volver a correrla.
+    Antes de ejecutar nada revisa que los índices únicos que agrega se puedan
+    crear (ver revisar_duplicados).
+    """
+    revisar_duplicados(conn, migracion)
+    cursor = conn.cursor()
+    for sentencia in migracion.sentencias():
+        cursor.execute(sentencia)
+        if cursor.with_rows:
+            cursor.fetchall()
+    cursor.close()
+    _registrar(conn, migracion)
+
+
+def marcar_hasta(conn, version, directorio=DIRECTORIO):
+    """
+    Registra como aplicadas, sin ejecutarlas, las migraciones pendientes hasta
+    `version`. Sirve para bases creadas con una versión anterior de
+    kevzacursos.sql que ya incluía esos cambios.
+    """
+    faltan, _ = pendientes(conn, directorio)
+    marcadas = [m for m in faltan if m.version <= version]
+    for migracion in marcadas:
+        _registrar(conn, migracion)
+    return marcadas
+
+
+# ----------------- Reporte EXPLAIN de las consultas frecuentes ------------------
+
+# (descripción, consulta, parámetros de ejemplo) de las búsquedas que hacen las rutas
+CONSULTAS_FRECUENTES = [
+    ("registrar_participante: nombre duplicado",
+     "SELECT id_participante FROM participantes WHERE nombre = %s", ('Ana López',)),
+    ("registrar_participante: correo duplicado",
+     "SELECT id_participante FROM participantes WHERE correo = %s", ('ana@correo.com',)),
+    ("registrar_participante: teléfono duplicado",
+     "SELECT id_participante FROM participantes WHERE telefono = %s", ('5512345678',)),
+    ("login: participante por usuario",
+     "SELECT * FROM participantes WHERE usuario = %s", ('ana',)),
+    ("registrar_curso: nombre duplicado",
+     "SELECT id_curso FROM cursos WHERE nombre = %s", ('Python básico',)),
+    ("registrar_categoria: nombre duplicado",
+     "SELECT id_categoria FROM categorias WHERE nombre = %s", ('Tecnología',)),
+    ("inscribir: inscripción duplicada",
+     "SELECT id_inscripcion FROM inscripciones WHERE id_participante = %s AND id_curso = %s", (1, 1)),
+    ("buscar_participantes_api: prefijo del nombre",
+     "SELECT id_participante, nombre FROM participantes WHERE nombre LIKE %s "
+     "ORDER BY nombre, id_participante LIMIT 11", ('Ana%',)),
+    ("consultar_inscripciones: página por fecha",
+     "SELECT id_inscripcion FROM inscripciones ORDER BY fecha DESC, id_inscripcion DESC LIMIT 51", ()),
+]
+
+
+def explicar(conn):
+    """
+    Corre EXPLAIN sobre CONSULTAS_FRECUENTES y devuelve, por consulta, el tipo
+    de acceso, el índice elegido y las filas estimadas.
+    """
+    cursor = conn.cursor(dictionary=True)
+    reporte = []
+    for descripcion, sql, params in CONSULTAS_FRECUENTES:
+        cursor.execute("EXPLAIN " + sql, params)
+        plan = cursor.fetchall()[0]
+        reporte.append({
+            'consulta': descripcion,
+            'tipo': plan.get('type'),
+            'indice': plan.get('key'),
+            'filas': plan.get('rows'),
+        })
+    cursor.close()
+    return reporte
+
+
+def formatear_reporte(antes, despues=None):
+    """
+    Texto con el reporte de explicar(); si se pasa `despues`, lado a lado.
+    """
+    def celda(plan):
+        return f"{plan['tipo'] or '-'}/{plan['indice'] or '-'} ({plan['filas']} filas)"
+
+    ancho = max(len(plan['consulta']) for plan in antes)
+    lineas = []
+    if despues is None:
+        for plan in antes:
+            lineas.append(f"{plan['consulta']:<{ancho}}  {celda(plan)}")
+    else:
+        lineas.append(f"{'consulta':<{ancho}}  antes -> después")
+        for plan_antes, plan_despues in zip(antes, despues):
+            lineas.append(f"{plan_antes['consulta']:<{ancho}}  {celda(plan_antes)} -> {celda(plan_despues)}")
+    return '\n'.join(lineas)
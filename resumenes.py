@@ -0,0 +1,131 @@
+from versiones_tablas import marcar_cambio
+
+# ----------------- Tablas de resumen del dashboard ------------------
+#
+# El dashboard lee contadores ya calculados en lugar de agregar las tablas
+# completas en cada visita. Las rutas que crean, modifican o eliminan
+# registros llaman a estas funciones dentro de su misma transacción, y
+# reconstruir() recalcula todo desde cero (carga inicial o reparación).
+
+
+def mes_de(fecha):
+    """
+    'AAAA-MM' de una fecha (date o cadena 'AAAA-MM-DD'), o None si no hay fecha.
+    """
+    return str(fecha)[:7] if fecha else None
+
+
+def ajustar_total(conn, entidad, delta):
+    """
+    Suma `delta` al total de una entidad ('cursos', 'participantes', 'inscripciones').
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO resumen_totales (entidad, total) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE total = total + %s
+    """, (entidad, delta, delta))
+    cursor.close()
+
+
+def ajustar_inscripcion(conn, id_curso, fecha, delta):
+    """
+    Cuenta (delta=1) o descuenta (delta=-1) una inscripción en los resúmenes
+    por curso, por categoría del curso, por mes y en el total. Con delta > 1
+    cuenta de una vez varias inscripciones al mismo curso en la misma fecha.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO resumen_cursos (id_curso, inscritos) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE inscritos = inscritos + %s
+    """, (id_curso, delta, delta))
+    cursor.execute("""
+        INSERT INTO resumen_categorias (id_categoria, inscritos)
+        SELECT id_categoria, %s FROM cursos
+        WHERE id_curso = %s AND id_categoria IS NOT NULL
+        ON DUPLICATE KEY UPDATE inscritos = inscritos + %s
+    """, (delta, id_curso, delta))
+    mes = mes_de(fecha)
+    if mes:
+        cursor.execute("""
+            INSERT INTO resumen_mensual (mes, total) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE total = total + %s
+        """, (mes, delta, delta))
+    cursor.close()
+    ajustar_total(conn, 'inscripciones', delta)
+
+
+def cambiar_categoria_de_curso(conn, id_curso, id_categoria_nueva):
+    """
+    Mueve los inscritos de un curso de su categoría actual a la nueva.
+    Debe llamarse antes de actualizar cursos.id_categoria.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.id_categoria, COALESCE(r.inscritos, 0)
+        FROM cursos c
+        LEFT JOIN resumen_cursos r ON r.id_curso = c.id_curso
+        WHERE c.id_curso = %s
+        FOR UPDATE
+    """, (id_curso,))
+    fila = cursor.fetchone()
+    if fila and fila[0] != id_categoria_nueva and fila[1]:
+        id_categoria_anterior, inscritos = fila
+        if id_categoria_anterior is not None:
+            cursor.execute("UPDATE resumen_categorias SET inscritos = inscritos - %s WHERE id_categoria = %s",
+                           (inscritos, id_categoria_anterior))
+        cursor.execute("""
+            INSERT INTO resumen_categorias (id_categoria, inscritos) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE inscritos = inscritos + %s
+        """, (id_categoria_nueva, inscritos, inscritos))
+    cursor.close()
+
+
+def quitar_curso(conn, id_curso):
+    """
+    Elimina el renglón de resumen de un curso borrado y lo descuenta del total.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM resumen_cursos WHERE id_curso = %s", (id_curso,))
+    cursor.close()
+    ajustar_total(conn, 'cursos', -1)
+
+
+def reconstruir(conn):
+    """
+    Recalcula todas las tablas de resumen a partir de los datos actuales
+    en una sola transacción. Marca el cambio de las tablas de origen para
+    que los widgets del dashboard guardados en caché se vuelvan a generar.
+    """
+    cursor = conn.cursor()
+    for tabla in ('resumen_totales', 'resumen_cursos', 'resumen_categorias', 'resumen_mensual'):
+        cursor.execute(f"DELETE FROM {tabla}")
+
+    cursor.execute("""
+        INSERT INTO resumen_totales (entidad, total)
+        SELECT 'cursos', COUNT(*) FROM cursos
+        UNION ALL SELECT 'participantes', COUNT(*) FROM participantes
+        UNION ALL SELECT 'inscripciones', COUNT(*) FROM inscripciones
+    """)
+    cursor.execute("""
+        INSERT INTO resumen_cursos (id_curso, inscritos)
+        SELECT id_curso, COUNT(*) FROM inscripciones
+        WHERE id_curso IS NOT NULL
+        GROUP BY id_curso
+    """)
+    cursor.execute("""
+        INSERT INTO resumen_categorias (id_categoria, inscritos)
+        SELECT c.id_categoria, COUNT(*)
+        FROM inscripciones i
+        JOIN cursos c ON i.id_curso = c.id_curso
+        WHERE c.id_categoria IS NOT NULL
+        GROUP BY c.id_categoria
+    """)
+    cursor.execute("""
+        INSERT INTO resumen_mensual (mes, total)
+        SELECT DATE_FORMAT(fecha, '%Y-%m') AS mes, COUNT(*) FROM inscripciones
+        WHERE fecha IS NOT NULL
+        GROUP BY mes
+    """)
+    marcar_cambio(conn, 'cursos', 'participantes', 'inscripciones', 'categorias')
+    conn.commit()
+    cursor.close()
@@ -0,0 +1,310 @@
+import bisect
+import itertools
+import random
+import unicodedata
+from datetime import date, timedelta
+
+import contrasenas
+import resumenes
+from versiones_tablas import marcar_cambio
+
+# ----------------- Datos sintéticos a escala ------------------
+#
+# Llena categorias, cursos, participantes e inscripciones con datos
+# sintéticos para reproducir localmente problemas de volumen (ver
+# `flask --app app sembrar` y benchmark.py). Con la misma semilla, la misma
+# escala y la misma base de partida se generan exactamente los mismos datos.
+#
+# Los datos imitan los reales:
+#
+# - la popularidad de los cursos sigue una ley de Zipf: pocos cursos
+#   concentran la mayoría de las inscripciones;
+# - los registros crecen con el tiempo y tienen picos al inicio de cada
+#   semestre (enero-febrero y agosto-septiembre); la mayoría se inscribe
+#   en las semanas siguientes a su registro;
+# - edad, género y ocupación siguen distribuciones fijas (ver abajo).
+#
+# Los registros se agregan después de los que ya existan, con ids
+# explícitos, y se cargan por lotes con executemany (el conector los envía
+# como un INSERT de varias filas) con foreign_key_checks apagado en la
+# sesión: las referencias ya se generan válidas. Los índices únicos siguen
+# activos, así que un choque con datos previos falla en lugar de duplicar.
+
+# Registros por unidad de escala (escala 10 = 1 millón de participantes y 5 millones de inscripciones)
+POR_ESCALA = {
+    'categorias': 4,
+    'cursos': 60,
+    'participantes': 100_000,
+    'inscripciones': 500_000,
+}
+
+FECHA_FINAL = date(2025, 12, 31)   # último día con datos (fijo para que la semilla reproduzca lo mismo)
+ANIOS = 3                          # años de historia antes de FECHA_FINAL
+ZIPF_EXPONENTE = 1.1               # más alto = cursos populares más dominantes
+
+NOMBRES = ('Ana', 'Luis', 'María', 'José', 'Carmen', 'Juan', 'Laura', 'Carlos', 'Sofía', 'Miguel',
+           'Lucía', 'Jorge', 'Elena', 'Pedro', 'Valeria', 'Diego', 'Paula', 'Andrés', 'Fernanda', 'Raúl',
+           'Daniela', 'Alejandro', 'Gabriela', 'Ricardo', 'Mariana', 'Fernando', 'Isabel', 'Héctor',
+           'Regina', 'Emilio', 'Ximena', 'Arturo', 'Renata', 'Óscar', 'Camila', 'Sergio')
+APELLIDOS = ('García', 'Hernández', 'López', 'Martínez', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+             'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Jiménez', 'Reyes', 'Díaz', 'Torres',
+             'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Castillo', 'Romero', 'Álvarez', 'Chávez',
+             'Rivera', 'Juárez', 'Domínguez')
+DOMINIOS = (('gmail.com', 55), ('hotmail.com', 25), ('outlook.com', 10), ('yahoo.com', 5), ('uni.edu.mx', 5))
+CALLES = ('Av. Reforma', 'Calle Hidalgo', 'Av. Juárez', 'Calle Morelos', 'Av. Insurgentes', 'Calle Allende',
+          'Calle Zaragoza', 'Av. Universidad', 'Calle Guerrero', 'Av. Revolución')
+GENEROS = (('Femenino', 49), ('Masculino', 49), ('Otro', 2))
+OCUPACIONES = (('Estudiante', 45), ('Desarrollador', 14), ('Docente', 9), ('Ingeniero', 9),
+               ('Administrador', 7), ('Técnico', 6), ('Diseñador', 5), ('Desempleado', 5))
+# Peso de cada mes del año en los registros (picos al inicio de semestre)
+MESES = (14, 11, 7, 6, 5, 4, 5, 13, 12, 8, 8, 7)
+
+AREAS = ('Programación', 'Bases de Datos', 'Redes', 'Ciencia de Datos', 'Seguridad Informática',
+         'Diseño Gráfico', 'Electrónica', 'Idiomas', 'Administración', 'Matemáticas', 'Nube',
+         'Desarrollo Web', 'Inteligencia Artificial', 'Ofimática')
+TEMAS = ('Python', 'Java', 'SQL', 'JavaScript', 'Linux', 'Excel', 'Redes Cisco', 'Machine Learning',
+         'Docker', 'React', 'C++', 'Estadística', 'Inglés', 'Photoshop', 'Arduino', 'Power BI', 'Kotlin',
+         'Ciberseguridad', 'Cálculo', 'AWS', 'Git', 'Flask', 'Django', 'Álgebra Lineal')
+NIVELES = ('Básico', 'Intermedio', 'Avanzado', 'Taller', 'Certificación')
+DURACIONES = ((10, 20), (20, 35), (40, 25), (60, 15), (120, 5))
+
+
+def escalar(escala, **cantidades):
+    """
+    Registros por tabla para `escala`; las cantidades que se pasen (no None) reemplazan a las calculadas.
+    """
+    resultado = {tabla: max(1, round(por * escala)) for tabla, por in POR_ESCALA.items()}
+    resultado.update({tabla: n for tabla, n in cantidades.items() if n is not None})
+    return resultado
+
+
+class _Eleccion:
+    """
+    Elección al azar con pesos fijos, precalculando los pesos acumulados.
+    """
+
+    def __init__(self, opciones):
+        self.valores = [valor for valor, _ in opciones]
+        self.acumulados = list(itertools.accumulate(peso for _, peso in opciones))
+
+    def __call__(self, azar):
+        return self.valores[bisect.bisect_right(self.acumulados, azar.random() * self.acumulados[-1])]
+
+
+def _ascii(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower()
+
+
+def _unicos(base, vistos):
+    # Agrega un número solo a partir de la segunda vez que sale el mismo texto
+    vistos[base] = vistos.get(base, 0) + 1
+    return base if vistos[base] == 1 else f"{base} {vistos[base]}"
+
+
+def _nombres_existentes(cursor, tabla):
+    """
+    {texto base: veces usado} de los nombres que ya hay en `tabla`, para que
+    _unicos() no repita un nombre de una carga anterior ('Python Básico 3'
+    cuenta como tercer uso de 'Python Básico').
+    """
+    vistos = {}
+    cursor.execute(f"SELECT nombre FROM {tabla}")
+    for (nombre,) in cursor:
+        base, _, numero = nombre.rpartition(' ')
+        if base and numero.isdigit():
+            vistos[base] = max(vistos.get(base, 0), int(numero))
+        else:
+            vistos[nombre] = max(vistos.get(nombre, 0), 1)
+    return vistos
+
+
+def _siguiente_id(cursor, tabla, columna):
+    cursor.execute(f"SELECT COALESCE(MAX({columna}), 0) FROM {tabla}")
+    return cursor.fetchone()[0] + 1
+
+
+def _insertar(conn, cursor, sql, filas, tamano_lote):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            cursor.executemany(sql, lote)
+            conn.commit()
+            lote = []
+    if lote:
+        cursor.executemany(sql, lote)
+        conn.commit()
+
+
+def _fechas_de_registro(hasta, anios):
+    """
+    Elección de fecha de registro: peso por día según el mes del año y una
+    tendencia creciente (el final del periodo pesa el doble que el inicio).
+    """
+    desde = hasta.replace(year=hasta.year - anios) + timedelta(days=1)
+    dias = (hasta - desde).days + 1
+    opciones = []
+    for i in range(dias):
+        dia = desde + timedelta(days=i)
+        opciones.append((dia, MESES[dia.month - 1] * (1 + i / dias)))
+    return _Eleccion(opciones)
+
+
+def _inscripciones_por_participante(azar, participantes, inscripciones, maximo):
+    """
+    Cuántos cursos toma cada participante: una distribución geométrica
+    (muchos toman uno o dos, pocos toman muchos) ajustada para que la suma
+    sea exactamente `inscripciones`.
+    """
+    if not participantes:
+        return []
+    media = inscripciones / participantes
+    p = 1 / (media + 1) if media else 1
+    cuentas = []
+    for _ in range(participantes):
+        n = 0
+        while azar.random() > p and n < maximo:
+            n += 1
+        cuentas.append(n)
+    diferencia = inscripciones - sum(cuentas)
+    paso = 1 if diferencia > 0 else -1
+    while diferencia:
+        i = azar.randrange(participantes)
+        if 0 <= cuentas[i] + paso <= maximo:
+            cuentas[i] += paso
+            diferencia -= paso
+    return cuentas
+
+
+def sembrar(conn, categorias, cursos, participantes, inscripciones, semilla=42,
+            hasta=FECHA_FINAL, anios=ANIOS, tamano_lote=5000, avance=None):
+    """
+    Agrega los registros pedidos de cada tabla y reconstruye los resúmenes
+    del dashboard. `avance`, si se pasa, recibe un mensaje por tabla terminada.
+    """
+    if inscripciones > participantes * cursos:
+        raise ValueError('Hay más inscripciones que combinaciones de participante y curso.')
+    azar = random.Random(semilla)
+    avisar = avance or (lambda mensaje: None)
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+
+    # Categorías: un área por categoría; si faltan áreas se numeran
+    primera_categoria = _siguiente_id(cursor, 'categorias', 'id_categoria')
+    vistos = _nombres_existentes(cursor, 'categorias')
+    _insertar(conn, cursor,
+              "INSERT INTO categorias (id_categoria, nombre, descripcion) VALUES (%s, %s, %s)",
+              ((primera_categoria + i, _unicos(AREAS[i % len(AREAS)], vistos),
+                f"Cursos del área de {AREAS[i % len(AREAS)].lower()}.")
+               for i in range(categorias)),
+              tamano_lote)
+    avisar(f"{categorias} categorías")
+
+    # Cursos: tema + nivel; las categorías también tienen tamaños desiguales
+    primer_curso = _siguiente_id(cursor, 'cursos', 'id_curso')
+    elegir_categoria = _Eleccion([(primera_categoria + i, 1 / (i + 1)) for i in range(categorias)])
+    elegir_duracion = _Eleccion(DURACIONES)
+    vistos = _nombres_existentes(cursor, 'cursos')
+
+    def filas_cursos():
+        for i in range(cursos):
+            tema, nivel = azar.choice(TEMAS), azar.choice(NIVELES)
+            yield (primer_curso + i, _unicos(f"{tema} {nivel}", vistos),
+                   f"Curso de {tema} nivel {nivel.lower()}.", elegir_duracion(azar), elegir_categoria(azar))
+
+    _insertar(conn, cursor,
+              "INSERT INTO cursos (id_curso, nombre, descripcion, duracion, id_categoria) VALUES (%s, %s, %s, %s, %s)",
+              filas_cursos(), tamano_lote)
+    avisar(f"{cursos} cursos")
+
+    # Participantes
+    primer_participante = _siguiente_id(cursor, 'participantes', 'id_participante')
+    elegir_genero = _Eleccion(GENEROS)
+    elegir_ocupacion = _Eleccion(OCUPACIONES)
+    elegir_dominio = _Eleccion(DOMINIOS)
+    elegir_registro = _fechas_de_registro(hasta, anios)
+    registros = []        # fecha de registro de cada participante, para sus inscripciones
+    vistos = _nombres_existentes(cursor, 'participantes')
+
+    def filas_participantes():
+        for i in range(participantes):
+            id_participante = primer_participante + i
+            nombre, apellido = azar.choice(NOMBRES), azar.choice(APELLIDOS)
+            completo = _unicos(f"{nombre} {apellido} {azar.choice(APELLIDOS)}", vistos)
+            ocupacion = elegir_ocupacion(azar)
+            edad = azar.gauss(21, 3) if ocupacion == 'Estudiante' else azar.gauss(34, 9)
+            registro = elegir_registro(azar)
+            registros.append(registro)
+            yield (id_participante, completo,
+                   f"{_ascii(nombre)}.{_ascii(apellido)}{id_participante}@{elegir_dominio(azar)}",
+                   # 7919 es primo con 10**8: teléfonos distintos para ids distintos
+                   f"55{(id_participante * 7919) % 10 ** 8:08d}",
+                   f"{azar.choice(CALLES)} {azar.randrange(1, 3000)}",
+                   min(max(round(edad), 16), 80), elegir_genero(azar), ocupacion, registro)
+
+    _insertar(conn, cursor, """
+        INSERT INTO participantes (id_participante, nombre, correo, telefono, direccion, edad, genero,
+                                   ocupacion, fecha_registro)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, filas_participantes(), tamano_lote)
+    avisar(f"{participantes} participantes")
+
+    # Inscripciones: cursos elegidos por popularidad (Zipf), sin repetir
+    # curso por participante, en los días siguientes al registro
+    popularidad = list(range(cursos))
+    azar.shuffle(popularidad)
+    elegir_curso = _Eleccion([(primer_curso + indice, 1 / (rango + 1) ** ZIPF_EXPONENTE)
+                              for rango, indice in enumerate(popularidad)])
+    cuentas = _inscripciones_por_participante(azar, participantes, inscripciones, cursos)
+
+    def filas_inscripciones():
+        for i, cuantos in enumerate(cuentas):
+            elegidos = set()
+            while len(elegidos) < cuantos:
+                if len(elegidos) > cursos // 2:
+                    # Casi todos los cursos: completar sin pesos para no girar en vacío
+                    elegidos.add(primer_curso + azar.randrange(cursos))
+                else:
+                    elegidos.add(elegir_curso(azar))
+            registro = registros[i]
+            for id_curso in sorted(elegidos):
+                dias = int(azar.expovariate(1 / 20))
+                if registro + timedelta(days=dias) > hasta:
+                    dias = azar.randrange((hasta - registro).days + 1)
+                fecha = registro + timedelta(days=dias)
+                yield (id_curso, primer_participante + i, fecha)
+
+    _insertar(conn, cursor,
+              "INSERT INTO inscripciones (id_curso, id_participante, fecha) VALUES (%s, %s, %s)",
+              filas_inscripciones(), tamano_lote)
+    avisar(f"{inscripciones} inscripciones")
+
+    cursor.execute("SET SESSION foreign_key_checks = 1")
+    marcar_cambio(conn, 'categorias', 'cursos', 'participantes', 'inscripciones')
+    conn.commit()
+    cursor.close()
+    resumenes.reconstruir(conn)
+    avisar("resúmenes del dashboard reconstruidos")
+
+
+def crear_usuario(conn, usuario, password):
+    """
+    Crea (o actualiza la contraseña de) un participante con acceso, para
+    que el benchmark pueda iniciar sesión.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id_participante FROM participantes WHERE usuario = %s", (usuario,))
+    fila = cursor.fetchone()
+    password_hash = contrasenas.generar(password)
+    if fila:
+        cursor.execute("UPDATE participantes SET password = %s WHERE id_participante = %s",
+                       (password_hash, fila[0]))
+    else:
+        cursor.execute("""
+            INSERT INTO participantes (nombre, correo, telefono, usuario, password, fecha_registro)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (f"Usuario {usuario}", f"{usuario}@benchmark.local", None, usuario, password_hash, date.today()))
+        resumenes.ajustar_total(conn, 'participantes', 1)
+        marcar_cambio(conn, 'participantes')
+    conn.commit()
+    cursor.close()
@@ -0,0 +1,253 @@
+import calendar
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='kevza_metricas_'))
+
+import mysql.connector  # noqa: E402
+from mysql.connector import errorcode  # noqa: E402
+
+import app as aplicacion  # noqa: E402
+import cache_paginas  # noqa: E402
+import config  # noqa: E402
+import db  # noqa: E402
+
+# ----------------- Base de datos de prueba ------------------
+#
+# SQLite en memoria con la forma mínima de la API de mysql.connector que usan
+# db.py y las rutas: cursores con dictionary/prepared, ping y unread_result.
+# El esquema reproduce el de MySQL con las migraciones aplicadas (índices
+# únicos con el mismo nombre, llaves foráneas y largos de columna como CHECK)
+# y los errores se traducen a los de mysql.connector con el mismo errno.
+# Solo sirve para consultas que SQLite entiende igual que MySQL, más las
+# pocas traducciones de _traducir().
+
+ESQUEMA = """
+CREATE TABLE categorias (
+    id_categoria INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL CHECK (length(nombre) <= 50),
+    descripcion TEXT
+);
+CREATE UNIQUE INDEX uq_categorias_nombre ON categorias (nombre);
+
+CREATE TABLE cursos (
+    id_curso INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL CHECK (length(nombre) <= 100),
+    descripcion TEXT,
+    duracion INTEGER,
+    id_categoria INTEGER REFERENCES categorias (id_categoria)
+);
+CREATE UNIQUE INDEX uq_cursos_nombre ON cursos (nombre);
+
+CREATE TABLE participantes (
+    id_participante INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL CHECK (length(nombre) <= 100),
+    correo TEXT NOT NULL CHECK (length(correo) <= 100),
+    telefono TEXT CHECK (length(telefono) <= 15),
+    direccion TEXT CHECK (length(direccion) <= 255),
+    edad INTEGER,
+    genero TEXT CHECK (length(genero) <= 10),
+    ocupacion TEXT CHECK (length(ocupacion) <= 100),
+    fecha_registro TEXT,
+    usuario TEXT CHECK (length(usuario) <= 50),
+    password TEXT,
+    telefono_normalizado TEXT
+);
+CREATE UNIQUE INDEX usuario ON participantes (usuario);
+CREATE UNIQUE INDEX uq_participantes_nombre ON participantes (nombre);
+CREATE UNIQUE INDEX uq_participantes_correo ON participantes (correo);
+CREATE UNIQUE INDEX uq_participantes_telefono ON participantes (telefono);
+
+CREATE TABLE inscripciones (
+    id_inscripcion INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_curso INTEGER REFERENCES cursos (id_curso),
+    id_participante INTEGER REFERENCES participantes (id_participante),
+    fecha TEXT
+);
+CREATE UNIQUE INDEX uq_inscripciones_participante_curso ON inscripciones (id_participante, id_curso);
+
+CREATE TABLE versiones_tablas (
+    tabla TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    actualizada_en TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TRIGGER versiones_tablas_actualizada AFTER UPDATE OF version ON versiones_tablas
+BEGIN
+    UPDATE versiones_tablas SET actualizada_en = CURRENT_TIMESTAMP WHERE tabla = NEW.tabla;
+END;
+INSERT INTO versiones_tablas (tabla) VALUES ('categorias'), ('cursos'), ('participantes'), ('inscripciones');
+
+CREATE TABLE resumen_totales (entidad TEXT PRIMARY KEY, total INTEGER NOT NULL DEFAULT 0);
+INSERT INTO resumen_totales VALUES ('participantes', 0), ('cursos', 0), ('inscripciones', 0);
+CREATE TABLE resumen_cursos (id_curso INTEGER PRIMARY KEY, inscritos INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE resumen_categorias (id_categoria INTEGER PRIMARY KEY, inscritos INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE resumen_mensual (mes TEXT PRIMARY KEY, total INTEGER NOT NULL DEFAULT 0);
+"""
+
+_TRADUCCIONES = [
+    (re.compile(r'ON DUPLICATE KEY UPDATE'), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'VALUES\((\w+)\)'), r'excluded.\1'),
+    (re.compile(r'INSERT IGNORE'), 'INSERT OR IGNORE'),
+    (re.compile(r'\bFOR UPDATE\b'), ''),
+    # IF y LEFT son palabras reservadas en SQLite
+    (re.compile(r'\bIF\('), 'IIF('),
+    (re.compile(r'\bLEFT\('), 'SUBSTR_IZQ('),
+    (re.compile(r'%s'), '?'),
+]
+
+
+def _traducir(sql):
+    for patron, reemplazo in _TRADUCCIONES:
+        sql = patron.sub(reemplazo, sql)
+    return sql
+
+
+def _unix_timestamp(momento):
+    if momento is None:
+        return None
+    return calendar.timegm(time.strptime(momento[:19], '%Y-%m-%d %H:%M:%S'))
+
+
+def _date_format(fecha, formato):
+    return datetime.strptime(str(fecha)[:10], '%Y-%m-%d').strftime(formato) if fecha else None
+
+
+class CursorSqlite:
+    def __init__(self, conexion, dictionary):
+        self._conexion = conexion
+        self._cursor = conexion._conexion.cursor()
+        self._dictionary = dictionary
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def _ejecutar(self, metodo, sql, datos):
+        try:
+            metodo(_traducir(sql), datos)
+        except sqlite3.IntegrityError as error:
+            raise self._conexion.traducir_error(error) from error
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+    def execute(self, sql, params=()):
+        self._ejecutar(self._cursor.execute, sql, tuple(params or ()))
+
+    def executemany(self, sql, datos):
+        self._ejecutar(self._cursor.executemany, sql, [tuple(fila) for fila in datos])
+
+    def _fila(self, fila):
+        if fila is None or not self._dictionary:
+            return fila
+        return {columna[0]: valor for columna, valor in zip(self._cursor.description, fila)}
+
+    def fetchone(self):
+        return self._fila(self._cursor.fetchone())
+
+    def fetchmany(self, cantidad=1):
+        return [self._fila(fila) for fila in self._cursor.fetchmany(cantidad)]
+
+    def fetchall(self):
+        return [self._fila(fila) for fila in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    def close(self):
+        pass
+
+
+class ConexionSqlite:
+    unread_result = False
+
+    def __init__(self):
+        self._conexion = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conexion.execute('PRAGMA foreign_keys = ON')
+        for nombre, argumentos, funcion in (
+                ('UNIX_TIMESTAMP', 1, _unix_timestamp),
+                ('DATE_FORMAT', 2, _date_format),
+                ('SUBSTR_IZQ', 2, lambda texto, largo: None if texto is None else texto[:largo]),
+                ('CHAR_LENGTH', 1, lambda texto: None if texto is None else len(texto)),
+                ('CONCAT', -1, lambda *partes: None if None in partes else ''.join(map(str, partes)))):
+            self._conexion.create_function(nombre, argumentos, funcion)
+        self._conexion.executescript(ESQUEMA)
+
+    def traducir_error(self, error):
+        """
+        El error de mysql.connector equivalente a un IntegrityError de SQLite.
+        """
+        mensaje = str(error)
+        if mensaje.startswith('UNIQUE constraint failed: '):
+            columnas = [c.split('.') for c in mensaje.split(': ', 1)[1].split(', ')]
+            tabla = columnas[0][0]
+            for (_, indice, unico, *_) in self._conexion.execute(f'PRAGMA index_list({tabla})'):
+                info = self._conexion.execute(f'PRAGMA index_info({indice})').fetchall()
+                if unico and [fila[2] for fila in info] == [c[1] for c in columnas]:
+                    return mysql.connector.IntegrityError(
+                        msg=f"Duplicate entry for key '{tabla}.{indice}'", errno=errorcode.ER_DUP_ENTRY)
+        if mensaje.startswith('FOREIGN KEY constraint failed'):
+            return mysql.connector.IntegrityError(msg=mensaje, errno=errorcode.ER_NO_REFERENCED_ROW_2)
+        if mensaje.startswith('CHECK constraint failed'):
+            return mysql.connector.DataError(msg=f"Data too long ({mensaje})", errno=errorcode.ER_DATA_TOO_LONG)
+        return mysql.connector.IntegrityError(msg=mensaje, errno=errorcode.ER_BAD_NULL_ERROR)
+
+    def cursor(self, dictionary=False, **kwargs):
+        return CursorSqlite(self, dictionary)
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def ping(self, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+    def consultar(self, sql, params=()):
+        """
+        Atajo para las pruebas: filas (como tuplas) de una consulta.
+        """
+        return self._conexion.execute(_traducir(sql), params).fetchall()
+
+
+@pytest.fixture
+def conexion():
+    return ConexionSqlite()
+
+
+@pytest.fixture
+def cliente(conexion, monkeypatch):
+    """
+    Cliente de pruebas de la aplicación cuyo pool entrega siempre `conexion`.
+    """
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **parametros: conexion)
+    monkeypatch.setattr(db, '_pools', {})
+    monkeypatch.setattr(db, '_pools_pid', None)
+    monkeypatch.setattr(config, 'DB_REPLICAS', [])
+    monkeypatch.setattr(cache_paginas, 'cache', cache_paginas.CachePaginas(config.PAGE_CACHE_MAX))
+    monkeypatch.setitem(aplicacion.app.config, 'TESTING', True)
+    monkeypatch.setattr(aplicacion.app, 'secret_key', 'clave-de-pruebas')
+    return aplicacion.app.test_client()
+
+
+@pytest.fixture
+def sesion(cliente):
+    """
+    Cliente con un usuario en sesión, para las rutas que lo piden.
+    """
+    with cliente.session_transaction() as datos:
+        datos['usuario'] = 'admin'
+    return cliente
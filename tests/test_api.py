@@ -0,0 +1,69 @@
+import pytest
+
+from versiones_tablas import marcar_cambio
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.executemany("INSERT INTO categorias (nombre, descripcion) VALUES (%s, %s)",
+                       [('Tecnología', 'a'), ('Idiomas', 'b'), ('Arte', 'c')])
+    cursor.execute("INSERT INTO participantes (nombre, correo, direccion, usuario) VALUES (%s, %s, %s, %s)",
+                   ('Ana', 'ana@x.mx', 'Calle 1', 'ana'))
+    conexion.commit()
+    return conexion
+
+
+def test_listado_con_etag_y_last_modified(cliente, datos):
+    respuesta = cliente.get('/api/categorias')
+    assert respuesta.status_code == 200
+    assert [c['nombre'] for c in respuesta.get_json()['datos']] == ['Tecnología', 'Idiomas', 'Arte']
+    assert respuesta.headers['ETag']
+    assert respuesta.headers['Last-Modified']
+    assert 'no-cache' in respuesta.headers['Cache-Control']
+
+
+def test_if_none_match_responde_304_hasta_que_cambia_la_tabla(cliente, datos):
+    etag = cliente.get('/api/categorias').headers['ETag']
+    respuesta = cliente.get('/api/categorias', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 304
+    assert respuesta.data == b''
+    assert respuesta.headers['ETag'] == etag
+
+    marcar_cambio(datos, 'categorias')
+    datos.commit()
+    respuesta = cliente.get('/api/categorias', headers={'If-None-Match': etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers['ETag'] != etag
+
+
+def test_if_modified_since(cliente, datos):
+    ultima = cliente.get('/api/categorias').headers['Last-Modified']
+    assert cliente.get('/api/categorias', headers={'If-Modified-Since': ultima}).status_code == 304
+    anterior = 'Mon, 01 Jan 2001 00:00:00 GMT'
+    assert cliente.get('/api/categorias', headers={'If-Modified-Since': anterior}).status_code == 200
+
+
+def test_el_etag_depende_de_la_url(cliente, datos):
+    completo = cliente.get('/api/categorias').headers['ETag']
+    respuesta = cliente.get('/api/categorias?campos=nombre', headers={'If-None-Match': completo})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['datos'][0] == {'id_categoria': 1, 'nombre': 'Tecnología'}
+
+
+def test_paginas_por_cursor(cliente, datos):
+    primera = cliente.get('/api/categorias?por_pagina=2').get_json()
+    assert [c['id_categoria'] for c in primera['datos']] == [1, 2]
+    assert 'por_pagina=2' in primera['siguiente']
+    segunda = cliente.get(primera['siguiente']).get_json()
+    assert [c['id_categoria'] for c in segunda['datos']] == [3]
+    assert segunda['siguiente'] is None
+
+
+def test_campos_no_publicos_o_desconocidos(cliente, datos):
+    participante = cliente.get('/api/participantes').get_json()['datos'][0]
+    assert 'direccion' not in participante and 'usuario' not in participante
+    respuesta = cliente.get('/api/participantes?campos=nombre,password')
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['error'] == 'Campos desconocidos: password'
+    assert cliente.get('/api/otra_cosa').status_code == 404
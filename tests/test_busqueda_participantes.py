@@ -0,0 +1,42 @@
+import app as aplicacion
+
+
+def buscar(busqueda, desde='', hasta=''):
+    return aplicacion.construir_busqueda_participantes(busqueda, desde, hasta)
+
+
+def test_texto_usa_el_indice_fulltext_y_ordena_por_relevancia():
+    condiciones, params, relevancia, params_relevancia = buscar('  Ana López ')
+    assert condiciones == ["MATCH(nombre, correo) AGAINST (%s IN BOOLEAN MODE)"]
+    assert params == ['+"Ana" +"López"']
+    assert relevancia == condiciones[0]
+    assert params_relevancia == ('+"Ana" +"López"',)
+
+
+def test_texto_sin_operadores_booleanos():
+    _, params, _, _ = buscar('ana* -perez "x')
+    assert params == ['+"ana" +"perez"']
+
+
+def test_palabras_cortas_buscan_por_prefijo_del_nombre():
+    condiciones, params, relevancia, _ = buscar('a%_')
+    assert condiciones == ["nombre LIKE %s"]
+    assert params == ['a%']
+    assert relevancia is None
+
+
+def test_telefono_por_prefijo_normalizado():
+    condiciones, params, relevancia, _ = buscar('(55) 12-34')
+    assert condiciones == ["telefono_normalizado LIKE %s"]
+    assert params == ['551234%']
+    assert relevancia is None
+
+
+def test_fecha_exacta_y_rango():
+    condiciones, params, _, _ = buscar('2024-03-01', desde='2024-01-01', hasta='2024-12-31')
+    assert condiciones == ["fecha_registro = %s", "fecha_registro >= %s", "fecha_registro <= %s"]
+    assert params == ['2024-03-01', '2024-01-01', '2024-12-31']
+
+
+def test_sin_busqueda_no_filtra():
+    assert buscar('') == ([], [], None, ())
@@ -0,0 +1,66 @@
+import pytest
+
+import cache_paginas
+import config
+from versiones_tablas import marcar_cambio
+
+
+@pytest.fixture
+def datos(conexion):
+    conexion.cursor().execute("INSERT INTO categorias (nombre, descripcion) VALUES (%s, %s)", ('Tecnología', 'a'))
+    conexion.commit()
+    return conexion
+
+
+def test_una_pagina_vale_mientras_no_cambien_sus_tablas():
+    cache = cache_paginas.CachePaginas(10)
+    cache.registrar_cambio({'cursos': 1, 'categorias': 1})
+    cache.guardar('a', {'cursos': 1}, b'html', 'text/html')
+    assert cache.obtener('a', ('cursos',)) == (b'html', 'text/html')
+    cache.registrar_cambio({'categorias': 2})
+    assert cache.obtener('a', ('cursos',)) == (b'html', 'text/html')
+    cache.registrar_cambio({'cursos': 2})
+    assert cache.obtener('a', ('cursos',)) is None
+    assert cache.contadores == {'aciertos': 2, 'fallos': 1}
+
+
+def test_las_versiones_nunca_retroceden():
+    cache = cache_paginas.CachePaginas(10)
+    cache.registrar_cambio({'cursos': 5})
+    cache.registrar_cambio({'cursos': 3})
+    assert cache.versiones_actuales(('cursos',)) == {'cursos': 5}
+
+
+def test_se_descartan_las_menos_usadas():
+    cache = cache_paginas.CachePaginas(2)
+    for clave in 'abc':
+        cache.guardar(clave, {}, clave.encode(), 'text/html')
+        cache.obtener('a', ())
+    assert cache.obtener('b', ()) is None
+    assert cache.obtener('a', ()) and cache.obtener('c', ())
+
+
+def test_la_ruta_se_sirve_del_cache_hasta_que_se_escribe(sesion, datos):
+    assert sesion.get('/consultar_categorias').headers['X-Cache'] == 'MISS'
+    respuesta = sesion.get('/consultar_categorias')
+    assert respuesta.headers['X-Cache'] == 'HIT'
+    assert 'Tecnología' in respuesta.get_data(as_text=True)
+
+    # Los parámetros forman parte de la clave
+    assert sesion.get('/consultar_categorias?orden=nombre_desc').headers['X-Cache'] == 'MISS'
+
+    sesion.post('/registrar_categoria', data={'nombre': 'Idiomas', 'descripcion': ''})
+    respuesta = sesion.get('/consultar_categorias')
+    assert respuesta.headers['X-Cache'] == 'MISS'
+    assert 'Idiomas' in respuesta.get_data(as_text=True)
+
+
+def test_los_cambios_de_otro_proceso_se_ven_al_revisar(sesion, datos, monkeypatch):
+    monkeypatch.setattr(config, 'PAGE_CACHE_REVISION', 0)
+    sesion.get('/consultar_categorias')
+    assert sesion.get('/consultar_categorias').headers['X-Cache'] == 'HIT'
+    # Otro worker escribe: solo cambia versiones_tablas, no el caché de este proceso
+    datos.cursor().execute("INSERT INTO categorias (nombre) VALUES (%s)", ('Arte',))
+    marcar_cambio(datos, 'categorias')
+    datos.commit()
+    assert sesion.get('/consultar_categorias').headers['X-Cache'] == 'MISS'
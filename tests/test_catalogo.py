@@ -0,0 +1,100 @@
+import catalogo
+
+
+class CursorFalso:
+    """
+    Cursor que responde a las consultas de catalogo.py con filas fijas.
+    """
+
+    def __init__(self, versiones, cursos):
+        self.versiones = versiones
+        self.cursos = cursos
+        self._filas = []
+
+    def execute(self, sql, params=()):
+        if 'versiones_tablas' in sql:
+            self._filas = [{'tabla': tabla, 'version': version} for tabla, version in self.versiones.items()]
+        elif 'WHERE cursos.id_curso' in sql:
+            self._filas = [dict(c) for c in self.cursos if c['id_curso'] == params[0]]
+        else:
+            self._filas = [dict(c) for c in self.cursos]
+
+    def fetchall(self):
+        return self._filas
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+
+CURSOS = [
+    {'id_curso': 1, 'nombre': 'Programación en Python', 'descripcion': 'Desde cero', 'categoria': 'Tecnología'},
+    {'id_curso': 2, 'nombre': 'Cocina mexicana', 'descripcion': 'Moles y salsas ' * 40, 'categoria': 'Gastronomía'},
+    {'id_curso': 3, 'nombre': 'Inglés básico', 'descripcion': None, 'categoria': None},
+]
+
+
+def indice_cargado(versiones=None):
+    indice = catalogo.IndiceCatalogo()
+    indice.cargar(CursorFalso(versiones or {'categorias': 1, 'cursos': 1}, CURSOS))
+    return indice
+
+
+def ids(filas):
+    return [fila['id_curso'] for fila in filas]
+
+
+def test_busca_sin_distinguir_mayusculas_ni_acentos():
+    indice = indice_cargado()
+    assert ids(indice.buscar('PROGRAMACION')) == [1]
+    assert ids(indice.buscar('ingles')) == [3]
+    assert ids(indice.buscar('tecnologia')) == [1]
+
+
+def test_consultas_cortas_revisan_todos_los_cursos():
+    indice = indice_cargado()
+    assert ids(indice.buscar('co')) == [2, 3]
+    assert ids(indice.buscar('')) == [1, 2, 3]
+
+
+def test_busca_en_la_descripcion_completa_pero_guarda_la_recortada():
+    indice = indice_cargado()
+    assert ids(indice.buscar('salsas moles')) == [2]
+    descripcion = indice.todos()[1]['descripcion']
+    assert descripcion.endswith('…')
+    assert len(descripcion) == catalogo.config.DESCRIPCION_LISTADO + 1
+
+
+def test_sin_coincidencias():
+    assert indice_cargado().buscar('jardinería') == []
+
+
+def test_recargar_curso_actualiza_el_indice():
+    indice = indice_cargado()
+    cambiados = [dict(CURSOS[0], nombre='Programación en Rust')]
+    indice.recargar_cursos(CursorFalso({}, cambiados), {'cursos': 2}, id_curso=1)
+    assert ids(indice.buscar('rust')) == [1]
+    assert indice.buscar('python') == []
+    assert indice.versiones()['cursos'] == 2
+
+
+def test_cambio_de_otro_proceso_invalida_el_indice():
+    indice = indice_cargado()
+    indice.quitar_curso(1, {'cursos': 3})
+    assert indice.versiones() is None
+
+
+def test_replica_atrasada_no_deshace_una_escritura_local(monkeypatch):
+    monkeypatch.setattr(catalogo.config, 'CATALOGO_REVISION', 0)
+    indice = indice_cargado({'categorias': 1, 'cursos': 2})
+    atrasada = CursorFalso({'categorias': 1, 'cursos': 1}, CURSOS[:1])
+    indice.asegurar_vigente(lambda: ConexionFalsa(atrasada))
+    assert indice.versiones() == {'categorias': 1, 'cursos': 2}
+    assert ids(indice.todos()) == [1, 2, 3]
@@ -0,0 +1,69 @@
+import pytest
+
+import config
+import contrasenas
+
+
+@pytest.fixture(autouse=True)
+def metodo_barato(monkeypatch):
+    monkeypatch.setattr(config, 'PASSWORD_METHOD', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr(contrasenas, '_metodo_actual', None)
+
+
+@pytest.fixture
+def pool_lleno(monkeypatch):
+    # Un pool nuevo de un solo cupo, ocupado por la prueba
+    monkeypatch.setattr(config, 'PASSWORD_WORKERS', 1)
+    monkeypatch.setattr(config, 'PASSWORD_COLA_MAX', 0)
+    monkeypatch.setattr(config, 'PASSWORD_TIMEOUT', 0.01)
+    monkeypatch.setattr(contrasenas, '_executor', None)
+    _, cupos = contrasenas._obtener_executor()
+    cupos.acquire()
+    yield
+    cupos.release()
+    contrasenas._executor.shutdown()
+
+
+def test_generar_y_verificar():
+    password_hash = contrasenas.generar('secreta')
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert contrasenas.verificar(password_hash, 'secreta')
+    assert not contrasenas.verificar(password_hash, 'otra')
+    assert not contrasenas.verificar(None, '')
+
+
+def test_necesita_rehash_al_cambiar_el_costo(monkeypatch):
+    anterior = contrasenas.generar('secreta')
+    assert not contrasenas.necesita_rehash(anterior)
+    monkeypatch.setattr(config, 'PASSWORD_METHOD', 'pbkdf2:sha256:2000')
+    monkeypatch.setattr(contrasenas, '_metodo_actual', None)
+    assert contrasenas.necesita_rehash(anterior)
+    assert not contrasenas.necesita_rehash(None)
+
+
+def test_sin_turno_se_lanza_hash_saturado(pool_lleno):
+    with pytest.raises(contrasenas.HashSaturado):
+        contrasenas.generar('secreta')
+    assert isinstance(contrasenas.generar_varios(['a'])[0], contrasenas.HashSaturado)
+
+
+def test_login_con_pool_lleno_responde_503(cliente, conexion, pool_lleno):
+    conexion.cursor().execute("INSERT INTO participantes (nombre, correo, usuario, password) VALUES (%s, %s, %s, %s)",
+                              ('Ana', 'ana@x.mx', 'ana', 'pbkdf2:sha256:1000$sal$hash'))
+    respuesta = cliente.post('/login', data={'usuario': 'ana', 'password': 'secreta'})
+    assert respuesta.status_code == 503
+
+
+def test_login_guarda_el_hash_con_el_costo_actual(cliente, conexion, monkeypatch):
+    monkeypatch.setattr(config, 'PASSWORD_METHOD', 'pbkdf2:sha256:500')
+    anterior = contrasenas.generar('secreta')
+    monkeypatch.setattr(config, 'PASSWORD_METHOD', 'pbkdf2:sha256:1000')
+    conexion.cursor().execute("INSERT INTO participantes (nombre, correo, usuario, password) VALUES (%s, %s, %s, %s)",
+                              ('Ana', 'ana@x.mx', 'ana', anterior))
+    conexion.commit()
+
+    respuesta = cliente.post('/login', data={'usuario': 'ana', 'password': 'secreta'})
+    assert respuesta.status_code == 302
+    (nuevo,), = conexion.consultar("SELECT password FROM participantes WHERE usuario = 'ana'")
+    assert nuevo.startswith('pbkdf2:sha256:1000$')
+    assert contrasenas.verificar(nuevo, 'secreta')
@@ -0,0 +1,45 @@
+import mysql.connector
+import pytest
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.executemany("INSERT INTO categorias (nombre) VALUES (%s)", [('Tecnología',), ('Idiomas',)])
+    cursor.executemany("INSERT INTO cursos (nombre, id_categoria) VALUES (%s, %s)", [('Python', 1), ('Inglés', 2)])
+    cursor.executemany("INSERT INTO participantes (nombre, correo) VALUES (%s, %s)",
+                       [('Ana', 'ana@x.mx'), ('Luis', 'luis@x.mx')])
+    conexion.commit()
+    return conexion
+
+
+def test_la_pagina_base_no_consulta_la_base(cliente, monkeypatch):
+    def sin_base(**parametros):
+        raise AssertionError('/dashboard no debe abrir conexiones')
+
+    monkeypatch.setattr(mysql.connector, 'connect', sin_base)
+    respuesta = cliente.get('/dashboard')
+    assert respuesta.status_code == 200
+    assert "fetch('/api/dashboard/' + nombre)" in respuesta.get_data(as_text=True)
+
+
+def test_widgets_con_lo_inscrito(sesion, datos):
+    for id_participante, id_curso in ((1, 1), (2, 1), (1, 2)):
+        sesion.post('/inscribir', data={'id_participante': id_participante, 'id_curso': id_curso})
+
+    populares = sesion.get('/api/dashboard/cursos_populares').get_json()
+    assert populares == [{'nombre': 'Python', 'total_inscritos': 2}, {'nombre': 'Inglés', 'total_inscritos': 1}]
+    categorias = sesion.get('/api/dashboard/categorias').get_json()
+    assert sorted((c['categoria'], c['inscritos']) for c in categorias) == [('Idiomas', 1), ('Tecnología', 2)]
+    mensual = sesion.get('/api/dashboard/mensual').get_json()
+    assert [m['total'] for m in mensual] == [3]
+
+
+def test_inscribir_solo_invalida_los_widgets_de_inscripciones(sesion, datos):
+    widgets = ('totales', 'cursos_populares', 'categorias', 'mensual')
+    for widget in widgets:
+        sesion.get(f'/api/dashboard/{widget}')
+    # Seguir la redirección muestra el mensaje flash; con uno pendiente no se usa el caché
+    sesion.post('/inscribir', data={'id_participante': '1', 'id_curso': '1'}, follow_redirects=True)
+    cache = {w: sesion.get(f'/api/dashboard/{w}').headers['X-Cache'] for w in widgets}
+    assert cache == {'totales': 'HIT', 'cursos_populares': 'MISS', 'categorias': 'MISS', 'mensual': 'MISS'}
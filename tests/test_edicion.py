@@ -0,0 +1,75 @@
+import pytest
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.executemany("INSERT INTO categorias (nombre, descripcion) VALUES (%s, %s)",
+                       [('Tecnología', ''), ('Idiomas', '')])
+    cursor.executemany("INSERT INTO cursos (nombre, descripcion, duracion, id_categoria) VALUES (%s, %s, %s, %s)",
+                       [('Python', 'Desde cero', 20, 1), ('Inglés', 'Básico', 30, 2)])
+    cursor.executemany("INSERT INTO participantes (nombre, correo) VALUES (%s, %s)",
+                       [('Ana', 'ana@x.mx'), ('Luis', 'luis@x.mx')])
+    cursor.executemany("INSERT INTO inscripciones (id_curso, id_participante, fecha) VALUES (%s, %s, %s)",
+                       [(1, 1, '2024-03-05'), (2, 1, '2024-03-06')])
+    conexion.commit()
+    return conexion
+
+
+def test_curso_con_nombre_repetido(sesion, datos):
+    respuesta = sesion.post('/editar_curso/2', data={
+        'nombre': 'Python', 'descripcion': 'Otra', 'duracion': '10', 'categoria': '1'})
+    assert respuesta.status_code == 400
+    html = respuesta.get_data(as_text=True)
+    assert 'Ya existe un curso con ese nombre.' in html
+    assert 'value="Python"' in html
+    assert datos.consultar("SELECT nombre, id_categoria FROM cursos WHERE id_curso = 2") == [('Inglés', 2)]
+
+
+def test_curso_con_categoria_que_no_existe(sesion, datos):
+    respuesta = sesion.post('/editar_curso/2', data={
+        'nombre': 'Inglés', 'descripcion': 'Básico', 'duracion': '30', 'categoria': '99'})
+    assert respuesta.status_code == 400
+    assert 'La categoría seleccionada no es válida.' in respuesta.get_data(as_text=True)
+
+
+def test_categoria_con_nombre_repetido(sesion, datos):
+    respuesta = sesion.post('/editar_categoria/2', data={'nombre': 'Tecnología', 'descripcion': 'x'})
+    assert respuesta.status_code == 400
+    assert 'El nombre de la categoría ya está registrado.' in respuesta.get_data(as_text=True)
+    assert datos.consultar("SELECT nombre FROM categorias WHERE id_categoria = 2") == [('Idiomas',)]
+
+
+def test_inscripcion_repetida(sesion, datos):
+    respuesta = sesion.post('/editar_inscripcion/2', data={
+        'id_participante': '1', 'id_curso': '1', 'fecha': '2024-04-01'})
+    assert respuesta.status_code == 400
+    html = respuesta.get_data(as_text=True)
+    assert 'El participante ya está inscrito en ese curso.' in html
+    assert 'value="2024-04-01"' in html
+    assert datos.consultar("SELECT id_curso, fecha FROM inscripciones WHERE id_inscripcion = 2") == \
+        [(2, '2024-03-06')]
+    # Los resúmenes no se movieron
+    assert datos.consultar("SELECT COUNT(*) FROM resumen_cursos") == [(0,)]
+
+
+def test_edicion_sin_conflicto(sesion, datos):
+    respuesta = sesion.post('/editar_categoria/2', data={'nombre': 'Lenguas', 'descripcion': 'x'})
+    assert respuesta.status_code == 302
+    assert datos.consultar("SELECT nombre FROM categorias WHERE id_categoria = 2") == [('Lenguas',)]
+
+
+def test_nombres_demasiado_largos(sesion, datos):
+    respuesta = sesion.post('/editar_categoria/2', data={'nombre': 'c' * 51, 'descripcion': 'x'})
+    assert respuesta.status_code == 400
+    assert 'no puede tener más de 50 caracteres' in respuesta.get_data(as_text=True)
+
+    respuesta = sesion.post('/editar_curso/2', data={
+        'nombre': 'c' * 101, 'descripcion': 'x', 'duracion': '10', 'categoria': '2'})
+    assert respuesta.status_code == 400
+    assert 'no puede tener más de 100 caracteres' in respuesta.get_data(as_text=True)
+
+    respuesta = sesion.post('/registrar_curso', data={
+        'nombre': 'c' * 101, 'descripcion': 'x', 'duracion': '10', 'categoria': '2'})
+    assert 'no puede tener más de 100 caracteres' in respuesta.get_data(as_text=True)
+    assert datos.consultar("SELECT COUNT(*) FROM cursos") == [(2,)]
@@ -0,0 +1,77 @@
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+import exportaciones
+
+
+def abrir_xlsx(encabezados, filas, hoja='Hoja'):
+    salida = io.BytesIO()
+    exportaciones.generar_xlsx(salida, hoja, encabezados, filas)
+    salida.seek(0)
+    return load_workbook(salida)[hoja]
+
+
+def test_xlsx_se_abre_con_openpyxl_y_conserva_los_valores():
+    hoja = abrir_xlsx(['ID', 'Nombre', 'Edad', 'Saldo', 'Registro', 'Activo'], [
+        (1, 'Ana <López> & "Cía"', 30, Decimal('10.5'), date(2024, 3, 5), True),
+        (2, None, None, None, datetime(2024, 3, 6, 10, 30), False),
+    ])
+    filas = list(hoja.iter_rows(values_only=True))
+    assert filas == [
+        ('ID', 'Nombre', 'Edad', 'Saldo', 'Registro', 'Activo'),
+        (1, 'Ana <López> & "Cía"', 30, 10.5, datetime(2024, 3, 5), True),
+        (2, None, None, None, datetime(2024, 3, 6), False),
+    ]
+
+
+def test_xlsx_encabezados_en_negritas_y_fechas_dd_mm_aaaa():
+    hoja = abrir_xlsx(['Fecha'], [(date(2024, 3, 5),)])
+    assert hoja['A1'].font.bold
+    assert hoja['A2'].number_format == exportaciones.FORMATO_FECHA
+
+
+def test_xlsx_quita_caracteres_de_control():
+    hoja = abrir_xlsx(['Texto'], [('a\x00b\x1fc\td',)])
+    assert hoja['A2'].value == 'abc\td'
+
+
+def test_xlsx_consume_un_generador_de_muchas_filas():
+    hoja = abrir_xlsx(['N'], ((i,) for i in range(5000)))
+    assert hoja.max_row == 5001
+    assert hoja.cell(row=5001, column=1).value == 4999
+
+
+def test_partir_celda_solo_parte_lo_que_no_cabe():
+    assert exportaciones._partir_celda('corto', 100, 6, 10) == ('corto', 1)
+    texto, lineas = exportaciones._partir_celda('x' * 200, 50, 6, 20)
+    assert lineas > 1
+    assert all(exportaciones.stringWidth(l, exportaciones.FUENTE, 6) <= 50 for l in texto.split('\n'))
+
+
+def test_partir_celda_recorta_textos_que_no_caben_en_una_pagina():
+    texto, lineas = exportaciones._partir_celda('x' * 500, 50, 6, 3)
+    assert lineas == 3
+    assert texto.endswith('…')
+    assert exportaciones.stringWidth(texto.split('\n')[-1], exportaciones.FUENTE, 6) <= 50
+
+
+def test_una_tabla_por_pagina():
+    estilo = exportaciones._estilo_tabla(6, 0.25)
+    filas = [(i, f'Nombre {i}') for i in range(200)]
+    partes = list(exportaciones._tablas_por_pagina(['ID', 'Nombre'], [40, 100], filas, 300, 6, estilo))
+    tablas = [p for p in partes if isinstance(p, exportaciones.Table)]
+    assert len(partes) == 2 * len(tablas) - 1
+    assert sum(len(t._cellvalues) - 1 for t in tablas) == 200
+    assert all(sum(t._argH) <= 300 for t in tablas)
+
+
+def test_pdf_con_varias_paginas():
+    salida = io.BytesIO()
+    filas = ((i, 'Curso', 'Descripción larga ' * 20, 10, 1) for i in range(300))
+    exportaciones.escribir('cursos_pdf', filas, salida)
+    pdf = salida.getvalue()
+    assert pdf.startswith(b'%PDF')
+    assert pdf.count(b'/Type /Page\n') > 1
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+
+import config
+import contrasenas
+import importaciones
+
+
+@pytest.fixture
+def cliente_bd(cliente, conexion):
+    # El cliente deja listo el caché de páginas que usa _insertar_lote
+    conexion.cursor().execute("INSERT INTO participantes (nombre, correo, telefono) VALUES (%s, %s, %s)",
+                              ('Ana López', 'ana@x.mx', '5551234567'))
+    conexion.commit()
+    return conexion
+
+
+def importar(conexion, texto, tamano_lote=None):
+    filas = importaciones.leer_csv(io.BytesIO(texto.encode('utf-8')))
+    return importaciones.importar_participantes(conexion, filas, tamano_lote)
+
+
+def test_reporte_de_filas_malas_repetidas_y_demasiado_largas(cliente_bd):
+    reporte = importar(cliente_bd, "\n".join([
+        "Nombre completo;Email;Telefono;Edad;Genero",
+        "Eva Ruiz;eva@x.mx;5550000001;30;F",              # 2: bien
+        "Sin correo;;5550000002;;",                       # 3: falta correo
+        "Edad mala;edad@x.mx;5550000003;treinta;",        # 4: edad no numérica
+        "Otra Ana;ana@x.mx;5550000004;;",                 # 5: correo ya en la base
+        "Eva Ruiz;eva2@x.mx;5550000005;;",                # 6: nombre de la fila 2
+        f"{'x' * 101};largo@x.mx;5550000006;;",           # 7: nombre de 101
+        "Tel largo;tel@x.mx;5550000007123456;;No contesta",  # 8: teléfono y género
+        ";;;;",                                           # 9: vacía, no cuenta
+        "Luis Pérez;luis@x.mx;5550000008;;",              # 10: bien
+    ]))
+    assert reporte['filas'] == 8
+    assert reporte['insertados'] == 2
+    assert reporte['errores'] == [
+        (3, "Falta correo."),
+        (4, "La edad debe ser un número entero."),
+        (5, "Ya existe un participante con ese correo electrónico."),
+        (6, "Repite nombre de una fila anterior del archivo."),
+        (7, "Demasiados caracteres en nombre (101 de 100)."),
+        (8, "Demasiados caracteres en telefono (16 de 15), genero (11 de 10)."),
+    ]
+    assert cliente_bd.consultar("SELECT nombre FROM participantes ORDER BY id_participante") == \
+        [('Ana López',), ('Eva Ruiz',), ('Luis Pérez',)]
+    assert cliente_bd.consultar("SELECT total FROM resumen_totales WHERE entidad = 'participantes'") == [(2,)]
+
+
+def test_un_valor_que_no_cabe_se_reintenta_fila_por_fila(cliente_bd, monkeypatch):
+    # Si la validación deja pasar un valor demasiado largo, el DataError del
+    # lote no tumba la importación: solo se rechaza esa fila
+    monkeypatch.setitem(importaciones.LARGOS, 'ocupacion', 1000)
+    reporte = importar(cliente_bd, "\n".join([
+        "nombre,correo,telefono,ocupacion",
+        "Eva Ruiz,eva@x.mx,5550000001,Docente",
+        f"Largo,largo@x.mx,5550000002,{'o' * 101}",
+        "Luis Pérez,luis@x.mx,5550000003,",
+    ]))
+    assert reporte['insertados'] == 2
+    assert reporte['errores'] == [(3, "Algún valor no cabe en su columna.")]
+    assert cliente_bd.consultar("SELECT COUNT(*) FROM participantes") == [(3,)]
+
+
+def test_las_contrasenas_sin_turno_se_reportan_por_fila(cliente_bd, monkeypatch):
+    def generar_varios(passwords):
+        return ['hash-' + p if p != 'lenta' else contrasenas.HashSaturado() for p in passwords]
+
+    monkeypatch.setattr(contrasenas, 'generar_varios', generar_varios)
+    reporte = importar(cliente_bd, "\n".join([
+        "nombre,correo,telefono,usuario,password",
+        "Eva Ruiz,eva@x.mx,5550000001,eva,rapida",
+        "Luis Pérez,luis@x.mx,5550000002,luis,lenta",
+        "Sin clave,sin@x.mx,5550000003,,",
+    ]))
+    assert reporte['insertados'] == 2
+    assert reporte['errores'] == [(3, "No se pudo procesar la contraseña; importa la fila de nuevo.")]
+    assert cliente_bd.consultar("SELECT usuario, password FROM participantes WHERE id_participante > 1") == \
+        [('eva', 'hash-rapida'), (None, None)]
+
+
+def test_generar_varios_en_paralelo(monkeypatch):
+    monkeypatch.setattr(config, 'PASSWORD_METHOD', 'pbkdf2:sha256:1000')
+    hashes = contrasenas.generar_varios(['a', 'b', 'c', 'd', 'e'])
+    assert len(hashes) == 5
+    assert all(h.startswith('pbkdf2:sha256:1000$') for h in hashes)
+    assert contrasenas.verificar(hashes[3], 'd')
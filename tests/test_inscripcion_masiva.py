@@ -0,0 +1,47 @@
+import io
+from datetime import date
+
+import pytest
+
+import app as aplicacion
+import importaciones
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.execute("INSERT INTO categorias (nombre) VALUES (%s)", ('Tecnología',))
+    cursor.executemany("INSERT INTO cursos (nombre, id_categoria) VALUES (%s, %s)", [('Python', 1), ('SQL', 1)])
+    cursor.executemany("INSERT INTO participantes (nombre, correo) VALUES (%s, %s)",
+                       [(f'P{i}', f'p{i}@x.mx') for i in range(1, 5)])
+    cursor.execute("INSERT INTO inscripciones (id_curso, id_participante, fecha) VALUES (1, 1, '2024-03-05')")
+    conexion.commit()
+    return conexion
+
+
+def test_inscribir_en_bloque_omite_inscritos_e_inexistentes(datos):
+    insertadas, versiones = aplicacion.inscribir_en_bloque(datos, [1, 2, 3, 99], [1, 2], date(2024, 4, 1))
+    assert insertadas == 5          # 8 pares - (1, 1) ya inscrito - 99 en los dos cursos
+    assert set(versiones) == {'inscripciones'}
+    assert datos.consultar("SELECT id_curso, inscritos FROM resumen_cursos ORDER BY id_curso") == [(1, 2), (2, 3)]
+    assert datos.consultar("SELECT total FROM resumen_mensual WHERE mes = '2024-04'") == [(5,)]
+
+
+def test_nada_que_inscribir_no_marca_cambio(datos):
+    assert aplicacion.inscribir_en_bloque(datos, [1, 99], [1], date(2024, 4, 1)) == (0, {})
+
+
+def test_ruta_informa_nuevas_y_omitidas(sesion, datos):
+    respuesta = sesion.post('/inscribir_masivo', data={
+        'id_curso': ['1', '2'],
+        'ids_participantes': '1, 2',
+        'archivo': (io.BytesIO(b'id_participante\n3\nabc\n2\n'), 'ids.csv'),
+    }, follow_redirects=True)
+    html = respuesta.get_data(as_text=True)
+    assert '5 inscripciones nuevas, 1 omitidas' in html
+    assert '1 valores del archivo no eran ids válidos.' in html
+    assert datos.consultar("SELECT COUNT(*) FROM inscripciones") == [(6,)]
+
+
+def test_leer_ids_sin_encabezados():
+    assert importaciones.leer_ids_participantes(io.BytesIO(b'7;x\n8\n\nnueve\n')) == ([7, 8], 1)
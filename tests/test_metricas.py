@@ -0,0 +1,56 @@
+import json
+import os
+import time
+
+import pytest
+
+import config
+import metricas
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'METRICS_TTL', 60)
+    return tmp_path
+
+
+def proceso(directorio, pid, consultas, hace=0):
+    datos = {
+        'histogramas': [['kevza_peticion_segundos', [['ruta', 'index']], [1] + [0] * 11 + [0.001 * consultas, 1]]],
+        'valores': [['kevza_consultas_lentas_total', [['consulta', 'SELECT ?']], consultas],
+                    ['kevza_pool_conexiones', [['estado', 'libres']], 4]],
+    }
+    ruta = directorio / f'{pid}.json'
+    ruta.write_text(json.dumps(datos), encoding='utf-8')
+    os.utime(ruta, (time.time() - hace,) * 2)
+
+
+def totales():
+    histogramas, valores = metricas._leer_todos()
+    peticiones = histogramas[('kevza_peticion_segundos', (('ruta', 'index'),))][-1]
+    lentas = valores[('kevza_consultas_lentas_total', (('consulta', 'SELECT ?'),))]
+    libres = valores.get(('kevza_pool_conexiones', (('estado', 'libres'),)))
+    return peticiones, lentas, libres
+
+
+def test_un_proceso_terminado_pasa_al_acumulado_sin_sus_gauges(directorio):
+    proceso(directorio, 100, 3)
+    proceso(directorio, 200, 5, hace=120)
+    assert totales() == (2, 8, 4)
+    assert sorted(os.listdir(directorio)) == ['100.json', metricas.ARCHIVO_RETIRADOS, 'retirados.lock']
+    # Leer otra vez no lo suma de nuevo
+    assert totales() == (2, 8, 4)
+
+
+def test_los_retirados_se_acumulan(directorio):
+    proceso(directorio, 100, 3, hace=120)
+    assert totales() == (1, 3, None)
+    proceso(directorio, 200, 5, hace=120)
+    proceso(directorio, 300, 1)
+    assert totales() == (3, 9, 4)
+
+
+def test_sin_directorio_no_hay_metricas(directorio, monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_DIR', str(directorio / 'no_existe'))
+    assert metricas._leer_todos() == ({}, {})
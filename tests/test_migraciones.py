@@ -0,0 +1,86 @@
+import pytest
+
+import migraciones
+
+
+def test_separa_por_punto_y_coma():
+    assert migraciones.dividir_sentencias("CREATE TABLE a (x INT);\nDROP TABLE b;") == [
+        "CREATE TABLE a (x INT)", "DROP TABLE b"]
+
+
+def test_no_corta_dentro_de_cadenas_ni_identificadores():
+    texto = ("INSERT INTO t VALUES ('a;b', \"c;d\", 'it''s;', 'e\\';f');\n"
+             "ALTER TABLE `raro;nombre` ADD x INT;")
+    assert migraciones.dividir_sentencias(texto) == [
+        "INSERT INTO t VALUES ('a;b', \"c;d\", 'it''s;', 'e\\';f')",
+        "ALTER TABLE `raro;nombre` ADD x INT",
+    ]
+
+
+def test_descarta_comentarios():
+    texto = ("-- crea la tabla; con punto y coma\n"
+             "# otro comentario;\n"
+             "CREATE TABLE a (/* columna; */ x INT);\n"
+             "/* comentario final; */")
+    assert migraciones.dividir_sentencias(texto) == ["CREATE TABLE a (  x INT)"]
+
+
+def test_ignora_sentencias_vacias():
+    assert migraciones.dividir_sentencias(";;\n  ;") == []
+
+
+def test_listar_ordena_por_version(tmp_path):
+    for archivo in ('0002_segunda.sql', '0001_primera.sql', 'notas.txt'):
+        (tmp_path / archivo).write_text("SELECT 1;", encoding='utf-8')
+    assert [(m.version, m.nombre) for m in migraciones.listar(str(tmp_path))] == [
+        (1, 'primera'), (2, 'segunda')]
+
+
+def test_listar_rechaza_versiones_repetidas(tmp_path):
+    for archivo in ('0001_una.sql', '0001_otra.sql'):
+        (tmp_path / archivo).write_text("SELECT 1;", encoding='utf-8')
+    with pytest.raises(ValueError):
+        migraciones.listar(str(tmp_path))
+
+
+def test_las_migraciones_del_repositorio_se_pueden_leer():
+    for migracion in migraciones.listar():
+        assert migracion.sentencias(), migracion.nombre
+
+
+def escribir_migracion(directorio, texto):
+    (directorio / '0001_unicos.sql').write_text(texto, encoding='utf-8')
+    return migraciones.listar(str(directorio))[0]
+
+
+def test_indices_unicos_de_la_migracion():
+    cuarta = [m for m in migraciones.listar() if m.version == 4][0]
+    assert ('inscripciones', 'uq_inscripciones_participante_curso', ['id_participante', 'id_curso']) \
+        in cuarta.indices_unicos()
+    assert ('cursos', 'uq_cursos_nombre', ['nombre']) in cuarta.indices_unicos()
+
+
+def test_no_aplica_nada_si_hay_duplicados(tmp_path, conexion):
+    conexion.consultar("DROP INDEX uq_cursos_nombre")
+    conexion.consultar("INSERT INTO cursos (nombre) VALUES ('Python'), ('Python'), ('Java')")
+    migracion = escribir_migracion(tmp_path, "CREATE TABLE nueva (x INT);\n"
+                                             "ALTER TABLE cursos ADD UNIQUE INDEX uq_cursos_nombre (nombre);")
+    with pytest.raises(migraciones.DuplicadosExistentes, match=r"cursos\.uq_cursos_nombre \(nombre\): 'Python' \(2 veces\)"):
+        migraciones.aplicar(conexion, migracion)
+    assert conexion.consultar("SELECT name FROM sqlite_master WHERE name = 'nueva'") == []
+    assert migraciones.aplicadas(conexion) == {}
+
+
+def test_sin_duplicados_aplica_y_registra(tmp_path, conexion):
+    conexion.consultar("INSERT INTO cursos (nombre) VALUES ('Python'), ('Java')")
+    migracion = escribir_migracion(tmp_path, "CREATE TABLE nueva (x INT);")
+    assert migraciones.buscar_duplicados(conexion, 'cursos', ['nombre']) == []
+    faltan, _ = migraciones.pendientes(conexion, str(tmp_path))
+    assert [m.version for m in faltan] == [1]
+    migraciones.aplicar(conexion, migracion)
+    assert migraciones.aplicadas(conexion) == {1: migracion.checksum}
+
+
+def test_los_null_no_cuentan_como_duplicados(conexion):
+    conexion.consultar("INSERT INTO participantes (nombre, correo) VALUES ('Ana', 'a@x.mx'), ('Luis', 'l@x.mx')")
+    assert migraciones.buscar_duplicados(conexion, 'participantes', ['telefono']) == []
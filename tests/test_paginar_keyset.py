@@ -0,0 +1,70 @@
+import pytest
+
+import app as aplicacion
+
+# Fechas con empates y NULL (SQLite, como MySQL, ordena los NULL primero)
+FECHAS = [None, '2024-01-02', None, '2024-01-01', '2024-01-02', None, '2024-01-03']
+
+SQL = "SELECT id_inscripcion, fecha FROM inscripciones"
+ORDEN = [("fecha", "fecha"), ("id_inscripcion", "id_inscripcion")]
+
+
+@pytest.fixture
+def inscripciones(conexion):
+    cursor = conexion.cursor()
+    cursor.execute("INSERT INTO cursos (nombre) VALUES ('Curso')")
+    cursor.executemany("INSERT INTO participantes (nombre, correo) VALUES (%s, %s)",
+                       [(f"P{i}", f"p{i}@x.mx") for i in range(len(FECHAS))])
+    cursor.executemany("INSERT INTO inscripciones (id_curso, id_participante, fecha) VALUES (1, %s, %s)",
+                       list(enumerate(FECHAS, start=1)))
+    return conexion
+
+
+def pagina(conexion, url, descendente):
+    with aplicacion.app.test_request_context(url):
+        filas, enlaces = aplicacion.paginar_keyset(conexion.cursor(dictionary=True), SQL, [], [], ORDEN,
+                                                   descendente=descendente, admite_nulos=('fecha',))
+    return [fila['id_inscripcion'] for fila in filas], enlaces
+
+
+def esperado(descendente):
+    filas = sorted(((fecha is not None, fecha or '', id_inscripcion)
+                    for id_inscripcion, fecha in enumerate(FECHAS, start=1)), reverse=descendente)
+    return [id_inscripcion for *_, id_inscripcion in filas]
+
+
+@pytest.mark.parametrize('descendente', [False, True])
+def test_recorre_todas_las_filas_hacia_adelante_y_hacia_atras(inscripciones, descendente):
+    url = '/consultar_inscripciones?por_pagina=2'
+    adelante, paginas = [], []
+    while url:
+        ids, enlaces = pagina(inscripciones, url, descendente)
+        adelante += ids
+        paginas.append(ids)
+        url = enlaces['siguiente']
+    assert adelante == esperado(descendente)
+    assert len(paginas) == 4
+
+    # Desde la última página, siguiendo los enlaces "anterior"
+    _, enlaces = pagina(inscripciones, '/consultar_inscripciones?por_pagina=2', descendente)
+    while enlaces['siguiente']:
+        ultima = enlaces['siguiente']
+        _, enlaces = pagina(inscripciones, ultima, descendente)
+    atras = []
+    url = enlaces['anterior']
+    while url:
+        ids, enlaces = pagina(inscripciones, url, descendente)
+        atras = ids + atras
+        url = enlaces['anterior']
+    assert atras == adelante[:-len(paginas[-1])]
+
+
+def test_conserva_los_parametros_de_la_peticion(inscripciones):
+    _, enlaces = pagina(inscripciones, '/consultar_inscripciones?por_pagina=2&busqueda=ana', False)
+    assert 'busqueda=ana' in enlaces['siguiente']
+    assert 'por_pagina=2' in enlaces['siguiente']
+
+
+def test_cursor_invalido_empieza_desde_el_principio(inscripciones):
+    ids, _ = pagina(inscripciones, '/consultar_inscripciones?por_pagina=2&despues=no-es-un-cursor', False)
+    assert ids == esperado(False)[:2]
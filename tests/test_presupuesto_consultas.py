@@ -0,0 +1,49 @@
+import pytest
+
+import app as aplicacion
+import config
+import db
+import metricas
+
+
+def test_vigilar_consultas_cuenta_las_consultas_del_bloque(conexion):
+    conn = db.ConexionMedida(conexion)
+    with metricas.vigilar_consultas(2) as registro:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.execute("SELECT 1")
+        cursor.close()
+    assert registro.consultas == 2
+
+
+def test_vigilar_consultas_falla_al_pasar_el_presupuesto(conexion):
+    conn = db.ConexionMedida(conexion)
+    with pytest.raises(metricas.PresupuestoExcedido, match=r"3 consultas \(presupuesto 2\)\. Más repetidas: 3 x SELECT"):
+        with metricas.vigilar_consultas(2):
+            cursor = conn.cursor()
+            for _ in range(3):
+                cursor.execute("SELECT 1")
+            cursor.close()
+
+
+def test_ruta_dentro_de_su_presupuesto(cliente, monkeypatch):
+    monkeypatch.setattr(config, 'DB_QUERY_BUDGET_ESTRICTO', True)
+    respuesta = cliente.get('/api/dashboard/totales')
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {'cursos': 0, 'participantes': 0}
+
+
+def test_modo_estricto_falla_si_la_ruta_pasa_su_presupuesto(cliente, monkeypatch):
+    # La ruta lee las versiones del caché y luego los totales: dos consultas
+    vista = aplicacion.app.view_functions['dashboard_totales']
+    monkeypatch.setattr(vista, 'presupuesto_consultas', 1, raising=False)
+    monkeypatch.setattr(config, 'DB_QUERY_BUDGET_ESTRICTO', True)
+    with pytest.raises(metricas.PresupuestoExcedido, match=r"/api/dashboard/totales: 2 consultas \(presupuesto 1\)"):
+        cliente.get('/api/dashboard/totales')
+
+
+def test_sin_modo_estricto_solo_se_registra(cliente, monkeypatch):
+    vista = aplicacion.app.view_functions['dashboard_totales']
+    monkeypatch.setattr(vista, 'presupuesto_consultas', 1, raising=False)
+    monkeypatch.setattr(config, 'DB_QUERY_BUDGET_ESTRICTO', False)
+    assert cliente.get('/api/dashboard/totales').status_code == 200
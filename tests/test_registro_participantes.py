@@ -0,0 +1,76 @@
+import pytest
+from mysql.connector import IntegrityError, errorcode
+
+import app as aplicacion
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.executemany("INSERT INTO participantes (nombre, correo, telefono, usuario) VALUES (%s, %s, %s, %s)",
+                       [('Ana López', 'ana@x.mx', '5551234567', 'ana'),
+                        ('Luis Pérez', 'luis@x.mx', '5559876543', None)])
+    cursor.execute("INSERT INTO cursos (nombre) VALUES (%s)", ('Python',))
+    conexion.commit()
+    return conexion
+
+
+def formulario(**campos):
+    base = {'nombre': 'Eva Ruiz', 'correo': 'eva@x.mx', 'telefono': '5550001111', 'direccion': '',
+            'edad': '', 'genero': '', 'ocupacion': '', 'usuario': '', 'password': ''}
+    base.update(campos)
+    return base
+
+
+def test_registro_reporta_todos_los_campos_repetidos(cliente, datos):
+    respuesta = cliente.post('/registrar_participante', data=formulario(
+        correo='ana@x.mx', telefono='5559876543'))
+    html = respuesta.get_data(as_text=True)
+    assert 'Ya existe un participante con ese correo electrónico.' in html
+    assert 'Ya existe un participante con ese teléfono.' in html
+    assert 'nombre completo' not in html
+    assert datos.consultar("SELECT COUNT(*) FROM participantes") == [(2,)]
+    assert datos.consultar("SELECT total FROM resumen_totales WHERE entidad = 'participantes'") == [(0,)]
+
+
+def test_registro_con_usuario_repetido(cliente, datos):
+    respuesta = cliente.post('/registrar_participante', data=formulario(usuario='ana', password='secreta'))
+    assert 'Ese nombre de usuario ya está en uso.' in respuesta.get_data(as_text=True)
+
+
+def test_registro_sin_duplicados(cliente, datos):
+    respuesta = cliente.post('/registrar_participante', data=formulario())
+    assert respuesta.status_code == 302
+    assert datos.consultar("SELECT correo FROM participantes WHERE nombre = 'Eva Ruiz'") == [('eva@x.mx',)]
+    assert datos.consultar("SELECT total FROM resumen_totales WHERE entidad = 'participantes'") == [(1,)]
+
+
+def test_duplicado_que_ya_no_existe_usa_el_indice_del_error(datos):
+    # Si el registro que chocaba se borró entre el INSERT y la revisión, el
+    # mensaje sale del nombre del índice que reportó MySQL
+    error = IntegrityError(msg="Duplicate entry 'x' for key 'participantes.uq_participantes_correo'",
+                           errno=errorcode.ER_DUP_ENTRY)
+    errores = aplicacion.errores_duplicado_participante(
+        datos.cursor(dictionary=True), error, 'Nadie', 'nadie@x.mx', '0', '')
+    assert errores == ['Ya existe un participante con ese correo electrónico.']
+
+
+def test_la_edicion_no_choca_consigo_misma(datos):
+    error = IntegrityError(msg="Duplicate entry", errno=errorcode.ER_DUP_ENTRY)
+    errores = aplicacion.errores_duplicado_participante(
+        datos.cursor(dictionary=True), error, 'Ana López', 'luis@x.mx', '5551234567', 'ana', excluir_id=1)
+    assert errores == ['Ya existe un participante con ese correo electrónico.']
+
+
+def test_inscribir_dos_veces(sesion, datos):
+    assert sesion.post('/inscribir', data={'id_participante': '1', 'id_curso': '1'}).status_code == 302
+    respuesta = sesion.post('/inscribir', data={'id_participante': '1', 'id_curso': '1'}, follow_redirects=True)
+    assert 'El participante ya está inscrito en este curso.' in respuesta.get_data(as_text=True)
+    assert datos.consultar("SELECT COUNT(*) FROM inscripciones") == [(1,)]
+    assert datos.consultar("SELECT inscritos FROM resumen_cursos WHERE id_curso = 1") == [(1,)]
+
+
+def test_inscribir_en_un_curso_que_no_existe(sesion, datos):
+    respuesta = sesion.post('/inscribir', data={'id_participante': '1', 'id_curso': '99'}, follow_redirects=True)
+    assert 'El participante o el curso seleccionado ya no existe.' in respuesta.get_data(as_text=True)
+    assert datos.consultar("SELECT COUNT(*) FROM inscripciones") == [(0,)]
@@ -0,0 +1,74 @@
+import mysql.connector
+import pytest
+
+import config
+import db
+
+
+class PoolFalso:
+    """
+    Pool cuyas conexiones son el retraso que reporta la réplica; `error`
+    se lanza al pedir una conexión.
+    """
+
+    def __init__(self, retraso=0, error=None):
+        self.retraso = retraso
+        self.error = error
+        self.pedidas = 0
+
+    def obtener(self):
+        self.pedidas += 1
+        if self.error is not None:
+            raise self.error
+        return self.retraso
+
+    def liberar(self, conn, descartar=False):
+        pass
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    pools = {db.PRIMARIA: PoolFalso(), 'r1': PoolFalso(), 'r2': PoolFalso()}
+    monkeypatch.setattr(config, 'DB_REPLICAS', ['r1', 'r2'])
+    monkeypatch.setattr(config, 'DB_REPLICA_REVISION', 60)
+    monkeypatch.setattr(config, 'DB_REPLICA_MAX_LAG', 5)
+    monkeypatch.setattr(db, '_retrasos', {})
+    monkeypatch.setattr(db, 'obtener_pool', lambda destino=db.PRIMARIA: pools[destino])
+    monkeypatch.setattr(db, 'medir_retraso', lambda conn: conn)
+    return pools
+
+
+def test_se_reparten_las_lecturas_entre_replicas_al_dia(pools):
+    pools['r2'].retraso = 30
+    assert {db.elegir_replica() for _ in range(4)} == {'r1'}
+    pools['r2'].retraso = 0
+    db._retrasos.clear()
+    assert {db.elegir_replica() for _ in range(4)} == {'r1', 'r2'}
+
+
+def test_un_pool_agotado_no_marca_caida_la_replica(pools):
+    assert db.elegir_replica() in ('r1', 'r2')          # r1 queda medida con retraso 0
+    db._retrasos['r1'] = (0, 0)                           # toca revisar r1 de nuevo
+    pools['r1'].error = db.PoolAgotado('ocupado')
+    assert db._retraso('r1') is None                      # esta petición la omite
+    assert db._retrasos['r1'][1] == 0                     # pero sigue al día para las demás
+    assert db._retraso('r1') == 0                         # y no se revisa otra vez enseguida
+    assert pools['r1'].pedidas == 2
+
+
+def test_un_error_de_conexion_si_la_marca_caida(pools):
+    pools['r1'].error = mysql.connector.InterfaceError('sin conexión')
+    assert db._retraso('r1') is None
+    assert db._retrasos['r1'][1] is None
+    assert db.elegir_replica() == 'r2'
+
+
+def test_lectura_con_replica_ocupada_va_a_la_primaria(pools):
+    pools['r2'].retraso = 30
+    db.elegir_replica()
+    pools['r1'].error = db.PoolAgotado('ocupado')
+    assert db.obtener_para_lectura() == (db.PRIMARIA, 0)
+    assert db._retrasos['r1'][1] == 0
+    pools['r1'].error = mysql.connector.InterfaceError('sin conexión')
+    assert db.obtener_para_lectura() == (db.PRIMARIA, 0)
+    assert db._retrasos['r1'][1] is None
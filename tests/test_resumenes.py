@@ -0,0 +1,71 @@
+import pytest
+
+import resumenes
+
+
+@pytest.fixture
+def datos(conexion):
+    cursor = conexion.cursor()
+    cursor.executemany("INSERT INTO categorias (nombre) VALUES (%s)", [('Tecnología',), ('Idiomas',)])
+    cursor.executemany("INSERT INTO cursos (nombre, id_categoria) VALUES (%s, %s)",
+                       [('Python', 1), ('Inglés', 2), ('Libre', None)])
+    cursor.executemany("INSERT INTO participantes (nombre, correo) VALUES (%s, %s)",
+                       [('Ana', 'ana@x.mx'), ('Luis', 'luis@x.mx')])
+    return conexion
+
+
+def inscribir(conexion, id_curso, id_participante, fecha):
+    cursor = conexion.cursor()
+    cursor.execute("INSERT INTO inscripciones (id_curso, id_participante, fecha) VALUES (%s, %s, %s)",
+                   (id_curso, id_participante, fecha))
+    resumenes.ajustar_inscripcion(conexion, id_curso, fecha, 1)
+
+
+def resumen(conexion):
+    return {
+        'totales': dict(conexion.consultar("SELECT entidad, total FROM resumen_totales")),
+        'cursos': dict(conexion.consultar("SELECT id_curso, inscritos FROM resumen_cursos WHERE inscritos <> 0")),
+        'categorias': dict(conexion.consultar(
+            "SELECT id_categoria, inscritos FROM resumen_categorias WHERE inscritos <> 0")),
+        'mensual': dict(conexion.consultar("SELECT mes, total FROM resumen_mensual WHERE total <> 0")),
+    }
+
+
+def test_cada_inscripcion_se_cuenta_en_todos_los_resumenes(datos):
+    inscribir(datos, 1, 1, '2024-03-05')
+    inscribir(datos, 1, 2, '2024-04-01')
+    inscribir(datos, 3, 1, None)
+    actual = resumen(datos)
+    assert actual['cursos'] == {1: 2, 3: 1}
+    assert actual['categorias'] == {1: 2}
+    assert actual['mensual'] == {'2024-03': 1, '2024-04': 1}
+    assert actual['totales']['inscripciones'] == 3
+
+
+def test_descontar_una_inscripcion(datos):
+    inscribir(datos, 2, 1, '2024-03-05')
+    resumenes.ajustar_inscripcion(datos, 2, '2024-03-05', -1)
+    actual = resumen(datos)
+    assert actual['cursos'] == actual['categorias'] == actual['mensual'] == {}
+    assert actual['totales']['inscripciones'] == 0
+
+
+def test_cambiar_de_categoria_mueve_los_inscritos(datos):
+    inscribir(datos, 1, 1, '2024-03-05')
+    inscribir(datos, 1, 2, '2024-03-06')
+    resumenes.cambiar_categoria_de_curso(datos, 1, 2)
+    assert resumen(datos)['categorias'] == {2: 2}
+
+
+def test_reconstruir_coincide_con_los_ajustes_incrementales(datos):
+    inscribir(datos, 1, 1, '2024-03-05')
+    inscribir(datos, 2, 1, '2024-03-20')
+    inscribir(datos, 2, 2, None)
+    resumenes.ajustar_total(datos, 'cursos', 3)
+    resumenes.ajustar_total(datos, 'participantes', 2)
+    incremental = resumen(datos)
+    version = datos.consultar("SELECT version FROM versiones_tablas WHERE tabla = 'inscripciones'")[0][0]
+
+    resumenes.reconstruir(datos)
+    assert resumen(datos) == incremental
+    assert datos.consultar("SELECT version FROM versiones_tablas WHERE tabla = 'inscripciones'")[0][0] == version + 1
@@ -0,0 +1,67 @@
+import mysql.connector
+
+import db
+import metricas
+
+
+class CursorFalso:
+    def __init__(self, dictionary):
+        self.dictionary = dictionary
+        self.cerrado = False
+
+    def close(self):
+        self.cerrado = True
+
+
+class ConexionFalsa:
+    def __init__(self):
+        self.preparados = []
+
+    def cursor(self, prepared=False, dictionary=False):
+        assert prepared
+        cursor = CursorFalso(dictionary)
+        self.preparados.append(cursor)
+        return cursor
+
+
+def contador(resultado):
+    return metricas._valores.get(('kevza_sentencias_preparadas_total', (('resultado', resultado),)), 0)
+
+
+def test_se_reutiliza_la_sentencia_y_el_mismo_objeto_sql():
+    conexion = ConexionFalsa()
+    preparadas = db.SentenciasPreparadas(conexion, 5)
+    sql = "SELECT nombre FROM cursos WHERE id_curso = %s"
+    antes = contador('reutilizada')
+    primera = preparadas.obtener(sql)
+    segunda = preparadas.obtener(''.join(sql))             # mismo texto, otro objeto
+    assert segunda == primera and segunda[0] is sql
+    assert preparadas.obtener(sql, dictionary=True)[1] is not primera[1]
+    assert len(conexion.preparados) == 2
+    assert contador('reutilizada') == antes + 1
+
+
+def test_al_pasarse_del_maximo_se_cierra_la_menos_usada():
+    conexion = ConexionFalsa()
+    preparadas = db.SentenciasPreparadas(conexion, 2)
+    _, a = preparadas.obtener('a')
+    _, b = preparadas.obtener('b')
+    preparadas.obtener('a')
+    _, c = preparadas.obtener('c')
+    assert len(preparadas) == 2
+    assert b.cerrado and not a.cerrado and not c.cerrado
+
+
+def test_el_pool_conserva_las_sentencias_entre_peticiones(conexion, monkeypatch):
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **parametros: conexion)
+    pool = db.PoolConexiones(tamano=1, timeout=1, reciclar=0, ping_tras=60, preparadas=10)
+    sql = "SELECT version FROM versiones_tablas WHERE tabla = %s"
+    for _ in range(2):
+        conn = pool.obtener()
+        cursor = conn.cursor(preparada=True)
+        cursor.execute(sql, ('cursos',))
+        assert cursor.fetchall() == [(0,)]
+        cursor.close()
+        pool.liberar(conn)
+    assert len(pool._preparadas[id(conexion)]) == 1
+    assert pool.contadores['creadas'] == 1
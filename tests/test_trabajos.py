@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+import config
+import trabajos
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'EXPORT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'EXPORT_TTL', 60)
+    monkeypatch.setattr(trabajos, '_limpieza_pid', os.getpid())   # sin hilo de limpieza
+    return tmp_path
+
+
+def trabajo(id_trabajo, estado='terminado', hace=0, usuario='admin'):
+    momento = time.time() - hace
+    datos = {'id': id_trabajo, 'tipo': 'cursos_excel', 'usuario': usuario, 'estado': estado,
+             'filas': 3, 'total': 3, 'creado': momento, 'error': None,
+             'terminado': None if estado in trabajos.ESTADOS_ACTIVOS else momento}
+    trabajos._guardar_estado(datos)
+    if estado == 'terminado':
+        with open(trabajos.ruta_archivo(datos), 'wb') as archivo:
+            archivo.write(b'xlsx')
+    return datos
+
+
+def test_un_trabajo_expirado_ya_no_se_lee():
+    trabajo('vigente', hace=10)
+    trabajo('viejo', hace=120)
+    assert trabajos.leer_estado('vigente')['estado'] == 'terminado'
+    assert trabajos.leer_estado('viejo') is None
+    assert trabajos.leer_estado('viejo', incluir_expirados=True)['id'] == 'viejo'
+
+
+def test_un_trabajo_activo_no_expira():
+    trabajo('largo', estado='en_proceso', hace=120)
+    assert trabajos.leer_estado('largo')['estado'] == 'en_proceso'
+
+
+def test_limpiar_borra_estado_y_archivo_de_los_expirados(directorio):
+    trabajo('vigente', hace=10)
+    trabajo('viejo', hace=120)
+    (directorio / 'huerfano.xlsx.part').write_bytes(b'')
+    os.utime(directorio / 'huerfano.xlsx.part', (time.time() - 120,) * 2)
+
+    assert trabajos.limpiar_expirados() == 3
+    assert sorted(os.listdir(directorio)) == ['vigente.json', 'vigente.xlsx']
+
+
+def test_los_expirados_no_cuentan_como_activos():
+    trabajo('a', estado='pendiente')
+    trabajo('b', estado='en_proceso')
+    trabajo('c', hace=120)
+    assert trabajos.contar_activos() == 2
+
+
+def test_descarga_de_un_trabajo_expirado(sesion):
+    trabajo('vigente', hace=10)
+    trabajo('viejo', hace=120)
+    trabajo('ajeno', usuario='otro')
+    assert sesion.get('/exportaciones/trabajos/vigente/descarga').data == b'xlsx'
+    assert sesion.get('/exportaciones/trabajos/viejo/descarga').status_code == 410
+    assert sesion.get('/exportaciones/trabajos/viejo').status_code == 410
+    assert sesion.get('/exportaciones/trabajos/ajeno').status_code == 404
+    assert sesion.get('/exportaciones/trabajos/noexiste').status_code == 404
+
+
+def test_las_rutas_directas_llevan_al_trabajo(sesion):
+    respuesta = sesion.get('/exportar_participantes_pdf')
+    assert respuesta.status_code == 301
+    assert respuesta.headers['Location'].endswith('/exportaciones/participantes_pdf')
+    assert sesion.get('/exportar_otra_cosa').status_code == 404
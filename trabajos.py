@@ -0,0 +1,268 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import mysql.connector
+
+import config
+import db
+import exportaciones
+import metricas
+
+# ----------------- Trabajos de exportación en segundo plano ------------------
+#
+# Las exportaciones pesadas se generan en un pool acotado de procesos para
+# no ocupar a los workers web. El estado de cada trabajo y el archivo
+# generado se guardan en config.EXPORT_DIR, así que cualquier proceso web
+# puede informar el progreso o servir la descarga. Un trabajo terminado
+# expira a los config.EXPORT_TTL segundos: deja de verse en cuanto expira y
+# un hilo de cada proceso borra sus archivos (ver iniciar_limpieza).
+
+ESTADOS_ACTIVOS = ('pendiente', 'en_proceso')
+
+_executor = None
+_executor_pid = None
+_limpieza_pid = None
+_candado = threading.Lock()
+
+
+class DemasiadosTrabajos(Exception):
+    """
+    Se lanza cuando ya hay config.EXPORT_MAX_PENDIENTES trabajos sin terminar.
+    """
+
+
+def _ruta(id_trabajo, extension):
+    return os.path.join(config.EXPORT_DIR, f"{id_trabajo}.{extension}")
+
+
+def _guardar_estado(estado):
+    """
+    Escribe el estado de un trabajo de forma atómica (archivo temporal + rename).
+    """
+    ruta = _ruta(estado['id'], 'json')
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(estado, archivo)
+    os.replace(temporal, ruta)
+
+
+def expirado(estado, ahora=None):
+    """
+    El trabajo terminó (bien o con error) hace más de config.EXPORT_TTL segundos.
+    """
+    if estado['estado'] in ESTADOS_ACTIVOS:
+        return False
+    terminado = estado['terminado'] or estado['creado']
+    return terminado < (ahora or time.time()) - config.EXPORT_TTL
+
+
+def leer_estado(id_trabajo, incluir_expirados=False):
+    """
+    Devuelve el estado de un trabajo o None si no existe (o ya expiró,
+    salvo con incluir_expirados=True).
+    """
+    if not id_trabajo.isalnum():
+        return None
+    try:
+        with open(_ruta(id_trabajo, 'json'), encoding='utf-8') as archivo:
+            estado = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    return None if expirado(estado) and not incluir_expirados else estado
+
+
+def ruta_archivo(estado):
+    return _ruta(estado['id'], exportaciones.DEFINICIONES[estado['tipo']]['formato'])
+
+
+def _obtener_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _candado:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=config.EXPORT_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'))
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def limpiar_expirados():
+    """
+    Borra los estados y archivos de trabajos expirados, y los de trabajos que
+    no avanzan desde hace más de config.EXPORT_TTL segundos (su proceso murió).
+    Devuelve cuántos archivos borró.
+    """
+    ahora = time.time()
+    limite = ahora - config.EXPORT_TTL
+    borrados = 0
+    try:
+        nombres = os.listdir(config.EXPORT_DIR)
+    except FileNotFoundError:
+        return 0
+    for nombre in nombres:
+        ruta = os.path.join(config.EXPORT_DIR, nombre)
+        id_trabajo, _, extension = nombre.partition('.')
+        try:
+            if extension == 'json':
+                with open(ruta, encoding='utf-8') as archivo:
+                    estado = json.load(archivo)
+                if not expirado(estado, ahora) and os.path.getmtime(ruta) >= limite:
+                    continue
+                borrar = [ruta_archivo(estado), ruta_archivo(estado) + '.part', ruta]
+            elif not os.path.exists(_ruta(id_trabajo, 'json')) and os.path.getmtime(ruta) < limite:
+                # Archivo sin estado (p. ej. un .part de un proceso que murió)
+                borrar = [ruta]
+            else:
+                continue
+        except (OSError, ValueError, KeyError):
+            continue
+        for archivo in borrar:
+            try:
+                os.remove(archivo)
+                borrados += 1
+            except FileNotFoundError:
+                pass
+    return borrados
+
+
+def contar_activos():
+    """
+    Trabajos pendientes o en proceso.
+    """
+    activos = 0
+    try:
+        nombres = os.listdir(config.EXPORT_DIR)
+    except FileNotFoundError:
+        return 0
+    for nombre in nombres:
+        if nombre.endswith('.json'):
+            estado = leer_estado(nombre[:-len('.json')])
+            if estado and estado['estado'] in ESTADOS_ACTIVOS:
+                activos += 1
+    return activos
+
+
+def iniciar_limpieza():
+    """
+    Arranca en el proceso actual, si no está ya, el hilo que llama a
+    limpiar_expirados() cada config.EXPORT_LIMPIEZA segundos. Se vuelve a
+    arrancar si el proceso cambió (por ejemplo, tras un fork).
+    """
+    global _limpieza_pid
+    if _limpieza_pid == os.getpid():
+        return
+    with _candado:
+        if _limpieza_pid == os.getpid():
+            return
+        _limpieza_pid = os.getpid()
+
+    def limpiar_siempre():
+        while True:
+            try:
+                limpiar_expirados()
+            except OSError:
+                pass        # p. ej. EXPORT_DIR sin permisos; se reintenta en la siguiente vuelta
+            time.sleep(config.EXPORT_LIMPIEZA)
+
+    threading.Thread(target=limpiar_siempre, name='limpieza-exportaciones', daemon=True).start()
+
+
+def iniciar(tipo, usuario):
+    """
+    Registra un trabajo nuevo, lo manda al pool de procesos y devuelve su estado.
+    """
+    os.makedirs(config.EXPORT_DIR, exist_ok=True)
+    if contar_activos() >= config.EXPORT_MAX_PENDIENTES:
+        raise DemasiadosTrabajos('Hay demasiadas exportaciones en curso.')
+
+    estado = {
+        'id': uuid.uuid4().hex,
+        'tipo': tipo,
+        'usuario': usuario,
+        'estado': 'pendiente',
+        'filas': 0,
+        'total': None,
+        'creado': time.time(),
+        'terminado': None,
+        'error': None,
+    }
+    _guardar_estado(estado)
+
+    futuro = _obtener_executor().submit(ejecutar, estado)
+
+    def al_terminar(f):
+        # Si el proceso hijo murió sin poder registrar el error, se registra aquí
+        if f.exception() is not None:
+            actual = leer_estado(estado['id']) or estado
+            if actual['estado'] in ESTADOS_ACTIVOS:
+                actual.update(estado='error', error=str(f.exception()), terminado=time.time())
+                _guardar_estado(actual)
+
+    futuro.add_done_callback(al_terminar)
+    return estado
+
+
+def conectar_para_lectura():
+    """
+    Conexión propia a una réplica al día o, si no hay o no responde, a la primaria.
+    """
+    host = db.elegir_replica()
+    if host is not None:
+        try:
+            return db.conectar(host)
+        except mysql.connector.Error:
+            db.marcar_caida(host)
+    return db.conectar()
+
+
+def ejecutar(estado):
+    """
+    Genera el archivo de un trabajo. Se ejecuta en un proceso del pool con su
+    propia conexión a la base de datos (a una réplica al día, si hay) e informa
+    el avance en el archivo de estado.
+    """
+    definicion = exportaciones.DEFINICIONES[estado['tipo']]
+    destino = ruta_archivo(estado)
+    temporal = destino + '.part'
+    conn = conectar_para_lectura()
+    try:
+        cursor = conn.cursor()
+        # Total aproximado para el porcentaje, tomado de las tablas de resumen
+        cursor.execute("SELECT total FROM resumen_totales WHERE entidad = %s", (definicion['entidad'],))
+        fila = cursor.fetchone()
+        cursor.close()
+        estado.update(estado='en_proceso', total=fila[0] if fila else None)
+        _guardar_estado(estado)
+
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(definicion['sql'])
+
+        def con_avance(filas):
+            for fila in filas:
+                yield fila
+                estado['filas'] += 1
+                if estado['filas'] % config.EXPORT_CHUNK_SIZE == 0:
+                    _guardar_estado(estado)
+
+        with open(temporal, 'wb') as salida, \
+                metricas.medir('kevza_exportacion_segundos', tipo=estado['tipo'], modo='trabajo'):
+            exportaciones.escribir(estado['tipo'], con_avance(exportaciones.leer_en_bloques(cursor)), salida)
+        os.replace(temporal, destino)
+        estado.update(estado='terminado', terminado=time.time())
+    except Exception as error:
+        estado.update(estado='error', error=str(error), terminado=time.time())
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    finally:
+        conn.close()
+        _guardar_estado(estado)
+        try:
+            metricas.guardar()
+        except OSError:
+            pass
+    return estado['estado']
@@ -0,0 +1,42 @@
+# ----------------- Versiones de tablas ------------------
+#
+# La tabla versiones_tablas guarda un contador por tabla que se incrementa en
+# la misma transacción que cada escritura, junto con el momento del último
+# cambio. Los cachés en memoria (p. ej. el catálogo de cursos) y la API JSON
+# (ETag / Last-Modified) la usan para saber si sus datos siguen al día.
+
+
+def marcar_cambio(conn, *tablas):
+    """
+    Incrementa la versión de las tablas modificadas dentro de la transacción
+    actual y devuelve las nuevas versiones como {tabla: versión}.
+    Los cachés en memoria (p. ej. el catálogo de cursos) las usan para saber
+    si siguen al día.
+    """
+    marcadores = ', '.join(['%s'] * len(tablas))
+    cursor = conn.cursor()
+    cursor.execute(f"UPDATE versiones_tablas SET version = version + 1 WHERE tabla IN ({marcadores})", tablas)
+    cursor.execute(f"SELECT tabla, version FROM versiones_tablas WHERE tabla IN ({marcadores})", tablas)
+    versiones = dict(cursor.fetchall())
+    cursor.close()
+    return versiones
+
+
+def leer(conn, tablas):
+    """
+    Devuelve ({tabla: versión}, último cambio) de las tablas indicadas. El
+    último cambio es un timestamp Unix (segundos) o None si no se conoce.
+    Se consulta en casi cada petición, así que usa sentencia preparada:
+    `conn` debe venir del pool (ver db.ConexionMedida).
+    """
+    marcadores = ', '.join(['%s'] * len(tablas))
+    cursor = conn.cursor(preparada=True)
+    cursor.execute(f"""
+        SELECT tabla, version, UNIX_TIMESTAMP(actualizada_en)
+        FROM versiones_tablas WHERE tabla IN ({marcadores})
+    """, tuple(tablas))
+    filas = cursor.fetchall()
+    cursor.close()
+    versiones = {tabla: version for tabla, version, _ in filas}
+    momentos = [momento for _, _, momento in filas if momento is not None]
+    return versiones, (int(max(momentos)) if momentos else None)